@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import ORMExperience, ORMSave, ORMFlag
-from scenes.factories import create_index_experiences_interactor
+from pachatary.factories import create_picture_variation_job_repo
+from .factories import create_experience_index_event_repo
 
 
 class ExperienceAdmin(admin.ModelAdmin):
@@ -9,7 +10,14 @@ class ExperienceAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
-        create_index_experiences_interactor().set_params(obj.id, obj.id).execute()
+        create_experience_index_event_repo().add_events([obj.id])
+        if 'picture' in form.changed_data and obj.picture:
+            create_picture_variation_job_repo().add_job(obj._meta.label, obj.id, obj.picture.name)
+
+    def delete_model(self, request, obj):
+        experience_id = obj.id
+        super().delete_model(request, obj)
+        create_experience_index_event_repo().add_events([experience_id])
 
 
 admin.site.register(ORMExperience, ExperienceAdmin)
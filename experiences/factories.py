@@ -1,37 +1,66 @@
-from elasticsearch import Elasticsearch
-import certifi
+from datetime import timedelta
 
 from django.urls import reverse
 from django.conf import settings
+from django.core.cache import caches
 
+from pachatary.caches import LRUCache
+from pachatary.container import container
+from pachatary.elastic import get_elastic_client, get_no_retries_elastic_client
+from pachatary.factories import create_picture_validator, create_stored_picture_repo
 from people.basic_factories import create_person_permissions_validator, create_block_repo
-from profiles.factories import create_get_profile_interactor
-from .repositories import ExperienceRepo, ExperienceSearchRepo
+from profiles.factories import create_get_profile_interactor, create_profile_repo
+from .repositories import ExperienceRepo, ExperienceSearchRepo, ExperienceIndexEventRepo
 from .validators import ExperienceValidator, ExperiencePermissionsValidator
 from .interactors import GetExperiencesInteractor, CreateNewExperienceInteractor, \
         ModifyExperienceInteractor, UploadExperiencePictureInteractor, SaveUnsaveExperienceInteractor, \
         SearchExperiencesInteractor, GetOrCreateExperienceShareIdInteractor, IdGenerator, \
-        GetExperienceInteractor, FlagExperienceInteractor
+        GetExperienceInteractor, FlagExperienceInteractor, SearchExperiencesInAreaInteractor, SuggestInteractor
 from .views import ExperiencesView, ExperienceView, UploadExperiencePictureView, SaveExperienceView, \
-        SearchExperiencesView, ExperienceShareUrlView, TranslateExperienceShareIdView, FlagExperienceView
+        SearchExperiencesView, ExperienceShareUrlView, TranslateExperienceShareIdView, FlagExperienceView, \
+        SuggestView
 
 
+@container.stateless
 def create_experience_elastic_repo():
-    if not settings.LOCAL_DEPLOY:
-        elastic_client = Elasticsearch([settings.ELASTICSEARCH_URL], use_ssl=True, ca_certs=certifi.where())
-    else:
-        elastic_client = Elasticsearch([settings.ELASTICSEARCH_URL])
-    return ExperienceSearchRepo(elastic_client)
+    search_cache = None
+    if settings.EXPERIENCE_SEARCH_CACHE_SIZE > 0:
+        search_cache = LRUCache(max_size=settings.EXPERIENCE_SEARCH_CACHE_SIZE,
+                                ttl=settings.EXPERIENCE_SEARCH_CACHE_TTL)
+    suggest_cache = None
+    if settings.SUGGEST_CACHE_SIZE > 0:
+        suggest_cache = LRUCache(max_size=settings.SUGGEST_CACHE_SIZE, ttl=settings.SUGGEST_CACHE_TTL)
+    generation_cache = caches[settings.EXPERIENCE_SEARCH_GENERATION_CACHE] \
+        if settings.EXPERIENCE_SEARCH_GENERATION_CACHE else None
+    return ExperienceSearchRepo(get_elastic_client(),
+                                number_of_shards=settings.ELASTICSEARCH_EXPERIENCE_SHARDS,
+                                number_of_replicas=settings.ELASTICSEARCH_EXPERIENCE_REPLICAS,
+                                search_cache=search_cache,
+                                geohash_precision=settings.EXPERIENCE_SEARCH_GEOHASH_PRECISION,
+                                suggest_cache=suggest_cache,
+                                suggest_timeout=settings.EXPERIENCE_SUGGEST_TIMEOUT,
+                                generation_cache=generation_cache,
+                                suggest_elastic_client=get_no_retries_elastic_client())
+
+
+@container.stateless
+def create_experience_repo():
+    return ExperienceRepo(search_repo=create_experience_elastic_repo(),
+                          stored_picture_repo=create_stored_picture_repo())
 
 
-def create_experience_repo():
-    return ExperienceRepo(search_repo=create_experience_elastic_repo())
+@container.stateless
+def create_experience_index_event_repo():
+    return ExperienceIndexEventRepo(retention=timedelta(days=settings.EXPERIENCE_INDEX_EVENT_RETENTION_DAYS),
+                                    max_attempts=settings.EXPERIENCE_INDEX_EVENT_MAX_ATTEMPTS)
 
 
+@container.stateless
 def create_experience_validator():
     return ExperienceValidator()
 
 
+@container.stateless
 def create_experience_permissions_validator():
     return ExperiencePermissionsValidator(experience_repo=create_experience_repo(),
                                           person_permissions_validator=create_person_permissions_validator())
@@ -49,6 +78,18 @@ def create_search_experiences_interactor():
                                        permissions_validator=create_experience_permissions_validator())
 
 
+def create_search_experiences_in_area_interactor():
+    return SearchExperiencesInAreaInteractor(experience_repo=create_experience_repo(),
+                                             block_repo=create_block_repo(),
+                                             permissions_validator=create_experience_permissions_validator())
+
+
+def create_suggest_interactor():
+    return SuggestInteractor(experience_repo=create_experience_repo(), profile_repo=create_profile_repo(),
+                             block_repo=create_block_repo(),
+                             permissions_validator=create_experience_permissions_validator())
+
+
 def create_create_new_experience_interactor():
     return CreateNewExperienceInteractor(create_experience_repo(), create_experience_validator(),
                                          create_person_permissions_validator())
@@ -62,7 +103,8 @@ def create_modify_experience_interactor():
 
 def create_upload_experience_picture_interactor():
     return UploadExperiencePictureInteractor(experience_repo=create_experience_repo(),
-                                             permissions_validator=create_experience_permissions_validator())
+                                             permissions_validator=create_experience_permissions_validator(),
+                                             picture_validator=create_picture_validator())
 
 
 def create_save_unsave_experience_interactor():
@@ -77,6 +119,7 @@ def create_flag_experience_interactor():
                                     get_experience_interactor=create_get_experience_interactor())
 
 
+@container.stateless
 def create_id_generator():
     return IdGenerator()
 
@@ -104,7 +147,12 @@ def create_experiences_view(request, **kwargs):
 def create_search_experiences_view(request, **kwargs):
     return SearchExperiencesView(search_experiences_interactor=create_search_experiences_interactor(),
                                  search_experiences_base_url=request.build_absolute_uri(reverse('search-experiences')) \
-                                         .replace("http://", "https://"))
+                                         .replace("http://", "https://"),
+                                 search_experiences_in_area_interactor=create_search_experiences_in_area_interactor())
+
+
+def create_suggest_view(request, **kwargs):
+    return SuggestView(suggest_interactor=create_suggest_interactor())
 
 
 def create_experience_view(request, **kwargs):
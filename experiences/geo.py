@@ -0,0 +1,60 @@
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=5):
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bits_count = 0
+    is_longitude_bit = True
+    while len(geohash) < precision:
+        value, value_range = (longitude, longitude_range) if is_longitude_bit else (latitude, latitude_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        is_longitude_bit = not is_longitude_bit
+        bits_count += 1
+        if bits_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bits_count = 0
+    return ''.join(geohash)
+
+
+def decode_geohash(geohash):
+    latitude_range = [-90.0, 90.0]
+    longitude_range = [-180.0, 180.0]
+    is_longitude_bit = True
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            value_range = longitude_range if is_longitude_bit else latitude_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if (bits >> shift) & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            is_longitude_bit = not is_longitude_bit
+    return ((latitude_range[0] + latitude_range[1]) / 2, (longitude_range[0] + longitude_range[1]) / 2)
+
+
+def get_centroid(points):
+    if len(points) == 0:
+        return (0.0, 0.0)
+    x = y = z = 0.0
+    for latitude, longitude in points:
+        latitude, longitude = math.radians(latitude), math.radians(longitude)
+        x += math.cos(latitude) * math.cos(longitude)
+        y += math.cos(latitude) * math.sin(longitude)
+        z += math.sin(latitude)
+    x, y, z = x / len(points), y / len(points), z / len(points)
+    if math.sqrt(x * x + y * y + z * z) < 1e-9:
+        return (float(points[0][0]), float(points[0][1]))
+    return (math.degrees(math.atan2(z, math.sqrt(x * x + y * y))), math.degrees(math.atan2(y, x)))
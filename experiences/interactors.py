@@ -1,7 +1,7 @@
 import random
 from enum import Enum
 
-from pachatary.exceptions import ConflictException, BlockedContentException
+from pachatary.exceptions import ConflictException, BlockedContentException, InvalidEntityException
 from experiences.entities import Experience
 
 
@@ -14,12 +14,13 @@ class GetExperiencesInteractor:
         self.get_profile_interactor = get_profile_interactor
         self.permissions_validator = permissions_validator
 
-    def set_params(self, saved, username, logged_person_id, limit, offset):
+    def set_params(self, saved, username, logged_person_id, limit, offset, cursor=None):
         self.saved = saved
         self.username = username
         self.logged_person_id = logged_person_id
         self.limit = limit
         self.offset = offset
+        self.cursor = cursor
         return self
 
     def execute(self):
@@ -30,6 +31,7 @@ class GetExperiencesInteractor:
 
         if self.saved:
             result = self.experience_repo.get_saved_experiences(limit=self.limit, offset=self.offset,
+                                                                cursor=self.cursor,
                                                                 logged_person_id=self.logged_person_id)
         else:
             if self.username == 'self':
@@ -39,6 +41,7 @@ class GetExperiencesInteractor:
                         username=self.username, logged_person_id=self.logged_person_id).execute().person_id
 
             result = self.experience_repo.get_person_experiences(limit=self.limit, offset=self.offset,
+                                                                 cursor=self.cursor,
                                                                  logged_person_id=self.logged_person_id,
                                                                  target_person_id=target_person_id)
 
@@ -55,12 +58,14 @@ class SearchExperiencesInteractor:
         self.block_repo = block_repo
         self.permissions_validator = permissions_validator
 
-    def set_params(self, word, location, logged_person_id, limit, offset):
+    def set_params(self, word, location, logged_person_id, limit, offset, cursor=None, lite=False):
         self.word = word
         self.location = location
         self.logged_person_id = logged_person_id
         self.limit = limit
         self.offset = offset
+        self.cursor = cursor
+        self.lite = lite
         return self
 
     def execute(self):
@@ -68,19 +73,93 @@ class SearchExperiencesInteractor:
 
         if self.limit > SearchExperiencesInteractor.MAX_PAGINATION_LIMIT:
             self.limit = SearchExperiencesInteractor.MAX_PAGINATION_LIMIT
+        blocked_people = self.block_repo.get_blocked_people(person_id=self.logged_person_id)
         result = self.experience_repo.search_experiences(self.logged_person_id,
                                                          word=self.word, location=self.location,
-                                                         limit=self.limit, offset=self.offset)
-
-        blocked_people = self.block_repo.get_blocked_people(person_id=self.logged_person_id)
-        if len(blocked_people) > 0:
-            filtered_experiences = [x for x in result['results'] if x.author_id not in blocked_people]
-            result.update({'results': filtered_experiences})
+                                                         limit=self.limit, offset=self.offset,
+                                                         cursor=self.cursor, excluded_authors_ids=blocked_people,
+                                                         lite=self.lite)
 
         result.update({'next_limit': self.limit})
         return result
 
 
+class SearchExperiencesInAreaInteractor:
+
+    MAX_LIMIT = 100
+    MAX_CLUSTERS_PRECISION = 12
+
+    def __init__(self, experience_repo, block_repo, permissions_validator):
+        self.experience_repo = experience_repo
+        self.block_repo = block_repo
+        self.permissions_validator = permissions_validator
+
+    def set_params(self, word, bounding_box, location, radius, clusters_precision, logged_person_id, limit):
+        self.word = word
+        self.bounding_box = bounding_box
+        self.location = location
+        self.radius = radius
+        self.clusters_precision = clusters_precision
+        self.logged_person_id = logged_person_id
+        self.limit = limit
+        return self
+
+    def execute(self):
+        self.permissions_validator.validate_permissions(logged_person_id=self.logged_person_id)
+
+        if self.bounding_box is None and (self.location is None or self.radius is None):
+            raise InvalidEntityException(source='area', code='empty_attribute',
+                                         message='Bounding box or location and radius are required')
+        if self.bounding_box is None and self.radius <= 0:
+            raise InvalidEntityException(source='radius', code='wrong_size', message='Radius must be positive')
+        if self.clusters_precision is not None and \
+                not 1 <= self.clusters_precision <= SearchExperiencesInAreaInteractor.MAX_CLUSTERS_PRECISION:
+            raise InvalidEntityException(source='clusters', code='wrong_size',
+                                         message='Clusters precision must be between 1 and 12')
+
+        if self.limit > SearchExperiencesInAreaInteractor.MAX_LIMIT:
+            self.limit = SearchExperiencesInAreaInteractor.MAX_LIMIT
+        blocked_people = self.block_repo.get_blocked_people(person_id=self.logged_person_id)
+        return self.experience_repo.search_experiences_in_area(self.logged_person_id, word=self.word,
+                                                               bounding_box=self.bounding_box,
+                                                               location=self.location, radius=self.radius,
+                                                               limit=self.limit,
+                                                               excluded_authors_ids=blocked_people,
+                                                               clusters_precision=self.clusters_precision)
+
+
+class SuggestInteractor:
+
+    MAX_LIMIT = 10
+
+    def __init__(self, experience_repo, profile_repo, block_repo, permissions_validator):
+        self.experience_repo = experience_repo
+        self.profile_repo = profile_repo
+        self.block_repo = block_repo
+        self.permissions_validator = permissions_validator
+
+    def set_params(self, word, logged_person_id, limit):
+        self.word = word
+        self.logged_person_id = logged_person_id
+        self.limit = limit
+        return self
+
+    def execute(self):
+        self.permissions_validator.validate_permissions(logged_person_id=self.logged_person_id)
+
+        if self.word is None or self.word.strip() == '':
+            return {'experiences': [], 'usernames': []}
+        if self.limit > SuggestInteractor.MAX_LIMIT:
+            self.limit = SuggestInteractor.MAX_LIMIT
+
+        blocked_people = self.block_repo.get_blocked_people(person_id=self.logged_person_id)
+        experiences = self.experience_repo.suggest_experiences(self.word, limit=self.limit,
+                                                               excluded_authors_ids=blocked_people)
+        usernames = self.profile_repo.suggest_usernames(self.word, limit=self.limit,
+                                                        excluded_people_ids=blocked_people)
+        return {'experiences': experiences, 'usernames': usernames}
+
+
 class CreateNewExperienceInteractor:
 
     def __init__(self, experience_repo, experience_validator, permissions_validator):
@@ -132,9 +211,10 @@ class ModifyExperienceInteractor:
 
 class UploadExperiencePictureInteractor:
 
-    def __init__(self, experience_repo, permissions_validator):
+    def __init__(self, experience_repo, permissions_validator, picture_validator):
         self.experience_repo = experience_repo
         self.permissions_validator = permissions_validator
+        self.picture_validator = picture_validator
 
     def set_params(self, experience_id, picture, logged_person_id):
         self.experience_id = experience_id
@@ -145,6 +225,7 @@ class UploadExperiencePictureInteractor:
     def execute(self):
         self.permissions_validator.validate_permissions(logged_person_id=self.logged_person_id,
                                                         has_permissions_to_modify_experience=self.experience_id)
+        self.picture_validator.validate_picture(self.picture)
         return self.experience_repo.attach_picture_to_experience(experience_id=self.experience_id, picture=self.picture)
 
 
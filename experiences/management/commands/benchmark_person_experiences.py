@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from experiences.factories import create_experience_repo
+from experiences.models import ORMExperience, ORMSave
+from people.models import ORMPerson
+from profiles.models import ORMProfile
+
+
+class Command(BaseCommand):
+    help = 'Measure person experiences page cost for a viewer holding many saves (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--saves', type=int, default=50000)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            viewer, author = self.given_a_viewer_with_saves_on_author_experiences(options['saves'])
+            repo = create_experience_repo()
+
+            with CaptureQueriesContext(connection) as queries:
+                repo.get_person_experiences(logged_person_id=str(viewer.id), target_person_id=str(author.id),
+                                            offset=0, limit=options['limit'])
+
+            start = time.time()
+            for _ in range(options['iterations']):
+                repo.get_person_experiences(logged_person_id=str(viewer.id), target_person_id=str(author.id),
+                                            offset=0, limit=options['limit'])
+            elapsed_ms = (time.time() - start) * 1000 / options['iterations']
+
+            self.stdout.write('saves={} limit={} queries_per_page={} time_per_page={:.1f}ms'
+                              .format(options['saves'], options['limit'], len(queries), elapsed_ms))
+            transaction.set_rollback(True)
+
+    def given_a_viewer_with_saves_on_author_experiences(self, saves):
+        viewer = ORMPerson.objects.create()
+        author = ORMPerson.objects.create()
+        ORMProfile.objects.create(person=viewer, username='benchmark.viewer')
+        ORMProfile.objects.create(person=author, username='benchmark.author')
+
+        ORMExperience.objects.bulk_create([ORMExperience(title='e{}'.format(i), author=author)
+                                           for i in range(saves)], batch_size=500)
+        experiences_ids = ORMExperience.objects.filter(author=author).values_list('id', flat=True)
+        ORMSave.objects.bulk_create([ORMSave(person=viewer, experience_id=experience_id)
+                                     for experience_id in experiences_ids], batch_size=500)
+        return viewer, author
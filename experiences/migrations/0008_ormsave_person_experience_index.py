@@ -0,0 +1,17 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0007_ormflag'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ormsave',
+            index=models.Index(fields=['person', 'experience'], name='save_person_experience_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0009_ormexperience_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ORMExperienceIndexEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('experience_id', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Experience index event',
+                'verbose_name_plural': 'Experience index events',
+            },
+        ),
+    ]
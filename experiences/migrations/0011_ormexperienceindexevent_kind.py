@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 13:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0010_ormexperienceindexevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ormexperienceindexevent',
+            name='kind',
+            field=models.CharField(choices=[('F', 'Full document'), ('S', 'Saves count')], default='F', max_length=1),
+        ),
+    ]
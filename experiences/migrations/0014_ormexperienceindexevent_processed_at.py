@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0013_ormexperience_picture_has_webp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ormexperienceindexevent',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('experiences', '0014_ormexperienceindexevent_processed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ormexperienceindexevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
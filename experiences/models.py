@@ -12,12 +12,16 @@ class ORMExperience(models.Model):
                             variations={'large': (1280, 1280),
                                         'medium': (640, 640),
                                         'small': (320, 320)},
+                            render_variations=False,
                             blank=True)
+    picture_is_processing = models.BooleanField(default=False)
+    picture_has_webp = models.BooleanField(default=False)
     author = models.ForeignKey(ORMPerson, on_delete=models.CASCADE)
     share_id = models.CharField(unique=True, max_length=8, null=True, blank=True)
 
     saves_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     is_deleted = models.BooleanField(default=False)
 
@@ -38,6 +42,7 @@ class ORMSave(models.Model):
     class Meta:
         verbose_name = 'Save'
         verbose_name_plural = 'Saves'
+        indexes = [models.Index(fields=['person', 'experience'], name='save_person_experience_idx')]
 
     def __str__(self):
         return "{} - {}".format(str(self.person), str(self.experience))
@@ -57,3 +62,26 @@ class ORMFlag(models.Model):
 
     def __str__(self):
         return "{} - {}".format(str(self.person), str(self.experience))
+
+
+class ORMExperienceIndexEvent(models.Model):
+    FULL = 'F'
+    SAVES_COUNT = 'S'
+    KINDS = (
+        (FULL, 'Full document'),
+        (SAVES_COUNT, 'Saves count'),
+    )
+
+    experience_id = models.IntegerField()
+    kind = models.CharField(max_length=1, choices=KINDS, default=FULL)
+    attempts = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Experience index event'
+        verbose_name_plural = 'Experience index events'
+
+    def __str__(self):
+        return "{} - {}".format(str(self.experience_id), str(self.created_at))
@@ -1,27 +1,33 @@
-from elasticsearch import NotFoundError as ElasticSearchNotFoundError
+import time
+from datetime import datetime, timedelta
 
-from django.db.models import F, Case, When
-from django.db import IntegrityError
+from elasticsearch import NotFoundError as ElasticSearchNotFoundError, TransportError as ElasticSearchTransportError
+from elasticsearch.helpers import streaming_bulk, parallel_bulk
+
+from django.db.models import F, Min, Max
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 from pachatary.entities import Picture
 from pachatary.exceptions import EntityDoesNotExistException, ConflictException
+from pachatary.pagination import encode_cursor, decode_cursor
+from pachatary.pictures import build_picture
 from profiles.entities import Profile
-from .models import ORMExperience, ORMSave, ORMFlag
+from .models import ORMExperience, ORMSave, ORMFlag, ORMExperienceIndexEvent
 from .entities import Experience
+from .geo import encode_geohash, decode_geohash, get_centroid
 
 
 class ExperienceRepo:
 
-    def __init__(self, search_repo=None):
+    def __init__(self, search_repo=None, stored_picture_repo=None):
         self.search_repo = search_repo
+        self.stored_picture_repo = stored_picture_repo
 
     def _decode_db_experience(self, db_experience, logged_person_id, is_saved=False):
-        if not db_experience.picture:
-            picture = None
-        else:
-            picture = Picture(small_url=db_experience.picture.small.url,
-                              medium_url=db_experience.picture.medium.url,
-                              large_url=db_experience.picture.large.url)
+        picture = build_picture(db_experience.picture.name, ('small', 'medium', 'large'),
+                                is_processing=db_experience.picture_is_processing,
+                                has_webp=db_experience.picture_has_webp)
 
         author_profile = self._decode_db_profile(db_experience.author.profile, logged_person_id)
         return Experience(id=str(db_experience.id),
@@ -36,58 +42,70 @@ class ExperienceRepo:
                           share_id=db_experience.share_id)
 
     def _decode_db_profile(self, db_profile, logged_person_id):
-        if not db_profile.picture:
-            picture = None
-        else:
-            picture = Picture(tiny_url=db_profile.picture.tiny.url,
-                              small_url=db_profile.picture.small.url,
-                              medium_url=db_profile.picture.medium.url)
+        picture = build_picture(db_profile.picture.name, ('tiny', 'small', 'medium'),
+                                is_processing=db_profile.picture_is_processing,
+                                has_webp=db_profile.picture_has_webp)
         return Profile(person_id=str(db_profile.person_id),
                        username=db_profile.username,
                        bio=db_profile.bio,
                        picture=picture,
                        is_me=(str(db_profile.person_id) == logged_person_id))
 
-    def get_saved_experiences(self, logged_person_id, offset=0, limit=100):
+    def _paginate(self, db_queryset, offset, cursor, limit):
+        if offset is None:
+            if cursor is not None:
+                db_queryset = db_queryset.filter(id__lt=decode_cursor(cursor)[0])
+            paginated_db_queryset = list(db_queryset[0:limit+1])
+        else:
+            paginated_db_queryset = list(db_queryset[offset:offset+limit+1])
+
+        next_offset = None
+        next_cursor = None
+        if len(paginated_db_queryset) == limit+1:
+            if offset is None:
+                next_cursor = encode_cursor([paginated_db_queryset[limit-1].id])
+            else:
+                next_offset = offset + limit
+        return paginated_db_queryset[0:limit], next_offset, next_cursor
+
+    def get_saved_experiences(self, logged_person_id, offset=0, limit=100, cursor=None):
         db_saves_and_experiences = ORMSave.objects \
                                           .order_by('-id') \
                                           .select_related('experience', 'experience__author__profile') \
                                           .exclude(experience__is_deleted=True) \
                                           .filter(person_id=logged_person_id)
 
-        paginated_db_saves = db_saves_and_experiences[offset:offset+limit+1]
-        next_offset = None
-        if len(paginated_db_saves) == limit+1:
-            next_offset = offset + limit
+        paginated_db_saves, next_offset, next_cursor = self._paginate(db_saves_and_experiences, offset, cursor, limit)
 
         experiences = []
-        for db_save in paginated_db_saves[0:limit]:
+        for db_save in paginated_db_saves:
             experiences.append(self._decode_db_experience(db_save.experience, logged_person_id, is_saved=True))
-        return {'results': experiences, 'next_offset': next_offset}
+        return {'results': experiences, 'next_offset': next_offset, 'next_cursor': next_cursor}
 
-    def get_person_experiences(self, logged_person_id, target_person_id, offset=0, limit=100, mine=False, saved=False):
+    def get_person_experiences(self, logged_person_id, target_person_id, offset=0, limit=100, cursor=None,
+                               mine=False, saved=False):
         person_db_experiences = ORMExperience.objects \
                                                 .exclude(is_deleted=True) \
                                                 .order_by('-id') \
                                                 .select_related('author__profile') \
                                                 .filter(author_id=target_person_id)
 
-        paginated_db_experiences = person_db_experiences[offset:offset+limit+1]
-        next_offset = None
-        if len(paginated_db_experiences) == limit+1:
-            next_offset = offset + limit
+        paginated_db_experiences, next_offset, next_cursor = self._paginate(person_db_experiences,
+                                                                            offset, cursor, limit)
 
+        saved_experiences_ids = set()
         are_my_experiences = (logged_person_id == target_person_id)
-        if not are_my_experiences:
-            orm_my_saves = list(ORMSave.objects.filter(person_id=logged_person_id))
+        if not are_my_experiences and len(paginated_db_experiences) > 0:
+            saved_experiences_ids = set(ORMSave.objects
+                                               .filter(person_id=logged_person_id,
+                                                       experience_id__in=[x.id for x in paginated_db_experiences])
+                                               .values_list('experience_id', flat=True))
 
         experiences = []
-        for db_experience in paginated_db_experiences[0:limit]:
-            is_saved = False
-            if not are_my_experiences and len([x for x in orm_my_saves if x.experience_id == db_experience.id]) > 0:
-                is_saved = True
+        for db_experience in paginated_db_experiences:
+            is_saved = db_experience.id in saved_experiences_ids
             experiences.append(self._decode_db_experience(db_experience, logged_person_id, is_saved=is_saved))
-        return {"results": experiences, "next_offset": next_offset}
+        return {"results": experiences, "next_offset": next_offset, "next_cursor": next_cursor}
 
     def get_experience(self, id=None, share_id=None, logged_person_id=None):
         try:
@@ -107,6 +125,30 @@ class ExperienceRepo:
         except ORMExperience.DoesNotExist:
             raise EntityDoesNotExistException()
 
+    def get_experiences_by_ids(self, experiences_ids):
+        db_experiences = ORMExperience.objects \
+                                        .exclude(is_deleted=True) \
+                                        .select_related('author__profile') \
+                                        .filter(id__in=experiences_ids) \
+                                        .order_by('id')
+        return [self._decode_db_experience(db_experience, None) for db_experience in db_experiences.iterator()]
+
+    def get_experiences_ids_range(self):
+        ids_range = ORMExperience.objects.aggregate(min_id=Min('id'), max_id=Max('id'))
+        if ids_range['min_id'] is None:
+            return None
+        return str(ids_range['min_id']), str(ids_range['max_id'])
+
+    def get_existing_experiences_ids(self, experiences_ids):
+        existing_ids = ORMExperience.objects.filter(id__in=experiences_ids).order_by('id').values_list('id', flat=True)
+        return [str(experience_id) for experience_id in existing_ids]
+
+    def get_experiences_ids_updated_since(self, since):
+        experiences_ids = ORMExperience.objects.filter(updated_at__gte=since) \
+                                               .order_by('id') \
+                                               .values_list('id', flat=True)
+        return [str(experience_id) for experience_id in experiences_ids]
+
     def create_experience(self, experience):
         db_experience = ORMExperience.objects.create(title=experience.title,
                                                      description=experience.description,
@@ -122,8 +164,8 @@ class ExperienceRepo:
         except ORMExperience.DoesNotExist:
             raise EntityDoesNotExistException()
 
-        experience.picture = picture
-        experience.save()
+        with self.stored_picture_repo.attach_picture(experience, picture):
+            ORMExperienceIndexEvent.objects.create(experience_id=experience.id)
         return self._decode_db_experience(experience, str(experience.author_id))
 
     def update_experience(self, experience, logged_person_id=None):
@@ -139,115 +181,412 @@ class ExperienceRepo:
         orm_experience.share_id = experience.share_id
 
         try:
-            orm_experience.save()
+            with transaction.atomic():
+                orm_experience.save()
+                ORMExperienceIndexEvent.objects.create(experience_id=orm_experience.id)
         except IntegrityError:
             raise ConflictException(source='share_id', code='duplicate', message='Duplicate share_id')
         return self._decode_db_experience(orm_experience, logged_person_id)
 
     def save_experience(self, person_id, experience_id):
         if not ORMSave.objects.filter(person_id=person_id, experience_id=experience_id).exists():
-            ORMSave.objects.create(person_id=person_id, experience_id=experience_id)
-            ORMExperience.objects.filter(id=experience_id).update(saves_count=F('saves_count') + 1)
+            with transaction.atomic():
+                ORMSave.objects.create(person_id=person_id, experience_id=experience_id)
+                ORMExperience.objects.filter(id=experience_id).update(saves_count=F('saves_count') + 1)
+                ORMExperienceIndexEvent.objects.create(experience_id=experience_id,
+                                                       kind=ORMExperienceIndexEvent.SAVES_COUNT)
         return True
 
     def unsave_experience(self, person_id, experience_id):
-        deleted = ORMSave.objects.filter(person_id=person_id, experience_id=experience_id).delete()
-        if deleted[0] == 1:
-            ORMExperience.objects.filter(id=experience_id).update(saves_count=F('saves_count') - 1)
+        with transaction.atomic():
+            deleted = ORMSave.objects.filter(person_id=person_id, experience_id=experience_id).delete()
+            if deleted[0] == 1:
+                ORMExperience.objects.filter(id=experience_id).update(saves_count=F('saves_count') - 1)
+                ORMExperienceIndexEvent.objects.create(experience_id=experience_id,
+                                                       kind=ORMExperienceIndexEvent.SAVES_COUNT)
 
         return True
 
+    def get_saves_counts(self, experiences_ids):
+        return {str(experience_id): saves_count
+                for experience_id, saves_count in ORMExperience.objects.filter(id__in=experiences_ids,
+                                                                               is_deleted=False)
+                                                                       .values_list('id', 'saves_count')}
+
     def flag_experience(self, person_id, experience_id, reason):
         ORMFlag.objects.create(person_id=person_id, experience_id=experience_id, reason=reason)
         return True
 
-    def search_experiences(self, logged_person_id, word, location=None, offset=0, limit=20):
-        result = self.search_repo.search_experiences(word, location, offset, limit)
+    def search_experiences(self, logged_person_id, word, location=None, offset=0, limit=20, cursor=None,
+                           excluded_authors_ids=None, lite=False):
+        result = self.search_repo.search_experiences(word, location, offset, limit, cursor, excluded_authors_ids,
+                                                     lite=lite)
+        if lite:
+            experiences = [self._decode_lite_experience(document) for document in result['results']]
+        else:
+            experiences = self._populate(logged_person_id, result['results'])
+        return {'results': experiences, 'next_offset': result['next_offset'], 'next_cursor': result['next_cursor']}
+
+    def search_experiences_in_area(self, logged_person_id, word=None, bounding_box=None, location=None, radius=None,
+                                   limit=100, excluded_authors_ids=None, clusters_precision=None):
+        result = self.search_repo.search_experiences_in_area(word=word, bounding_box=bounding_box,
+                                                             location=location, radius=radius, limit=limit,
+                                                             excluded_authors_ids=excluded_authors_ids,
+                                                             clusters_precision=clusters_precision)
         experiences = self._populate(logged_person_id, result['results'])
-        return {'results': experiences, 'next_offset': result['next_offset']}
+        return {'results': experiences, 'clusters': result['clusters']}
+
+    def suggest_experiences(self, prefix, limit=5, excluded_authors_ids=None):
+        return self.search_repo.suggest_experiences(prefix, limit=limit, excluded_authors_ids=excluded_authors_ids)
+
+    def _decode_lite_experience(self, document):
+        picture = None
+        if document['picture_small_url'] is not None:
+            picture = Picture(small_url=document['picture_small_url'])
+        return Experience(id=document['id'], title=document['title'], description=None, picture=picture,
+                          author_profile=Profile(username=document['author_username']),
+                          saves_count=document['saves_count'])
 
     def _populate(self, logged_person_id, experiences_ids):
-        preserved = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(experiences_ids)])
+        positions = {int(experience_id): position for position, experience_id in enumerate(experiences_ids)}
         orm_experiences = ORMExperience.objects.select_related('author__profile') \
-                                               .filter(id__in=experiences_ids) \
-                                               .order_by(preserved)
-        orm_saves = list(ORMSave.objects.filter(experience_id__in=experiences_ids, person_id=logged_person_id))
+                                               .only('id', 'title', 'description', 'picture',
+                                                     'picture_is_processing', 'picture_has_webp', 'author_id',
+                                                     'saves_count', 'share_id', 'author__id',
+                                                     'author__profile__person_id', 'author__profile__username',
+                                                     'author__profile__bio', 'author__profile__picture',
+                                                     'author__profile__picture_is_processing',
+                                                     'author__profile__picture_has_webp') \
+                                               .filter(id__in=positions.keys())
+        orm_experiences = sorted(orm_experiences, key=lambda experience: positions[experience.id])
+        saved_experiences_ids = set(ORMSave.objects
+                                           .filter(experience_id__in=positions.keys(), person_id=logged_person_id)
+                                           .values_list('experience_id', flat=True))
         return [self._decode_db_experience(experience, logged_person_id,
-                                           len([x for x in orm_saves if x.experience_id == experience.id]) > 0)
+                                           is_saved=experience.id in saved_experiences_ids)
                 for experience in orm_experiences]
 
 
+class ExperienceIndexEventRepo:
+
+    def __init__(self, retention=timedelta(days=7), max_attempts=5):
+        self.retention = retention
+        self.max_attempts = max_attempts
+
+    def add_events(self, experiences_ids):
+        ORMExperienceIndexEvent.objects.bulk_create([ORMExperienceIndexEvent(experience_id=experience_id)
+                                                     for experience_id in experiences_ids])
+
+    def get_pending_events(self, limit=1000):
+        db_events = list(ORMExperienceIndexEvent.objects.filter(processed_at__isnull=True,
+                                                                attempts__lt=self.max_attempts)
+                                                        .order_by('id')
+                                                        .values_list('id', 'experience_id', 'kind')[0:limit])
+        experiences_ids = set([experience_id for _, experience_id, kind in db_events
+                               if kind == ORMExperienceIndexEvent.FULL])
+        saves_counts_experiences_ids = set([experience_id for _, experience_id, kind in db_events
+                                            if kind == ORMExperienceIndexEvent.SAVES_COUNT]) - experiences_ids
+        return {'events_ids': [event_id for event_id, _, _ in db_events],
+                'experiences_ids': [str(experience_id) for experience_id in sorted(experiences_ids)],
+                'saves_counts_experiences_ids': [str(experience_id)
+                                                 for experience_id in sorted(saves_counts_experiences_ids)]}
+
+    def finish_events(self, events_ids, failed_experiences_ids=None):
+        now = timezone.now()
+        events = ORMExperienceIndexEvent.objects.filter(id__in=events_ids)
+        failed_experiences_ids = failed_experiences_ids or []
+        events.exclude(experience_id__in=failed_experiences_ids).update(processed_at=now)
+        events.filter(experience_id__in=failed_experiences_ids).update(attempts=F('attempts') + 1)
+        ORMExperienceIndexEvent.objects.filter(processed_at__lt=now - self.retention).delete()
+
+    def get_last_event_id(self):
+        return ORMExperienceIndexEvent.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+    def get_experiences_ids_with_events_after(self, event_id):
+        experiences_ids = ORMExperienceIndexEvent.objects.filter(id__gt=event_id) \
+                                                         .values_list('experience_id', flat=True) \
+                                                         .distinct()
+        return [str(experience_id) for experience_id in sorted(experiences_ids)]
+
+
 class ExperienceSearchRepo(object):
 
     EXPERIENCE_INDEX = 'experience_index'
+    EXPERIENCE_WRITE_INDEX = 'experience_index_write'
     EXPERIENCE_DOC_TYPE = 'experience'
+    LITE_SOURCE_FIELDS = ['title', 'author_username', 'picture_small_url', 'saves_count']
+    SEARCH_GENERATION_KEY = 'experience_search:generation'
 
-    def __init__(self, elastic_client):
+    def __init__(self, elastic_client, number_of_shards=3, number_of_replicas=1,
+                 search_cache=None, geohash_precision=5, suggest_cache=None, suggest_timeout=0.2,
+                 generation_cache=None, suggest_elastic_client=None):
         self.elastic_client = elastic_client
-
-    def _create_experience_index(self):
-        index = ExperienceSearchRepo.EXPERIENCE_INDEX
+        self.suggest_elastic_client = suggest_elastic_client or elastic_client
+        self.number_of_shards = number_of_shards
+        self.number_of_replicas = number_of_replicas
+        self.search_cache = search_cache
+        self.geohash_precision = geohash_precision
+        self.suggest_cache = suggest_cache
+        self.suggest_timeout = suggest_timeout
+        self.generation_cache = generation_cache
+        self._has_write_alias = False
+
+    def create_experience_index(self, bulk_loading=False):
+        index = '{}_{}'.format(ExperienceSearchRepo.EXPERIENCE_INDEX, datetime.utcnow().strftime('%Y%m%d%H%M%S%f'))
+        index_settings = {
+            "number_of_shards": self.number_of_shards,
+            "number_of_replicas": self.number_of_replicas
+        }
+        if bulk_loading:
+            index_settings.update({"number_of_replicas": 0, "refresh_interval": "-1"})
         body = {
             "settings": {
-                "index": {
-                    "number_of_shards": 3,
-                    "number_of_replicas": 1
+                "index": index_settings,
+                "analysis": {
+                    "filter": {
+                        "autocomplete_filter": {"type": "edge_ngram", "min_gram": 1, "max_gram": 20}
+                    },
+                    "analyzer": {
+                        "autocomplete": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding", "autocomplete_filter"]
+                        },
+                        "autocomplete_search": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding"]
+                        }
+                    }
                 }
             },
             "mappings": {
                 ExperienceSearchRepo.EXPERIENCE_DOC_TYPE: {
-                    "_source": {"enabled": False},
                     "properties": {
-                        "title": {"type": "text"},
+                        "title": {"type": "text", "fields": {"autocomplete": {
+                            "type": "text", "analyzer": "autocomplete", "search_analyzer": "autocomplete_search"}}},
                         "description": {"type": "text"},
-                        "scenes_titles": {"type": "text"},
+                        "scenes_titles": {"type": "text", "fields": {"autocomplete": {
+                            "type": "text", "analyzer": "autocomplete", "search_analyzer": "autocomplete_search"}}},
                         "scenes_descriptions": {"type": "text"},
                         "author_id": {"type": "keyword"},
                         "saves_count": {"type": "integer"},
-                        "center_location": {"type": "geo_point"}
+                        "id": {"type": "long"},
+                        "center_location": {"type": "geo_point"},
+                        "scenes_locations": {"type": "geo_point"},
+                        "author_username": {"type": "keyword", "index": False},
+                        "picture_small_url": {"type": "keyword", "index": False}
                     }
                 }
             }
         }
         self.elastic_client.indices.create(index=index, body=body)
+        return index
+
+    def finish_bulk_loading(self, index):
+        self.elastic_client.indices.put_settings(index=index, body={
+            "index": {
+                "number_of_replicas": self.number_of_replicas,
+                "refresh_interval": None
+            }
+        })
+        self.elastic_client.indices.refresh(index=index)
+
+    def get_aliased_indices(self, alias):
+        try:
+            return sorted(self.elastic_client.indices.get_alias(name=alias).keys())
+        except ElasticSearchNotFoundError:
+            return []
+
+    def switch_aliases(self, index, aliases):
+        actions = []
+        old_indices = set()
+        for alias in aliases:
+            for old_index in self.get_aliased_indices(alias):
+                if old_index != index:
+                    actions.append({'remove': {'index': old_index, 'alias': alias}})
+                    old_indices.add(old_index)
+            if self._is_legacy_index(alias):
+                actions.append({'remove_index': {'index': alias}})
+            actions.append({'add': {'index': index, 'alias': alias}})
+        self.elastic_client.indices.update_aliases(body={'actions': actions})
+        self._clear_search_cache()
+        return sorted(old_indices)
+
+    def delete_indices(self, indices):
+        for index in indices:
+            self.elastic_client.indices.delete(index=index)
+
+    def _is_legacy_index(self, alias):
+        return self.elastic_client.indices.exists(index=alias) and \
+            not self.elastic_client.indices.exists_alias(name=alias)
+
+    def _get_write_index(self):
+        if self._has_write_alias:
+            return ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX
+        if not self.elastic_client.indices.exists_alias(name=ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX):
+            if self.elastic_client.indices.exists(index=ExperienceSearchRepo.EXPERIENCE_INDEX):
+                return ExperienceSearchRepo.EXPERIENCE_INDEX
+            self._create_experience_index()
+        self._has_write_alias = True
+        return ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX
+
+    def _create_experience_index(self):
+        self.switch_aliases(self.create_experience_index(),
+                            [ExperienceSearchRepo.EXPERIENCE_INDEX, ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX])
 
     def _refresh_experience_index(self):
         self.elastic_client.indices.refresh(index=ExperienceSearchRepo.EXPERIENCE_INDEX)
+        self._clear_search_cache()
 
     def _delete_experience_index(self):
-        self.elastic_client.indices.delete(index=ExperienceSearchRepo.EXPERIENCE_INDEX)
-
-    def index_experience_and_its_scenes(self, experience, scenes):
-        scenes_titles = ' '.join([scene.title for scene in scenes])
-        scenes_descriptions = ' '.join([scene.description for scene in scenes])
-        doc = {
+        self._clear_search_cache()
+        self._has_write_alias = False
+        indices = set(self.get_aliased_indices(ExperienceSearchRepo.EXPERIENCE_INDEX))
+        indices.update(self.get_aliased_indices(ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX))
+        if self._is_legacy_index(ExperienceSearchRepo.EXPERIENCE_INDEX):
+            indices.add(ExperienceSearchRepo.EXPERIENCE_INDEX)
+        self.delete_indices(sorted(indices))
+
+    def _build_experience_document(self, experience, scenes):
+        points = [(scene.latitude, scene.longitude) for scene in scenes]
+        center_location = self._get_center_of_points(points)
+        return {
                 'title': experience.title,
                 'description': experience.description,
-                'scenes_titles': scenes_titles,
-                'scenes_descriptions': scenes_descriptions,
+                'scenes_titles': ' '.join([scene.title for scene in scenes]),
+                'scenes_descriptions': ' '.join([scene.description for scene in scenes]),
                 'author_id': experience.author_id,
                 'saves_count': experience.saves_count,
-                'center_location': self._get_center_of_points([(scene.latitude, scene.longitude) for scene in scenes])
-              }
-        self.elastic_client.index(index=ExperienceSearchRepo.EXPERIENCE_INDEX,
+                'id': int(experience.id),
+                'center_location': center_location,
+                'scenes_locations': [{'lat': latitude, 'lon': longitude} for latitude, longitude in points] or
+                                    [center_location],
+                'author_username': (experience.author_profile.username
+                                    if experience.author_profile is not None else None),
+                'picture_small_url': (experience.picture.small_url
+                                      if experience.picture is not None and not experience.picture.is_processing
+                                      else None)
+               }
+
+    def index_experience_and_its_scenes(self, experience, scenes):
+        self.elastic_client.index(index=self._get_write_index(),
                                   doc_type=ExperienceSearchRepo.EXPERIENCE_DOC_TYPE,
-                                  body=doc, id=experience.id)
+                                  body=self._build_experience_document(experience, scenes), id=experience.id)
+        self._clear_search_cache()
+
+    def bulk_index_experiences(self, experiences_and_scenes, deleted_experiences_ids,
+                               chunk_size=500, concurrency=1, index=None):
+        if index is None:
+            index = self._get_write_index()
+        actions = [{'_op_type': 'index',
+                    '_index': index,
+                    '_type': ExperienceSearchRepo.EXPERIENCE_DOC_TYPE,
+                    '_id': experience.id,
+                    '_source': self._build_experience_document(experience, scenes)}
+                   for experience, scenes in experiences_and_scenes]
+        actions.extend([{'_op_type': 'delete',
+                         '_index': index,
+                         '_type': ExperienceSearchRepo.EXPERIENCE_DOC_TYPE,
+                         '_id': experience_id}
+                        for experience_id in deleted_experiences_ids])
+
+        stats = {'indexed': 0, 'deleted': 0, 'failed': 0, 'failed_ids': []}
+        for ok, item in self._bulk(actions, chunk_size, concurrency):
+            op_type, result = item.popitem()
+            if op_type == 'delete' and (ok or result.get('status') == 404):
+                stats['deleted'] += 1
+            elif ok:
+                stats['indexed'] += 1
+            else:
+                stats['failed'] += 1
+                stats['failed_ids'].append(str(result['_id']))
+        self._clear_search_cache()
+        return stats
+
+    def bulk_update_saves_counts(self, saves_counts, chunk_size=500):
+        index = self._get_write_index()
+        actions = [{'_op_type': 'update',
+                    '_index': index,
+                    '_type': ExperienceSearchRepo.EXPERIENCE_DOC_TYPE,
+                    '_id': experience_id,
+                    'doc': {'saves_count': saves_count}}
+                   for experience_id, saves_count in saves_counts.items()]
+
+        stats = {'updated': 0, 'failed': 0, 'failed_ids': []}
+        for ok, item in self._bulk(actions, chunk_size):
+            _, result = item.popitem()
+            if ok or result.get('status') == 404:
+                stats['updated'] += 1
+            else:
+                stats['failed'] += 1
+                stats['failed_ids'].append(str(result['_id']))
+        self._clear_search_cache()
+        return stats
+
+    def _bulk(self, actions, chunk_size, concurrency=1):
+        if concurrency > 1:
+            return parallel_bulk(self.elastic_client, actions, thread_count=concurrency,
+                                 chunk_size=chunk_size, raise_on_error=False, raise_on_exception=False)
+        return streaming_bulk(self.elastic_client, actions, chunk_size=chunk_size,
+                              raise_on_error=False, raise_on_exception=False)
 
     def delete_experience(self, experience_id):
         try:
-            self.elastic_client.delete(index=ExperienceSearchRepo.EXPERIENCE_INDEX,
+            self.elastic_client.delete(index=self._get_write_index(),
                                        doc_type=ExperienceSearchRepo.EXPERIENCE_DOC_TYPE,
                                        id=experience_id)
         except ElasticSearchNotFoundError:
             pass
+        self._clear_search_cache()
+
+    def search_experiences(self, word=None, location=None, offset=0, limit=20, cursor=None,
+                           excluded_authors_ids=None, lite=False):
+        if excluded_authors_ids is not None:
+            excluded_authors_ids = sorted(set(excluded_authors_ids)) or None
+        if self.search_cache is None:
+            return self._search_experiences(word, location, offset, limit, cursor, excluded_authors_ids, lite)
 
-    def search_experiences(self, word=None, location=None, offset=0, limit=20):
+        if word is not None:
+            word = ' '.join(word.lower().split()) or None
+        geohash = None
+        if location is not None:
+            geohash = encode_geohash(location[0], location[1], self.geohash_precision)
+            location = decode_geohash(geohash)
+        key = (self._get_search_generation(), word, geohash, offset, cursor, limit,
+               tuple(excluded_authors_ids) if excluded_authors_ids is not None else None, lite)
+
+        result = self.search_cache.get(key)
+        if result is None:
+            result = self._search_experiences(word, location, offset, limit, cursor, excluded_authors_ids, lite)
+            self.search_cache.set(key, result)
+        return result
+
+    def _clear_search_cache(self):
+        if self.search_cache is not None:
+            self.search_cache.clear()
+        if self.suggest_cache is not None:
+            self.suggest_cache.clear()
+        if self.generation_cache is not None:
+            try:
+                self.generation_cache.incr(ExperienceSearchRepo.SEARCH_GENERATION_KEY)
+            except ValueError:
+                self.generation_cache.add(ExperienceSearchRepo.SEARCH_GENERATION_KEY,
+                                          int(time.time() * 1000), timeout=None)
+
+    def _get_search_generation(self):
+        if self.generation_cache is None:
+            return None
+        return self.generation_cache.get(ExperienceSearchRepo.SEARCH_GENERATION_KEY, 0)
+
+    def _search_experiences(self, word=None, location=None, offset=0, limit=20, cursor=None,
+                            excluded_authors_ids=None, lite=False):
         search_query = {
-            'from': offset,
             'size': limit + 1,
+            '_source': ExperienceSearchRepo.LITE_SOURCE_FIELDS if lite else False,
             'query': {
                 'function_score': {
-                    'query': {},
+                    'query': self._build_word_query(word, excluded_authors_ids),
                     'functions': [
                         {'field_value_factor': {
                             'field': 'saves_count',
@@ -259,67 +598,194 @@ class ExperienceSearchRepo(object):
             }
         }
 
-        if word is not None:
-            search_by_word = {
-                'bool': {
-                    'must': {
-                        'bool': {
-                            'should': [
-                                {'match': {
-                                    'title': {
-                                        'query': word,
-                                        'fuzziness': 'AUTO'
-                                    }
-                                }},
-                                {'match': {
-                                    'description': {
-                                        'query': word,
-                                        'fuzziness': 'AUTO'
-                                    }
-                                }},
-                                {'match': {
-                                    'scenes_titles': {
-                                        'query': word,
-                                        'fuzziness': 'AUTO'
-                                    }
-                                }},
-                                {'match': {
-                                    'scenes_descriptions': {
-                                        'query': word,
-                                        'fuzziness': 'AUTO'
-                                    }
-                                }}
-                            ]
-                        }
-                    }
-                }
-            }
-            search_query['query']['function_score']['query'].update(search_by_word)
-        else:
-            search_query['query']['function_score']['query'].update({'match_all': {}})
-
         if location is not None:
             location_decay = {'gauss': {
-                'center_location': {
-                    'origin': [location[0], location[1]],
+                'scenes_locations': {
+                    'origin': {'lat': location[0], 'lon': location[1]},
                     'scale': '100km',
                     'offset': '0km',
                     'decay': 0.9
-                }
+                },
+                'multi_value_mode': 'min'
             }}
             search_query['query']['function_score']['functions'].append(location_decay)
 
-        res = self.elastic_client.search(index=ExperienceSearchRepo.EXPERIENCE_INDEX, body=search_query)
+        filter_path = ['hits.hits._id']
+        if offset is None:
+            search_query['sort'] = [{'_score': {'order': 'desc'}},
+                                    {'id': {'order': 'desc', 'unmapped_type': 'long'}}]
+            if cursor is not None:
+                search_query['search_after'] = decode_cursor(cursor)
+            filter_path.append('hits.hits.sort')
+        else:
+            search_query['from'] = offset
+        if lite:
+            filter_path.append('hits.hits._source')
+
+        res = self.elastic_client.search(index=ExperienceSearchRepo.EXPERIENCE_INDEX, body=search_query,
+                                         filter_path=','.join(filter_path))
+        hits = res.get('hits', {}).get('hits', [])
 
         next_offset = None
-        if len(res['hits']['hits']) == limit + 1:
-            next_offset = offset + limit
+        next_cursor = None
+        if len(hits) == limit + 1:
+            if offset is None:
+                next_cursor = encode_cursor(hits[limit-1]['sort'])
+            else:
+                next_offset = offset + limit
+
+        if lite:
+            results = [self._decode_lite_hit(hit) for hit in hits[0:limit]]
+        else:
+            results = [hit['_id'] for hit in hits[0:limit]]
+        return {'results': results, 'next_offset': next_offset, 'next_cursor': next_cursor}
+
+    def _decode_lite_hit(self, hit):
+        source = hit.get('_source', {})
+        return {'id': hit['_id'],
+                'title': source.get('title'),
+                'author_username': source.get('author_username'),
+                'picture_small_url': source.get('picture_small_url'),
+                'saves_count': source.get('saves_count', 0)}
+
+    def search_experiences_in_area(self, word=None, bounding_box=None, location=None, radius=None, limit=100,
+                                   excluded_authors_ids=None, clusters_precision=None):
+        if bounding_box is not None:
+            area_filter = {'geo_bounding_box': {
+                'center_location': {
+                    'top_left': {'lat': bounding_box[0], 'lon': bounding_box[1]},
+                    'bottom_right': {'lat': bounding_box[2], 'lon': bounding_box[3]}
+                }
+            }}
+        else:
+            area_filter = {'geo_distance': {
+                'distance': '{}km'.format(radius),
+                'center_location': {'lat': location[0], 'lon': location[1]}
+            }}
+
+        search_query = {
+            'size': limit,
+            '_source': False,
+            'query': {
+                'bool': {
+                    'must': self._build_word_query(word, excluded_authors_ids),
+                    'filter': area_filter
+                }
+            },
+            'sort': [{'_score': {'order': 'desc'}},
+                     {'saves_count': {'order': 'desc'}},
+                     {'id': {'order': 'desc', 'unmapped_type': 'long'}}]
+        }
+        if clusters_precision is not None:
+            search_query['aggs'] = {
+                'clusters': {
+                    'geohash_grid': {'field': 'center_location', 'precision': clusters_precision},
+                    'aggs': {'centroid': {'geo_centroid': {'field': 'center_location'}}}
+                }
+            }
 
-        return {'results': [x['_id'] for x in res['hits']['hits'][0:limit]],
-                'next_offset': next_offset}
+        res = self.elastic_client.search(index=ExperienceSearchRepo.EXPERIENCE_INDEX, body=search_query,
+                                         filter_path='hits.hits._id,aggregations.clusters.buckets')
+
+        clusters = None
+        if clusters_precision is not None:
+            clusters = [{'geohash': bucket['key'],
+                         'count': bucket['doc_count'],
+                         'latitude': bucket['centroid']['location']['lat'],
+                         'longitude': bucket['centroid']['location']['lon']}
+                        for bucket in res.get('aggregations', {}).get('clusters', {}).get('buckets', [])]
+
+        return {'results': [hit['_id'] for hit in res.get('hits', {}).get('hits', [])], 'clusters': clusters}
+
+    def suggest_experiences(self, prefix, limit=5, excluded_authors_ids=None):
+        prefix = ' '.join(prefix.lower().split())
+        if excluded_authors_ids is not None:
+            excluded_authors_ids = sorted(set(excluded_authors_ids)) or None
+        key = (self._get_search_generation(), prefix, limit,
+               tuple(excluded_authors_ids) if excluded_authors_ids is not None else None)
+        if self.suggest_cache is not None:
+            suggestions = self.suggest_cache.get(key)
+            if suggestions is not None:
+                return suggestions
+
+        search_query = {
+            'size': limit,
+            '_source': ['title'],
+            'timeout': '{}ms'.format(int(self.suggest_timeout * 1000)),
+            'query': {
+                'bool': {
+                    'must': {
+                        'multi_match': {
+                            'query': prefix,
+                            'operator': 'and',
+                            'fields': ['title.autocomplete^2', 'scenes_titles.autocomplete']
+                        }
+                    }
+                }
+            },
+            'sort': [{'_score': {'order': 'desc'}},
+                     {'saves_count': {'order': 'desc'}}]
+        }
+        if excluded_authors_ids is not None:
+            search_query['query']['bool']['must_not'] = {'terms': {'author_id': excluded_authors_ids}}
+
+        try:
+            res = self.suggest_elastic_client.search(index=ExperienceSearchRepo.EXPERIENCE_INDEX, body=search_query,
+                                                     filter_path='timed_out,hits.hits._id,hits.hits._source.title',
+                                                     request_timeout=self.suggest_timeout)
+        except ElasticSearchTransportError:
+            return []
+
+        suggestions = [{'id': hit['_id'], 'title': hit['_source']['title']}
+                       for hit in res.get('hits', {}).get('hits', [])]
+        if self.suggest_cache is not None and not res.get('timed_out', False):
+            self.suggest_cache.set(key, suggestions)
+        return suggestions
+
+    def _build_word_query(self, word, excluded_authors_ids):
+        if word is not None:
+            word_query = {
+                'bool': {
+                    'should': [
+                        {'match': {
+                            'title': {
+                                'query': word,
+                                'fuzziness': 'AUTO'
+                            }
+                        }},
+                        {'match': {
+                            'description': {
+                                'query': word,
+                                'fuzziness': 'AUTO'
+                            }
+                        }},
+                        {'match': {
+                            'scenes_titles': {
+                                'query': word,
+                                'fuzziness': 'AUTO'
+                            }
+                        }},
+                        {'match': {
+                            'scenes_descriptions': {
+                                'query': word,
+                                'fuzziness': 'AUTO'
+                            }
+                        }}
+                    ]
+                }
+            }
+        else:
+            word_query = {'match_all': {}}
+
+        if excluded_authors_ids is not None:
+            word_query = {
+                'bool': {
+                    'must': word_query,
+                    'must_not': {'terms': {'author_id': excluded_authors_ids}}
+                }
+            }
+        return word_query
 
     def _get_center_of_points(self, points):
-        if len(points) == 0:
-            return [0.0, 0.0]
-        return [sum([p[0] for p in points]) / len(points),
-                sum([p[1] for p in points]) / len(points)]
+        latitude, longitude = get_centroid(points)
+        return {'lat': latitude, 'lon': longitude}
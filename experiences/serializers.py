@@ -1,13 +1,23 @@
 from pachatary.serializers import serialize_picture
 from profiles.serializers import serialize_profile
+from pachatary.timings import measured
 
 
-def serialize_experiences_response(experiences, base_url, username, saved, next_limit, next_offset):
-    if next_offset is not None:
+@measured('serialize')
+def serialize_experiences_response(experiences, base_url, username, saved, next_limit, next_offset,
+                                   next_cursor=None):
+    if next_cursor is not None:
+        page_param = 'cursor={}'.format(next_cursor)
+    elif next_offset is not None:
+        page_param = 'offset={}'.format(next_offset)
+    else:
+        page_param = None
+
+    if page_param is not None:
         if saved:
-            next_url = '{}?saved=true&limit={}&offset={}'.format(base_url, next_limit, next_offset)
+            next_url = '{}?saved=true&limit={}&{}'.format(base_url, next_limit, page_param)
         else:
-            next_url = '{}?username={}&limit={}&offset={}'.format(base_url, username, next_limit, next_offset)
+            next_url = '{}?username={}&limit={}&{}'.format(base_url, username, next_limit, page_param)
 
     else:
         next_url = None
@@ -15,25 +25,71 @@ def serialize_experiences_response(experiences, base_url, username, saved, next_
     return {'results': serialize_multiple_experiences(experiences), 'next_url': next_url}
 
 
-def serialize_experiences_search_response(experiences, base_url, word, latitude, longitude, next_limit, next_offset):
-    if next_offset is not None:
-        next_url = '{}?offset={}&limit={}'.format(base_url, next_offset, next_limit)
+@measured('serialize')
+def serialize_experiences_search_response(experiences, base_url, word, latitude, longitude, next_limit, next_offset,
+                                          next_cursor=None, lite=False):
+    if next_cursor is not None or next_offset is not None:
+        if next_cursor is not None:
+            next_url = '{}?cursor={}&limit={}'.format(base_url, next_cursor, next_limit)
+        else:
+            next_url = '{}?offset={}&limit={}'.format(base_url, next_offset, next_limit)
         if word is not None:
             next_url = "{}&word={}".format(next_url, word)
         if latitude is not None:
             next_url = "{}&latitude={}".format(next_url, latitude)
         if longitude is not None:
             next_url = "{}&longitude={}".format(next_url, longitude)
+        if lite:
+            next_url = "{}&lite=true".format(next_url)
     else:
         next_url = None
 
+    if lite:
+        return {'results': [serialize_lite_experience(experience) for experience in experiences],
+                'next_url': next_url}
     return {'results': serialize_multiple_experiences(experiences), 'next_url': next_url}
 
 
+@measured('serialize')
+def serialize_experiences_area_response(experiences, clusters):
+    if clusters is not None:
+        clusters = [serialize_cluster(cluster) for cluster in clusters]
+    return {'results': serialize_multiple_experiences(experiences), 'clusters': clusters, 'next_url': None}
+
+
+def serialize_cluster(cluster):
+    return {
+               'geohash': cluster['geohash'],
+               'count': cluster['count'],
+               'latitude': cluster['latitude'],
+               'longitude': cluster['longitude']
+           }
+
+
+@measured('serialize')
+def serialize_suggestions(suggestions):
+    return {
+               'experiences': [{'id': str(experience['id']), 'title': experience['title']}
+                               for experience in suggestions['experiences']],
+               'usernames': suggestions['usernames']
+           }
+
+
 def serialize_multiple_experiences(experiences):
     return [serialize_experience(experience) for experience in experiences]
 
 
+def serialize_lite_experience(experience):
+    return {
+               'id': str(experience.id),
+               'title': experience.title,
+               'picture': serialize_picture(experience.picture),
+               'author_profile': {'username': experience.author_profile.username},
+               'saves_count': experience.saves_count
+           }
+
+
+@measured('serialize')
 def serialize_experience(experience):
     return {
                'id': str(experience.id),
@@ -12,6 +12,7 @@ from experiences.entities import Experience
 from experiences.repositories import ExperienceRepo
 from experiences.factories import create_experience_elastic_repo
 from experiences.serializers import serialize_multiple_experiences
+from pachatary.pagination import encode_cursor
 from people.models import ORMPerson, ORMAuthToken, ORMBlock
 from profiles.models import ORMProfile
 from scenes.entities import Scene
@@ -67,7 +68,8 @@ class ExperiencesTestCase(TestCase):
                                'saves_count': 0
                            },
                        ],
-                'next_url': 'https://testserver/experiences/?username=self&limit=2&offset=2'
+                'next_url': 'https://testserver/experiences/?username=self&limit=2&cursor={}'.format(
+                    encode_cursor([exp_b.id]))
             }
 
     def test_others_experiences_returns_others_experiences(self):
@@ -120,7 +122,8 @@ class ExperiencesTestCase(TestCase):
                                'saves_count': 0
                            },
                        ],
-                'next_url': 'https://testserver/experiences/?username=other&limit=2&offset=2'
+                'next_url': 'https://testserver/experiences/?username=other&limit=2&cursor={}'.format(
+                    encode_cursor([exp_b.id]))
             }
 
         auth_headers = {'HTTP_AUTHORIZATION': 'Token {}'.format(orm_auth_token.access_token), }
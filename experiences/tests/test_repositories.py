@@ -1,17 +1,24 @@
-from elasticsearch.exceptions import NotFoundError
+from datetime import timedelta
+from elasticsearch.exceptions import NotFoundError, ConnectionTimeout, ConnectionError
 import logging
 from mock import Mock
 
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import TestCase, tag
+from django.utils import timezone
 
-from pachatary.exceptions import EntityDoesNotExistException, ConflictException
+from pachatary.caches import LRUCache
+from pachatary.entities import Picture
+from pachatary.exceptions import EntityDoesNotExistException, ConflictException, InvalidEntityException
 from experiences.entities import Experience
-from experiences.models import ORMExperience, ORMSave, ORMFlag
-from experiences.repositories import ExperienceRepo
+from experiences.models import ORMExperience, ORMSave, ORMFlag, ORMExperienceIndexEvent
+from experiences.repositories import ExperienceRepo, ExperienceSearchRepo, ExperienceIndexEventRepo
 from experiences.factories import create_experience_elastic_repo
+from experiences.geo import decode_geohash
 from scenes.entities import Scene
 from people.models import ORMPerson
 from profiles.models import ORMProfile
+from profiles.entities import Profile
 
 
 class ExperienceRepoTestCase(TestCase):
@@ -81,6 +88,85 @@ class ExperienceRepoTestCase(TestCase):
                 .when_get_person_experiences(target_person=2, offset=3, limit=3) \
                 .then_result_should_be_experiences_and_offset([2, 1], None)
 
+    def test_get_saved_experiences_with_cursor(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_a_person_in_db('other.user') \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_an_experience_in_db(created_by_person=2, is_deleted=True) \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_I_save_experience(experience=2) \
+                .given_I_save_experience(experience=1) \
+                .given_I_save_experience(experience=3) \
+                .given_I_save_experience(experience=4) \
+                .when_get_saved_experiences(offset=None, limit=2) \
+                .then_result_should_be_experiences_and_offset([4, 1], None) \
+                .then_result_should_have_next_cursor() \
+                .when_get_saved_experiences_next_page(limit=2) \
+                .then_result_should_be_experiences_and_offset([2], None) \
+                .then_result_should_not_have_next_cursor()
+
+    def test_get_person_experiences_with_cursor(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_a_person_in_db('other.user') \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_I_save_experience(experience=3) \
+                .when_get_person_experiences(target_person=2, offset=None, limit=2) \
+                .then_result_should_be_experiences_and_offset([4, 3], None) \
+                .then_result_should_have_next_cursor() \
+                .when_get_person_experiences_next_page(target_person=2, limit=2) \
+                .then_result_should_be_experiences_and_offset([1], None) \
+                .then_result_should_not_have_next_cursor()
+
+    def test_get_person_experiences_with_tampered_cursor_raises_invalid_entity(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .when_get_person_experiences_with_cursor(target_person=1, cursor='[1]:tampered', limit=2) \
+                .then_should_raise_invalid_cursor_exception()
+
+    def test_get_experiences_by_ids_skips_deleted_and_unexistent(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=1, is_deleted=True) \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=1) \
+                .when_get_experiences_by_ids([3, 2, 1], unexistent_ids=['999']) \
+                .then_result_should_be_experiences_for_indexing([1, 3])
+
+    def test_get_experiences_ids_range(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .when_get_experiences_ids_range() \
+                .then_result_should_be(None) \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=1, is_deleted=True) \
+                .when_get_experiences_ids_range() \
+                .then_result_should_be_ids_range_of_experiences(1, 2)
+
+    def test_get_existing_experiences_ids_includes_deleted_and_skips_unexistent(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=1, is_deleted=True) \
+                .when_get_existing_experiences_ids([2, 1], unexistent_ids=['999']) \
+                .then_result_should_be_ids_of_experiences([1, 2])
+
+    def test_get_experiences_ids_updated_since(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=1, is_deleted=True) \
+                .given_experience_was_updated_days_ago(2, days=3) \
+                .when_get_experiences_ids_updated_since(days_ago=1) \
+                .then_result_should_be_ids_of_experiences([1, 3])
+
     def test_get_mine_experience_returns_experience(self):
         ExperienceRepoTestCase.ScenarioMaker() \
                 .given_a_person_in_db('me') \
@@ -144,7 +230,8 @@ class ExperienceRepoTestCase(TestCase):
                 .given_an_experience_in_db(created_by_person=1) \
                 .when_update_experience(experience=1, title='n', description='u', share_id='Ab3') \
                 .then_should_return_experience(title='n', description='u', author=1, mine=True, share_id='Ab3') \
-                .then_result_experience_should_be_in_db()
+                .then_result_experience_should_be_in_db() \
+                .then_experience_should_be_marked_to_index(1)
 
     def test_update_others_experience(self):
         ExperienceRepoTestCase.ScenarioMaker() \
@@ -178,7 +265,8 @@ class ExperienceRepoTestCase(TestCase):
                 .when_save_experience(1) \
                 .then_result_should_be_true() \
                 .then_save_should_be_in_db(how_many_saves=1, person=1, experience=1) \
-                .then_experience_saves_count_should_be(experience=1, saves_count=1)
+                .then_experience_saves_count_should_be(experience=1, saves_count=1) \
+                .then_saves_count_index_events_should_be(experience=1, how_many_events=1)
 
     def test_save_twice_doesnt_create_2_saves(self):
         ExperienceRepoTestCase.ScenarioMaker() \
@@ -189,7 +277,8 @@ class ExperienceRepoTestCase(TestCase):
                 .when_save_experience(1) \
                 .then_result_should_be_true() \
                 .then_save_should_be_in_db(how_many_saves=1, person=1, experience=1) \
-                .then_experience_saves_count_should_be(experience=1, saves_count=1)
+                .then_experience_saves_count_should_be(experience=1, saves_count=1) \
+                .then_saves_count_index_events_should_be(experience=1, how_many_events=1)
 
     def test_unsave_experience(self):
         ExperienceRepoTestCase.ScenarioMaker() \
@@ -200,7 +289,19 @@ class ExperienceRepoTestCase(TestCase):
                 .when_unsave_experience(1) \
                 .then_result_should_be_true() \
                 .then_save_should_be_in_db(how_many_saves=0, person=1, experience=1) \
-                .then_experience_saves_count_should_be(experience=1, saves_count=0)
+                .then_experience_saves_count_should_be(experience=1, saves_count=0) \
+                .then_saves_count_index_events_should_be(experience=1, how_many_events=2)
+
+    def test_get_saves_counts_skips_deleted_experiences(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_a_person_in_db('other') \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_an_experience_in_db(created_by_person=2, is_deleted=True) \
+                .given_I_save_experience(experience=2) \
+                .when_get_saves_counts([1, 2, 3]) \
+                .then_should_return_saves_counts({1: 0, 2: 1})
 
     def test_flag_experience(self):
         ExperienceRepoTestCase.ScenarioMaker() \
@@ -239,6 +340,34 @@ class ExperienceRepoTestCase(TestCase):
                 .then_should_call_search_repo_search_experiences_with_correct_params() \
                 .then_result_should_be_experiences_and_offset([2, 3, 1], 7)
 
+    def test_lite_search_experiences_are_built_from_index_documents(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_a_word_location_limit_and_offset() \
+                .given_a_search_repo_that_returns_lite_documents([
+                    {'id': '8', 'title': 'Bike routes', 'author_username': 'biker',
+                     'picture_small_url': 'small.8', 'saves_count': 3},
+                    {'id': '5', 'title': 'Hiking', 'author_username': 'hiker',
+                     'picture_small_url': None, 'saves_count': 0}]) \
+                .when_lite_search_experiences() \
+                .then_lite_result_should_be([
+                    Experience(id='8', title='Bike routes', description=None, picture=Picture(small_url='small.8'),
+                               author_profile=Profile(username='biker'), saves_count=3),
+                    Experience(id='5', title='Hiking', description=None, picture=None,
+                               author_profile=Profile(username='hiker'), saves_count=0)])
+
+    def test_search_experiences_in_area_populates_and_returns_clusters(self):
+        ExperienceRepoTestCase.ScenarioMaker() \
+                .given_a_person_in_db('me') \
+                .given_a_person_in_db('other') \
+                .given_an_experience_in_db(created_by_person=1) \
+                .given_an_experience_in_db(created_by_person=2) \
+                .given_I_save_experience(2) \
+                .given_a_search_repo_that_returns_area_experience_ids_and_clusters([2, 1]) \
+                .when_search_experiences_in_area(bounding_box=(42.1, 1.9, 41.2, 2.5), clusters_precision=5) \
+                .then_result_should_be_experiences_and_offset([2, 1], None) \
+                .then_result_should_have_search_repo_clusters()
+
     class ScenarioMaker:
 
         def __init__(self):
@@ -275,7 +404,27 @@ class ExperienceRepoTestCase(TestCase):
 
         def given_a_search_repo_that_returns_experience_ids_and_offset(self, experiences_positions, offset):
             experiences_ids = [self.experiences[i-1].id for i in experiences_positions]
-            self.search_repo.search_experiences.return_value = {'results': experiences_ids, 'next_offset': offset}
+            self.search_repo.search_experiences.return_value = {'results': experiences_ids, 'next_offset': offset,
+                                                                'next_cursor': None}
+            return self
+
+        def given_a_search_repo_that_returns_area_experience_ids_and_clusters(self, experiences_positions):
+            self.clusters = [{'geohash': 'sp3e3', 'count': 2, 'latitude': 41.3, 'longitude': 2.1}]
+            self.search_repo.search_experiences_in_area.return_value = {
+                    'results': [self.experiences[i-1].id for i in experiences_positions], 'clusters': self.clusters}
+            return self
+
+        def when_search_experiences_in_area(self, bounding_box, clusters_precision):
+            self.result = self.repo.search_experiences_in_area(str(self.persons[0].id), bounding_box=bounding_box,
+                                                               clusters_precision=clusters_precision)
+            self.result['next_offset'] = None
+            return self
+
+        def then_result_should_have_search_repo_clusters(self):
+            assert self.result['clusters'] == self.clusters
+            self.search_repo.search_experiences_in_area.assert_called_once_with(
+                    word=None, bounding_box=(42.1, 1.9, 41.2, 2.5), location=None, radius=None, limit=100,
+                    excluded_authors_ids=None, clusters_precision=5)
             return self
 
         def when_get_saved_experiences(self, offset, limit):
@@ -283,12 +432,65 @@ class ExperienceRepoTestCase(TestCase):
                                                           offset=offset, limit=limit)
             return self
 
+        def when_get_saved_experiences_next_page(self, limit):
+            self.result = self.repo.get_saved_experiences(logged_person_id=str(self.persons[0].id),
+                                                          offset=None, cursor=self.result['next_cursor'], limit=limit)
+            return self
+
         def when_get_person_experiences(self, target_person, offset, limit):
             self.result = self.repo.get_person_experiences(logged_person_id=str(self.persons[0].id),
                                                            target_person_id=str(self.persons[target_person-1].id),
                                                            offset=offset, limit=limit)
             return self
 
+        def when_get_person_experiences_next_page(self, target_person, limit):
+            return self.when_get_person_experiences_with_cursor(target_person, self.result['next_cursor'], limit)
+
+        def when_get_person_experiences_with_cursor(self, target_person, cursor, limit):
+            try:
+                self.result = self.repo.get_person_experiences(logged_person_id=str(self.persons[0].id),
+                                                               target_person_id=str(self.persons[target_person-1].id),
+                                                               offset=None, cursor=cursor, limit=limit)
+            except InvalidEntityException as e:
+                self.invalid_entity_exception = e
+            return self
+
+        def given_experience_was_updated_days_ago(self, position, days):
+            ORMExperience.objects.filter(id=self.experiences[position-1].id) \
+                                 .update(updated_at=timezone.now() - timedelta(days=days))
+            return self
+
+        def when_get_experiences_ids_range(self):
+            self.result = self.repo.get_experiences_ids_range()
+            return self
+
+        def when_get_experiences_ids_updated_since(self, days_ago):
+            self.result = self.repo.get_experiences_ids_updated_since(timezone.now() - timedelta(days=days_ago))
+            return self
+
+        def then_result_should_be(self, result):
+            assert self.result == result
+            return self
+
+        def then_result_should_be_ids_range_of_experiences(self, first_position, last_position):
+            assert self.result == (str(self.experiences[first_position-1].id),
+                                   str(self.experiences[last_position-1].id))
+            return self
+
+        def then_result_should_be_ids_of_experiences(self, experiences_positions):
+            assert self.result == [str(self.experiences[i-1].id) for i in experiences_positions]
+            return self
+
+        def when_get_existing_experiences_ids(self, experiences_positions, unexistent_ids):
+            experiences_ids = [str(self.experiences[i-1].id) for i in experiences_positions]
+            self.result = self.repo.get_existing_experiences_ids(experiences_ids + unexistent_ids)
+            return self
+
+        def when_get_experiences_by_ids(self, experiences_positions, unexistent_ids):
+            experiences_ids = [str(self.experiences[i-1].id) for i in experiences_positions]
+            self.result = self.repo.get_experiences_by_ids(experiences_ids + unexistent_ids)
+            return self
+
         def when_get_experience(self, position, person=0):
             try:
                 self.result = self.repo.get_experience(id=str(self.experiences[position-1].id),
@@ -331,6 +533,10 @@ class ExperienceRepoTestCase(TestCase):
                 self.error = e
             return self
 
+        def then_experience_should_be_marked_to_index(self, position):
+            assert ORMExperienceIndexEvent.objects.filter(experience_id=self.experiences[position-1].id).exists()
+            return self
+
         def when_save_experience(self, position):
             experience = self.experiences[position-1]
             self.result = self.repo.save_experience(person_id=str(self.persons[0].id), experience_id=str(experience.id))
@@ -348,6 +554,22 @@ class ExperienceRepoTestCase(TestCase):
                                                     reason=reason)
             return self
 
+        def given_a_search_repo_that_returns_lite_documents(self, documents):
+            self.search_repo.search_experiences.return_value = {'results': documents, 'next_offset': None,
+                                                                'next_cursor': None}
+            return self
+
+        def when_lite_search_experiences(self):
+            self.result = self.repo.search_experiences(str(self.persons[0].id), self.word, self.location,
+                                                       self.offset, self.limit, lite=True)
+            return self
+
+        def then_lite_result_should_be(self, experiences):
+            assert self.result['results'] == experiences
+            self.search_repo.search_experiences.assert_called_once_with(self.word, self.location, self.offset,
+                                                                        self.limit, None, None, lite=True)
+            return self
+
         def when_search_experiences(self):
             self.result = self.repo.search_experiences(str(self.persons[0].id), self.word,
                                                        self.location, self.offset, self.limit)
@@ -366,6 +588,11 @@ class ExperienceRepoTestCase(TestCase):
 
             return self
 
+        def then_result_should_be_experiences_for_indexing(self, experiences_positions):
+            assert self.result == [self.repo._decode_db_experience(self.experiences[i-1], None)
+                                   for i in experiences_positions]
+            return self
+
         def then_repo_should_return_experience(self, position, person_logged, saved=False):
             orm_experience = self.experiences[position-1]
             parsed_experience = self.repo._decode_db_experience(orm_experience, str(self.persons[person_logged-1].id),
@@ -425,9 +652,37 @@ class ExperienceRepoTestCase(TestCase):
             assert self.experiences[experience-1].saves_count == saves_count
             return self
 
+        def then_saves_count_index_events_should_be(self, experience, how_many_events):
+            assert ORMExperienceIndexEvent.objects.filter(experience_id=self.experiences[experience-1].id,
+                                                          kind=ORMExperienceIndexEvent.SAVES_COUNT) \
+                                                  .count() == how_many_events
+            return self
+
+        def when_get_saves_counts(self, positions):
+            self.result = self.repo.get_saves_counts([str(self.experiences[position-1].id) for position in positions])
+            return self
+
+        def then_should_return_saves_counts(self, saves_counts):
+            assert self.result == {str(self.experiences[position-1].id): saves_count
+                                   for position, saves_count in saves_counts.items()}
+            return self
+
         def then_should_call_search_repo_search_experiences_with_correct_params(self):
             self.search_repo.search_experiences.assert_called_once_with(self.word, self.location,
-                                                                        self.offset, self.limit)
+                                                                        self.offset, self.limit, None, None,
+                                                                        lite=False)
+            return self
+
+        def then_result_should_have_next_cursor(self):
+            assert self.result['next_cursor'] is not None
+            return self
+
+        def then_result_should_not_have_next_cursor(self):
+            assert self.result['next_cursor'] is None
+            return self
+
+        def then_should_raise_invalid_cursor_exception(self):
+            assert self.invalid_entity_exception.source == 'cursor'
             return self
 
         def then_should_raise_conflict_exception(self):
@@ -435,6 +690,437 @@ class ExperienceRepoTestCase(TestCase):
             return self
 
 
+class ExperienceIndexEventRepoTestCase(TestCase):
+
+    def test_get_pending_events_coalesces_experiences(self):
+        ExperienceIndexEventRepoTestCase.ScenarioMaker() \
+                .given_events_for_experiences([4, 2, 4, 9, 2]) \
+                .when_get_pending_events(limit=4) \
+                .then_should_return_first_events_and_their_experiences(4, ['2', '4', '9'])
+
+    def test_finished_events_are_not_pending(self):
+        ExperienceIndexEventRepoTestCase.ScenarioMaker() \
+                .given_events_for_experiences([4, 2, 7]) \
+                .when_get_pending_events(limit=2) \
+                .when_finish_those_events() \
+                .when_get_pending_events(limit=10) \
+                .then_should_return_last_events_and_their_experiences(1, ['7'])
+
+    def test_finished_events_are_kept_during_retention(self):
+        ExperienceIndexEventRepoTestCase.ScenarioMaker() \
+                .given_events_for_experiences([4, 2]) \
+                .given_events_processed_days_ago(8) \
+                .given_events_for_experiences([5]) \
+                .given_events_processed_days_ago(1) \
+                .given_events_for_experiences([7]) \
+                .when_get_pending_events(limit=10) \
+                .when_finish_those_events() \
+                .then_events_should_be_for_experiences([5, 7])
+
+    def test_events_of_failed_experiences_are_retried_until_max_attempts(self):
+        ExperienceIndexEventRepoTestCase.ScenarioMaker() \
+                .given_a_repo_with_max_attempts(2) \
+                .given_events_for_experiences([4, 2]) \
+                .given_saves_count_events_for_experiences([4]) \
+                .when_get_pending_events(limit=10) \
+                .when_finish_those_events(failed_experiences_ids=['4']) \
+                .when_get_pending_events(limit=10) \
+                .then_should_return_events_of_experiences([4, 4]) \
+                .when_finish_those_events(failed_experiences_ids=['4']) \
+                .when_get_pending_events(limit=10) \
+                .then_should_return_events_of_experiences([])
+
+    def test_get_experiences_ids_with_events_after_includes_finished_events(self):
+        ExperienceIndexEventRepoTestCase.ScenarioMaker() \
+                .given_events_for_experiences([4]) \
+                .when_get_last_event_id() \
+                .given_events_for_experiences([9, 2]) \
+                .given_events_processed_days_ago(1) \
+                .given_saves_count_events_for_experiences([2, 3]) \
+                .when_get_experiences_ids_with_events_after_last_event_id() \
+                .then_result_should_be(['2', '3', '9'])
+
+    def test_get_pending_events_splits_saves_counts_events(self):
+        ExperienceIndexEventRepoTestCase.ScenarioMaker() \
+                .given_events_for_experiences([4]) \
+                .given_saves_count_events_for_experiences([4, 8, 3, 8]) \
+                .when_get_pending_events(limit=10) \
+                .then_should_return_first_events_and_their_experiences(5, ['4']) \
+                .then_should_return_saves_counts_experiences(['3', '8'])
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.repo = ExperienceIndexEventRepo()
+
+        def given_events_for_experiences(self, experiences_ids):
+            self.repo.add_events(experiences_ids)
+            return self
+
+        def given_saves_count_events_for_experiences(self, experiences_ids):
+            for experience_id in experiences_ids:
+                ORMExperienceIndexEvent.objects.create(experience_id=experience_id,
+                                                       kind=ORMExperienceIndexEvent.SAVES_COUNT)
+            return self
+
+        def when_get_pending_events(self, limit):
+            self.result = self.repo.get_pending_events(limit=limit)
+            return self
+
+        def given_a_repo_with_max_attempts(self, max_attempts):
+            self.repo = ExperienceIndexEventRepo(max_attempts=max_attempts)
+            return self
+
+        def when_finish_those_events(self, failed_experiences_ids=None):
+            self.repo.finish_events(self.result['events_ids'], failed_experiences_ids=failed_experiences_ids)
+            return self
+
+        def then_should_return_events_of_experiences(self, experiences_ids):
+            assert sorted(ORMExperienceIndexEvent.objects.filter(id__in=self.result['events_ids'])
+                                                         .values_list('experience_id', flat=True)) == experiences_ids
+            return self
+
+        def given_events_processed_days_ago(self, days):
+            ORMExperienceIndexEvent.objects.filter(processed_at__isnull=True) \
+                                           .update(processed_at=timezone.now() - timedelta(days=days))
+            return self
+
+        def when_get_last_event_id(self):
+            self.last_event_id = self.repo.get_last_event_id()
+            return self
+
+        def when_get_experiences_ids_with_events_after_last_event_id(self):
+            self.result = self.repo.get_experiences_ids_with_events_after(self.last_event_id)
+            return self
+
+        def then_events_should_be_for_experiences(self, experiences_ids):
+            assert sorted(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == experiences_ids
+            return self
+
+        def then_should_return_last_events_and_their_experiences(self, events_count, experiences_ids):
+            all_events_ids = list(ORMExperienceIndexEvent.objects.order_by('id').values_list('id', flat=True))
+            assert self.result['events_ids'] == all_events_ids[-events_count:]
+            assert self.result['experiences_ids'] == experiences_ids
+            return self
+
+        def then_result_should_be(self, result):
+            assert self.result == result
+            return self
+
+        def then_should_return_first_events_and_their_experiences(self, events_count, experiences_ids):
+            all_events_ids = list(ORMExperienceIndexEvent.objects.order_by('id').values_list('id', flat=True))
+            assert self.result['events_ids'] == all_events_ids[0:events_count]
+            assert self.result['experiences_ids'] == experiences_ids
+            return self
+
+        def then_should_return_saves_counts_experiences(self, experiences_ids):
+            assert self.result['saves_counts_experiences_ids'] == experiences_ids
+            return self
+
+
+class ExperienceSearchCacheTestCase(TestCase):
+
+    BARCELONA = (41.385064, 2.173403)
+    BARCELONA_NEARBY = (41.385321, 2.173799)
+
+    def test_same_normalized_query_is_served_from_cache(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(word='  Bike  Routes', location=ExperienceSearchCacheTestCase.BARCELONA) \
+                .when_search(word='bike routes', location=ExperienceSearchCacheTestCase.BARCELONA_NEARBY) \
+                .then_elastic_should_have_been_searched(times=1) \
+                .then_results_should_be_equal()
+
+    def test_other_page_is_not_served_from_cache(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(word='bike', offset=0) \
+                .when_search(word='bike', offset=20) \
+                .then_elastic_should_have_been_searched(times=2)
+
+    def test_searches_from_the_quantized_location(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(location=ExperienceSearchCacheTestCase.BARCELONA) \
+                .then_elastic_should_have_been_searched_from(decode_geohash('sp3e3'))
+
+    def test_blocked_authors_are_part_of_the_cache_key(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(word='bike', excluded_authors_ids=['7', '3']) \
+                .when_search(word='bike', excluded_authors_ids=['3', '7']) \
+                .when_search(word='bike') \
+                .then_elastic_should_have_been_searched(times=2)
+
+    def test_indexing_clears_cache(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(word='bike') \
+                .when_delete_experience('4') \
+                .when_search(word='bike') \
+                .then_elastic_should_have_been_searched(times=2)
+
+    def test_indexing_from_another_process_invalidates_cache_through_shared_generation(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_shared_generation_cache() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_returns_suggestions() \
+                .when_search(word='bike') \
+                .when_suggest('bik') \
+                .when_another_process_deletes_experience('4') \
+                .when_search(word='bike') \
+                .when_suggest('bik') \
+                .then_elastic_should_have_been_searched(times=4)
+
+    def test_suggestions_are_served_from_cache(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_returns_suggestions() \
+                .when_suggest(' Bik') \
+                .when_suggest('bik') \
+                .then_elastic_should_have_been_searched(times=1) \
+                .then_suggestions_should_be([{'id': '4', 'title': 'Bike routes'}])
+
+    def test_suggestions_time_out_to_empty_and_are_not_cached(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_times_out() \
+                .when_suggest('bik') \
+                .when_suggest('bik') \
+                .then_elastic_should_have_been_searched(times=2) \
+                .then_suggestions_should_be([])
+
+    def test_suggestions_connection_error_returns_empty_and_is_not_cached(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_connection_fails() \
+                .when_suggest('bik') \
+                .when_suggest('bik') \
+                .then_elastic_should_have_been_searched(times=2) \
+                .then_suggestions_should_be([])
+
+    def test_suggestions_use_suggest_elastic_client(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_suggest_client() \
+                .when_suggest('bik') \
+                .then_suggest_client_should_have_been_searched() \
+                .then_elastic_should_have_been_searched(times=0) \
+                .then_suggestions_should_be([{'id': '4', 'title': 'Bike routes'}])
+
+    def test_search_only_asks_for_hits_ids(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(word='bike') \
+                .then_elastic_should_have_been_searched_with(source=False, filter_path='hits.hits._id')
+
+    def test_lite_search_returns_stored_display_fields(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_returns_lite_hits() \
+                .when_search(word='bike', offset=None, lite=True) \
+                .then_elastic_should_have_been_searched_with(
+                        source=['title', 'author_username', 'picture_small_url', 'saves_count'],
+                        filter_path='hits.hits._id,hits.hits.sort,hits.hits._source') \
+                .then_lite_results_should_be([{'id': '4', 'title': 'Bike routes', 'author_username': 'biker',
+                                               'picture_small_url': 'small.4', 'saves_count': 3}])
+
+    def test_indexed_picture_small_url_is_empty_while_picture_is_processing(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_indices(write_alias=True, read_index=True) \
+                .when_index_experience(picture=Picture(small_url='original.jpg', is_processing=True)) \
+                .then_indexed_picture_small_url_should_be(None) \
+                .when_index_experience(picture=Picture(small_url='small.jpg')) \
+                .then_indexed_picture_small_url_should_be('small.jpg')
+
+    def test_bulk_operations_report_failed_experiences_ids(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_indices(write_alias=True, read_index=True) \
+                .given_bulk_results([(True, {'update': {'_id': '3', 'status': 200}}),
+                                     (False, {'update': {'_id': 5, 'status': 'N/A'}}),
+                                     (False, {'update': {'_id': '7', 'status': 400}})]) \
+                .when_bulk_update_saves_counts({'3': 1, '5': 2, '7': 0}) \
+                .then_bulk_stats_should_be({'updated': 1, 'failed': 2, 'failed_ids': ['5', '7']})
+
+    def test_writes_go_to_write_alias_when_it_exists(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_indices(write_alias=True, read_index=True) \
+                .when_delete_experience('4') \
+                .when_delete_experience('5') \
+                .then_experiences_should_have_been_deleted_from(['experience_index_write', 'experience_index_write']) \
+                .then_write_alias_should_have_been_checked(times=1) \
+                .then_index_should_not_have_been_created()
+
+    def test_writes_fall_back_to_legacy_index_without_write_alias(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_indices(write_alias=False, read_index=True) \
+                .when_delete_experience('4') \
+                .then_experiences_should_have_been_deleted_from(['experience_index']) \
+                .then_index_should_not_have_been_created()
+
+    def test_writes_create_index_and_aliases_when_there_is_no_index(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .given_elastic_indices(write_alias=False, read_index=False) \
+                .when_delete_experience('4') \
+                .then_index_should_have_been_created_with_aliases(['experience_index', 'experience_index_write']) \
+                .then_experiences_should_have_been_deleted_from(['experience_index_write'])
+
+    def test_lite_search_is_not_served_from_full_search_cache(self):
+        ExperienceSearchCacheTestCase.ScenarioMaker() \
+                .given_a_search_repo_with_cache() \
+                .when_search(word='bike') \
+                .when_search(word='bike', lite=True) \
+                .then_elastic_should_have_been_searched(times=2)
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.results = []
+            self.generation_cache = None
+
+        def given_a_shared_generation_cache(self):
+            self.generation_cache = LocMemCache('search-generation', {})
+            self.generation_cache.clear()
+            return self
+
+        def when_another_process_deletes_experience(self, experience_id):
+            other_elastic_client = Mock()
+            other_elastic_client.indices.exists_alias.return_value = True
+            ExperienceSearchRepo(other_elastic_client, search_cache=LRUCache(max_size=10, ttl=60),
+                                 generation_cache=self.generation_cache).delete_experience(experience_id)
+            return self
+
+        def given_bulk_results(self, results):
+            self.repo._bulk = Mock(return_value=results)
+            return self
+
+        def when_bulk_update_saves_counts(self, saves_counts):
+            self.result = self.repo.bulk_update_saves_counts(saves_counts)
+            return self
+
+        def then_bulk_stats_should_be(self, stats):
+            assert self.result == stats
+            return self
+
+        def when_index_experience(self, picture):
+            self.repo.index_experience_and_its_scenes(Experience(id='4', title='t', description='d', author_id='1',
+                                                                 picture=picture), [])
+            return self
+
+        def then_indexed_picture_small_url_should_be(self, picture_small_url):
+            assert self.elastic_client.index.call_args[1]['body']['picture_small_url'] == picture_small_url
+            return self
+
+        def given_elastic_indices(self, write_alias, read_index):
+            self.elastic_client.indices.exists_alias.return_value = write_alias
+            self.elastic_client.indices.exists.return_value = read_index
+            self.elastic_client.indices.get_alias.side_effect = NotFoundError(404, 'missing', {})
+            return self
+
+        def then_experiences_should_have_been_deleted_from(self, indices):
+            assert [call[1]['index'] for call in self.elastic_client.delete.call_args_list] == indices
+            return self
+
+        def then_write_alias_should_have_been_checked(self, times):
+            assert self.elastic_client.indices.exists_alias.call_count == times
+            return self
+
+        def then_index_should_not_have_been_created(self):
+            self.elastic_client.indices.create.assert_not_called()
+            return self
+
+        def then_index_should_have_been_created_with_aliases(self, aliases):
+            index = self.elastic_client.indices.create.call_args[1]['index']
+            actions = self.elastic_client.indices.update_aliases.call_args[1]['body']['actions']
+            assert [action['add'] for action in actions if 'add' in action] == \
+                [{'index': index, 'alias': alias} for alias in aliases]
+            return self
+
+        def given_elastic_returns_lite_hits(self):
+            self.elastic_client.search.return_value = {'hits': {'hits': [
+                {'_id': '4', 'sort': [1.2, 4], '_source': {'title': 'Bike routes', 'author_username': 'biker',
+                                                           'picture_small_url': 'small.4', 'saves_count': 3}}]}}
+            return self
+
+        def then_elastic_should_have_been_searched_with(self, source, filter_path):
+            assert self.elastic_client.search.call_args[1]['body']['_source'] == source
+            assert self.elastic_client.search.call_args[1]['filter_path'] == filter_path
+            return self
+
+        def then_lite_results_should_be(self, results):
+            assert self.results[-1]['results'] == results
+            return self
+
+        def given_elastic_returns_suggestions(self):
+            self.elastic_client.search.return_value = {'timed_out': False, 'hits': {'hits': [
+                {'_id': '4', '_source': {'title': 'Bike routes'}}]}}
+            return self
+
+        def given_elastic_times_out(self):
+            self.elastic_client.search.side_effect = ConnectionTimeout('TIMEOUT', 'timed out', None)
+            return self
+
+        def given_elastic_connection_fails(self):
+            self.elastic_client.search.side_effect = ConnectionError('N/A', 'connection refused', None)
+            return self
+
+        def given_a_search_repo_with_suggest_client(self):
+            self.elastic_client = Mock()
+            self.suggest_elastic_client = Mock()
+            self.suggest_elastic_client.search.return_value = {'timed_out': False, 'hits': {'hits': [
+                {'_id': '4', '_source': {'title': 'Bike routes'}}]}}
+            self.repo = ExperienceSearchRepo(self.elastic_client, suggest_elastic_client=self.suggest_elastic_client)
+            return self
+
+        def then_suggest_client_should_have_been_searched(self):
+            assert self.suggest_elastic_client.search.call_count == 1
+            return self
+
+        def when_suggest(self, prefix):
+            self.results.append(self.repo.suggest_experiences(prefix))
+            return self
+
+        def then_suggestions_should_be(self, suggestions):
+            assert self.results[-1] == suggestions
+            return self
+
+        def given_a_search_repo_with_cache(self):
+            self.elastic_client = Mock()
+            self.elastic_client.search.return_value = {'hits': {'hits': [{'_id': '4'}, {'_id': '2'}]}}
+            self.repo = ExperienceSearchRepo(self.elastic_client, search_cache=LRUCache(max_size=10, ttl=60),
+                                             suggest_cache=LRUCache(max_size=10, ttl=60),
+                                             generation_cache=self.generation_cache)
+            return self
+
+        def when_search(self, word=None, location=None, offset=0, excluded_authors_ids=None, lite=False):
+            self.results.append(self.repo.search_experiences(word=word, location=location, offset=offset,
+                                                             excluded_authors_ids=excluded_authors_ids, lite=lite))
+            return self
+
+        def when_delete_experience(self, experience_id):
+            self.repo.delete_experience(experience_id)
+            return self
+
+        def then_elastic_should_have_been_searched(self, times):
+            assert self.elastic_client.search.call_count == times
+            return self
+
+        def then_elastic_should_have_been_searched_from(self, location):
+            body = self.elastic_client.search.call_args[1]['body']
+            assert body['query']['function_score']['functions'][1]['gauss']['scenes_locations']['origin'] == \
+                {'lat': location[0], 'lon': location[1]}
+            return self
+
+        def then_results_should_be_equal(self):
+            assert self.results[0] == self.results[1]
+            assert self.results[0]['results'] == ['4', '2']
+            return self
+
+
 class ExperienceElasticRepoTestCase(TestCase):
 
     BARCELONA = (41.385064, 2.173403)
@@ -603,6 +1289,20 @@ class ExperienceElasticRepoTestCase(TestCase):
                 .when_index_everything_and_search(word='eco', location=ExperienceElasticRepoTestCase.BARCELONA) \
                 .then_should_return_experiences_and_next_offset(['1', '3', '2'])
 
+    @tag('elasticsearch')
+    def test_search_boosts_by_nearest_scene_proximity(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience() \
+                .given_an_scene(description='eco route', latitude=ExperienceElasticRepoTestCase.BARCELONA[0],
+                                longitude=ExperienceElasticRepoTestCase.BARCELONA[1], experience_id_of_number=1) \
+                .given_an_scene(description='eco route', latitude=ExperienceElasticRepoTestCase.CUSCO[0],
+                                longitude=ExperienceElasticRepoTestCase.CUSCO[1], experience_id_of_number=1) \
+                .given_an_experience() \
+                .given_an_scene(description='eco shops', latitude=ExperienceElasticRepoTestCase.BERLIN[0],
+                                longitude=ExperienceElasticRepoTestCase.BERLIN[1], experience_id_of_number=2) \
+                .when_index_everything_and_search(word='eco', location=ExperienceElasticRepoTestCase.BARCELONA) \
+                .then_should_return_experiences_and_next_offset(['1', '2'])
+
     @tag('elasticsearch')
     def test_search_location_boost_is_more_important_than_saves(self):
         ExperienceElasticRepoTestCase.ScenarioMaker() \
@@ -622,6 +1322,58 @@ class ExperienceElasticRepoTestCase(TestCase):
                                                   location=ExperienceElasticRepoTestCase.BARCELONA) \
                 .then_should_return_experiences_and_next_offset(['1', '3', '2'])
 
+    @tag('elasticsearch')
+    def test_search_excludes_authors(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='bike tour', author_id='1') \
+                .given_an_experience(title='bike route', author_id='2') \
+                .given_an_experience(title='bike shop', author_id='3') \
+                .when_index_everything() \
+                .when_search(word='bike', excluded_authors_ids=['2', '3'], limit=1) \
+                .then_should_return_experiences_and_next_offset(['1'])
+
+    @tag('elasticsearch')
+    def test_search_in_bounding_box(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='barcelona', saves_count=1) \
+                .given_an_scene(latitude=ExperienceElasticRepoTestCase.BARCELONA[0],
+                                longitude=ExperienceElasticRepoTestCase.BARCELONA[1], experience_id_of_number=1) \
+                .given_an_experience(title='berlin') \
+                .given_an_scene(latitude=ExperienceElasticRepoTestCase.BERLIN[0],
+                                longitude=ExperienceElasticRepoTestCase.BERLIN[1], experience_id_of_number=2) \
+                .given_an_experience(title='barcelona more saved', saves_count=10) \
+                .given_an_scene(latitude=ExperienceElasticRepoTestCase.BARCELONA[0],
+                                longitude=ExperienceElasticRepoTestCase.BARCELONA[1], experience_id_of_number=3) \
+                .when_index_everything() \
+                .when_search_in_area(bounding_box=(42.0, 1.5, 41.0, 3.0), clusters_precision=3) \
+                .then_should_return_experiences_and_clusters(['3', '1'], [('sp3', 2)])
+
+    @tag('elasticsearch')
+    def test_search_in_radius(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='barcelona') \
+                .given_an_scene(latitude=ExperienceElasticRepoTestCase.BARCELONA[0],
+                                longitude=ExperienceElasticRepoTestCase.BARCELONA[1], experience_id_of_number=1) \
+                .given_an_experience(title='berlin') \
+                .given_an_scene(latitude=ExperienceElasticRepoTestCase.BERLIN[0],
+                                longitude=ExperienceElasticRepoTestCase.BERLIN[1], experience_id_of_number=2) \
+                .when_index_everything() \
+                .when_search_in_area(location=ExperienceElasticRepoTestCase.BERLIN, radius=50) \
+                .then_should_return_experiences_and_clusters(['2'], None)
+
+    @tag('elasticsearch')
+    def test_suggest_by_title_and_scene_title_prefix(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='Mountain bike routes', saves_count=1) \
+                .given_an_experience(title='Barcelona restaurants') \
+                .given_an_scene(title='Montjuic mountain', experience_id_of_number=2) \
+                .given_an_experience(title='Mountains of Peru', saves_count=5) \
+                .given_an_experience(title='Romanic monuments') \
+                .when_index_everything() \
+                .when_suggest('mounta') \
+                .then_should_return_suggestions([('1', 'Mountain bike routes'), ('2', 'Barcelona restaurants'),
+                                                 ('3', 'Mountains of Peru')])
+
     @tag('elasticsearch')
     def test_search_pagination(self):
         ExperienceElasticRepoTestCase.ScenarioMaker() \
@@ -635,6 +1387,19 @@ class ExperienceElasticRepoTestCase(TestCase):
                 .when_index_everything_and_search(word='mountain', offset=1, limit=1) \
                 .then_should_return_experiences_and_next_offset(['2'], None)
 
+    @tag('elasticsearch')
+    def test_search_cursor_pagination(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='bike routes') \
+                .given_an_experience(title='mountain bike routes for everyone') \
+                .given_an_experience(title='mountain') \
+                .given_an_experience(title='barcelona restaurants') \
+                .when_index_everything_and_search(word='mountain', offset=None, limit=1) \
+                .then_should_return_experiences_and_next_offset(['3']) \
+                .when_search_next_page(word='mountain', limit=1) \
+                .then_should_return_experiences_and_next_offset(['2']) \
+                .then_should_not_have_next_cursor()
+
     @tag('elasticsearch')
     def test_search_without_word_boosts_by_saves_count(self):
         ExperienceElasticRepoTestCase.ScenarioMaker() \
@@ -677,6 +1442,46 @@ class ExperienceElasticRepoTestCase(TestCase):
                 .when_index_everything_and_search(location=ExperienceElasticRepoTestCase.BARCELONA) \
                 .then_should_return_experiences_and_next_offset(['1', '3', '2'])
 
+    @tag('elasticsearch')
+    def test_bulk_index_experiences_indexes_and_deletes(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='mountain bike routes') \
+                .given_an_scene(experience_id_of_number=1) \
+                .given_an_experience(title='mountain') \
+                .given_an_scene(experience_id_of_number=2) \
+                .given_an_experience(title='mountain lakes') \
+                .given_an_scene(experience_id_of_number=3) \
+                .when_index_everything() \
+                .when_bulk_index(experiences_numbers=[1, 2], deleted_ids=['3', '42']) \
+                .then_bulk_stats_should_be(indexed=2, deleted=2, failed=0) \
+                .when_search(word='mountain') \
+                .then_should_return_experiences_and_next_offset(['2', '1'])
+
+    @tag('elasticsearch')
+    def test_bulk_update_saves_counts_reranks_without_reindexing(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='bike tour', saves_count=100) \
+                .given_an_experience(title='bike route', saves_count=10) \
+                .when_index_everything() \
+                .when_bulk_update_saves_counts({'2': 10000, '42': 5}) \
+                .then_update_stats_should_be(updated=2, failed=0) \
+                .when_search(word='bike') \
+                .then_should_return_experiences_and_next_offset(['2', '1'])
+
+    @tag('elasticsearch')
+    def test_switch_aliases_serves_the_new_index(self):
+        ExperienceElasticRepoTestCase.ScenarioMaker() \
+                .given_an_experience(title='mountain') \
+                .given_an_scene(experience_id_of_number=1) \
+                .when_index_everything_and_search(word='mountain') \
+                .then_should_return_experiences_and_next_offset(['1']) \
+                .given_an_experience(title='mountain lakes') \
+                .given_an_scene(experience_id_of_number=2) \
+                .when_bulk_index_into_a_new_index_and_switch_aliases(experiences_numbers=[2]) \
+                .when_search(word='mountain') \
+                .then_should_return_experiences_and_next_offset(['2']) \
+                .then_old_indices_should_not_be_aliased_anymore()
+
     @tag('elasticsearch')
     def test_delete_experience(self):
         ExperienceElasticRepoTestCase.ScenarioMaker() \
@@ -709,9 +1514,9 @@ class ExperienceElasticRepoTestCase(TestCase):
             self.scenes = []
             logging.getLogger('elasticsearch').setLevel(logging.ERROR)
 
-        def given_an_experience(self, title='', description='', saves_count=0):
+        def given_an_experience(self, title='', description='', saves_count=0, author_id='0'):
             experience = Experience(id=str(len(self.experiences)+1), title=title,
-                                    description=description, author_id='0', saves_count=saves_count)
+                                    description=description, author_id=author_id, saves_count=saves_count)
             self.experiences.append(experience)
             return self
 
@@ -736,9 +1541,78 @@ class ExperienceElasticRepoTestCase(TestCase):
                 self.repo.index_experience_and_its_scenes(experience, experience_scenes)
             return self
 
-        def when_search(self, word=None, location=None, offset=0, limit=20):
+        def when_search(self, word=None, location=None, offset=0, limit=20, excluded_authors_ids=None):
             self.repo._refresh_experience_index()
-            self.result = self.repo.search_experiences(word=word, location=location, offset=offset, limit=limit)
+            self.result = self.repo.search_experiences(word=word, location=location, offset=offset, limit=limit,
+                                                       excluded_authors_ids=excluded_authors_ids)
+            return self
+
+        def when_suggest(self, prefix):
+            self.repo._refresh_experience_index()
+            self.result = self.repo.suggest_experiences(prefix)
+            return self
+
+        def then_should_return_suggestions(self, suggestions):
+            assert sorted([(suggestion['id'], suggestion['title']) for suggestion in self.result]) == suggestions
+            return self
+
+        def when_search_in_area(self, bounding_box=None, location=None, radius=None, clusters_precision=None):
+            self.repo._refresh_experience_index()
+            self.result = self.repo.search_experiences_in_area(bounding_box=bounding_box, location=location,
+                                                               radius=radius, clusters_precision=clusters_precision)
+            return self
+
+        def then_should_return_experiences_and_clusters(self, experience_ids, clusters):
+            assert self.result['results'] == experience_ids
+            if clusters is None:
+                assert self.result['clusters'] is None
+            else:
+                assert [(cluster['geohash'], cluster['count']) for cluster in self.result['clusters']] == clusters
+            return self
+
+        def when_bulk_index(self, experiences_numbers, deleted_ids):
+            experiences_and_scenes = []
+            for number in experiences_numbers:
+                experience = self.experiences[number-1]
+                experience_scenes = [scene for scene in self.scenes if scene.experience_id == experience.id]
+                experiences_and_scenes.append((experience, experience_scenes))
+            self.result = self.repo.bulk_index_experiences(experiences_and_scenes, deleted_ids)
+            return self
+
+        def when_bulk_index_into_a_new_index_and_switch_aliases(self, experiences_numbers):
+            new_index = self.repo.create_experience_index(bulk_loading=True)
+            experiences_and_scenes = []
+            for number in experiences_numbers:
+                experience = self.experiences[number-1]
+                experience_scenes = [scene for scene in self.scenes if scene.experience_id == experience.id]
+                experiences_and_scenes.append((experience, experience_scenes))
+            self.repo.bulk_index_experiences(experiences_and_scenes, [], index=new_index)
+            self.repo.finish_bulk_loading(new_index)
+            self.old_indices = self.repo.switch_aliases(new_index, [ExperienceSearchRepo.EXPERIENCE_INDEX,
+                                                                    ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX])
+            self.repo.delete_indices(self.old_indices)
+            return self
+
+        def then_old_indices_should_not_be_aliased_anymore(self):
+            assert len(self.old_indices) == 1
+            assert self.old_indices[0] not in self.repo.get_aliased_indices(ExperienceSearchRepo.EXPERIENCE_INDEX)
+            return self
+
+        def when_bulk_update_saves_counts(self, saves_counts):
+            self.result = self.repo.bulk_update_saves_counts(saves_counts)
+            return self
+
+        def then_update_stats_should_be(self, updated, failed):
+            assert self.result == {'updated': updated, 'failed': failed, 'failed_ids': []}
+            return self
+
+        def then_bulk_stats_should_be(self, indexed, deleted, failed):
+            assert self.result == {'indexed': indexed, 'deleted': deleted, 'failed': failed, 'failed_ids': []}
+            return self
+
+        def when_search_next_page(self, word=None, location=None, limit=20):
+            self.result = self.repo.search_experiences(word=word, location=location, offset=None,
+                                                       cursor=self.result['next_cursor'], limit=limit)
             return self
 
         def when_delete_experience(self, experience_index):
@@ -759,6 +1633,10 @@ class ExperienceElasticRepoTestCase(TestCase):
             assert self.result['next_offset'] == next_offset
             return self
 
+        def then_should_not_have_next_cursor(self):
+            assert self.result['next_cursor'] is None
+            return self
+
         def then_should_not_raise_error(self):
             assert self.error is None
             return self
@@ -0,0 +1,63 @@
+from experiences.geo import encode_geohash, decode_geohash, get_centroid
+
+
+class TestGeo:
+
+    def test_encode_geohash(self):
+        TestGeo.ScenarioMaker() \
+                .when_encode(57.64911, 10.40744, precision=11) \
+                .then_geohash_should_be('u4pruydqqvj')
+
+    def test_near_points_share_geohash(self):
+        TestGeo.ScenarioMaker() \
+                .when_encode(41.385064, 2.173403, precision=5) \
+                .then_geohash_should_be('sp3e3') \
+                .when_encode(41.385321, 2.173799, precision=5) \
+                .then_geohash_should_be('sp3e3')
+
+    def test_decode_returns_center_of_cell(self):
+        TestGeo.ScenarioMaker() \
+                .when_decode('sp3e3') \
+                .then_location_should_be((41.37451171875, 2.17529296875))
+
+    def test_centroid_of_single_point_is_the_point(self):
+        TestGeo.ScenarioMaker() \
+                .when_get_centroid([(41.385064, 2.173403)]) \
+                .then_location_should_be_close_to((41.385064, 2.173403))
+
+    def test_centroid_works_across_antimeridian(self):
+        TestGeo.ScenarioMaker() \
+                .when_get_centroid([(10.0, 179.0), (10.0, -179.0)]) \
+                .then_location_should_be_close_to((10.0, 180.0))
+
+    def test_centroid_without_points_is_origin(self):
+        TestGeo.ScenarioMaker() \
+                .when_get_centroid([]) \
+                .then_location_should_be((0.0, 0.0))
+
+    class ScenarioMaker:
+
+        def when_encode(self, latitude, longitude, precision):
+            self.result = encode_geohash(latitude, longitude, precision)
+            return self
+
+        def when_decode(self, geohash):
+            self.result = decode_geohash(geohash)
+            return self
+
+        def then_geohash_should_be(self, geohash):
+            assert self.result == geohash
+            return self
+
+        def then_location_should_be(self, location):
+            assert self.result == location
+            return self
+
+        def when_get_centroid(self, points):
+            self.result = get_centroid(points)
+            return self
+
+        def then_location_should_be_close_to(self, location):
+            assert abs(self.result[0] - location[0]) < 0.01
+            assert abs(abs(self.result[1]) - abs(location[1])) < 0.01
+            return self
@@ -7,7 +7,7 @@ from experiences.entities import Experience
 from experiences.interactors import GetExperiencesInteractor, CreateNewExperienceInteractor, \
         ModifyExperienceInteractor, UploadExperiencePictureInteractor, SaveUnsaveExperienceInteractor, \
         SearchExperiencesInteractor, GetOrCreateExperienceShareIdInteractor, IdGenerator, \
-        GetExperienceInteractor, FlagExperienceInteractor
+        GetExperienceInteractor, FlagExperienceInteractor, SearchExperiencesInAreaInteractor, SuggestInteractor
 
 
 class TestGetExperiences:
@@ -56,6 +56,16 @@ class TestGetExperiences:
                 .then_result_should_be_experiences_and_next_offset_limit(
                         offset=7, limit=GetExperiencesInteractor.MAX_PAGINATE_LIMIT)
 
+    def test_get_with_cursor_passes_it_to_repo(self):
+        TestGetExperiences.ScenarioMaker() \
+                .given_an_experience() \
+                .given_a_repo_that_returns_experiences_and_offset(None) \
+                .given_a_permission_validator_that_returns_true() \
+                .when_interactor_is_executed(logged_person_id='2', username='self',
+                                             offset=None, cursor='crs', limit=3) \
+                .then_should_call_get_person_experiences_with(logged_person_id='2', target_person_id='2',
+                                                              offset=None, cursor='crs', limit=3)
+
     def test_no_logged_raises_exception(self):
         TestGetExperiences.ScenarioMaker() \
                 .given_a_permission_validator_that_raises_exception() \
@@ -95,26 +105,28 @@ class TestGetExperiences:
             self.get_profile_interactor.execute.return_value = Profile(person_id=person_id)
             return self
 
-        def when_interactor_is_executed(self, logged_person_id, saved=False, username=None, offset=0, limit=20):
+        def when_interactor_is_executed(self, logged_person_id, saved=False, username=None,
+                                        offset=0, limit=20, cursor=None):
             try:
                 self.result = GetExperiencesInteractor(experience_repo=self.repo,
                                                        get_profile_interactor=self.get_profile_interactor,
                                                        permissions_validator=self.permissions_validator) \
-                        .set_params(username=username, saved=saved,
-                                    logged_person_id=logged_person_id, offset=offset, limit=limit).execute()
+                        .set_params(username=username, saved=saved, logged_person_id=logged_person_id,
+                                    offset=offset, limit=limit, cursor=cursor).execute()
             except Exception as e:
                 self.error = e
             return self
 
-        def then_should_call_get_person_experiences_with(self, logged_person_id, target_person_id, offset, limit):
+        def then_should_call_get_person_experiences_with(self, logged_person_id, target_person_id,
+                                                         offset, limit, cursor=None):
             self.repo.get_person_experiences.assert_called_once_with(logged_person_id=logged_person_id,
                                                                      target_person_id=target_person_id,
-                                                                     offset=offset, limit=limit)
+                                                                     offset=offset, limit=limit, cursor=cursor)
             return self
 
-        def then_should_call_get_saved_experiences_with(self, logged_person_id, offset, limit):
+        def then_should_call_get_saved_experiences_with(self, logged_person_id, offset, limit, cursor=None):
             self.repo.get_saved_experiences.assert_called_once_with(logged_person_id=logged_person_id,
-                                                                    offset=offset, limit=limit)
+                                                                    offset=offset, limit=limit, cursor=cursor)
             return self
 
         def then_should_call_get_profile_interactor_with_username(self, username, logged_person_id):
@@ -155,7 +167,7 @@ class TestSearchExperiences:
                 .then_validate_permissions_should_be_called_with_logged_person_id() \
                 .then_result_should_be_both_experiences_and_next_offset_and_same_limit()
 
-    def test_filters_experiences_from_blocked_people(self):
+    def test_excludes_experiences_from_blocked_people_on_search(self):
         TestSearchExperiences.ScenarioMaker() \
                 .given_a_logged_person_id() \
                 .given_a_search_word() \
@@ -165,13 +177,30 @@ class TestSearchExperiences:
                 .given_an_experience() \
                 .given_another_experience() \
                 .given_a_next_offset() \
-                .given_a_repo_that_returns_both_experiences_and_next_offset_and_other_experiences_from('44') \
+                .given_a_repo_that_returns_both_experiences_and_next_offset() \
                 .given_a_block_repo_that_returns_on_get_blocked_people(['44']) \
                 .when_interactor_is_executed() \
-                .then_should_call_search_experiences_word_location_and_limit_and_offset() \
+                .then_should_call_search_experiences_word_location_and_limit_and_offset(excluded_authors_ids=['44']) \
                 .then_validate_permissions_should_be_called_with_logged_person_id() \
                 .then_result_should_be_both_experiences_and_next_offset_and_same_limit()
 
+    def test_lite_search_is_passed_to_repo(self):
+        TestSearchExperiences.ScenarioMaker() \
+                .given_a_logged_person_id() \
+                .given_a_search_word() \
+                .given_a_location() \
+                .given_a_pagination_limit_and_offset() \
+                .given_a_lite_search() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_an_experience() \
+                .given_another_experience() \
+                .given_a_next_offset() \
+                .given_a_repo_that_returns_both_experiences_and_next_offset() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .when_interactor_is_executed() \
+                .then_should_call_search_experiences_word_location_and_limit_and_offset(lite=True) \
+                .then_result_should_be_both_experiences_and_next_offset_and_same_limit()
+
     def test_when_limit_is_higher_that_interactor_maximum(self):
         TestSearchExperiences.ScenarioMaker() \
                 .given_a_logged_person_id() \
@@ -206,6 +235,8 @@ class TestSearchExperiences:
             self.location = None
             self.limit = 0
             self.offset = 0
+            self.cursor = None
+            self.lite = False
 
         def given_a_logged_person_id(self):
             self.logged_person_id = '0'
@@ -215,6 +246,10 @@ class TestSearchExperiences:
             self.word = 'culture'
             return self
 
+        def given_a_lite_search(self):
+            self.lite = True
+            return self
+
         def given_a_location(self):
             self.location = (4.5, -0.8)
             return self
@@ -257,17 +292,6 @@ class TestSearchExperiences:
                                                                     "next_offset": self.next_offset}
             return self
 
-        def given_a_repo_that_returns_both_experiences_and_next_offset_and_other_experiences_from(self, author_id):
-            exp_a = Experience(id=5, title='T1', description='d1', picture=None, author_id=author_id)
-            exp_b = Experience(id=6, title='T2', description='d2', picture=None, author_id=author_id)
-            exp_c = Experience(id=7, title='T3', description='d3', picture=None, author_id=author_id)
-            self.experience_repo = Mock()
-            self.experience_repo.search_experiences.return_value = {
-                    "results": [exp_a, self.experience_a, exp_b, self.experience_b, exp_c],
-                    "next_offset": self.next_offset
-                }
-            return self
-
         def given_a_block_repo_that_returns_on_get_blocked_people(self, people):
             self.block_repo = Mock()
             self.block_repo.get_blocked_people.return_value = people
@@ -279,7 +303,8 @@ class TestSearchExperiences:
                                                             block_repo=self.block_repo,
                                                             permissions_validator=self.permissions_validator) \
                         .set_params(word=self.word, location=self.location, logged_person_id=self.logged_person_id,
-                                    limit=self.limit, offset=self.offset).execute()
+                                    limit=self.limit, offset=self.offset, cursor=self.cursor,
+                                    lite=self.lite).execute()
             except Exception as e:
                 print()
                 print(e)
@@ -299,16 +324,20 @@ class TestSearchExperiences:
                                      "next_limit": 20}
             return self
 
-        def then_should_call_search_experiences_word_location_and_limit_and_offset(self):
-            self.experience_repo.search_experiences.assert_called_once_with(self.logged_person_id,
-                                                                            word=self.word, location=self.location,
-                                                                            limit=self.limit, offset=self.offset)
+        def then_should_call_search_experiences_word_location_and_limit_and_offset(self, excluded_authors_ids=None,
+                                                                                   lite=False):
+            self.experience_repo.search_experiences.assert_called_once_with(
+                    self.logged_person_id, word=self.word, location=self.location, limit=self.limit,
+                    offset=self.offset, cursor=self.cursor, excluded_authors_ids=excluded_authors_ids or [],
+                    lite=lite)
             return self
 
         def then_should_call_search_experiences_with_params_but_limit_at_20(self):
             self.experience_repo.search_experiences.assert_called_once_with(self.logged_person_id,
                                                                             word=self.word, location=self.location,
-                                                                            limit=20, offset=self.offset)
+                                                                            limit=20, offset=self.offset,
+                                                                            cursor=self.cursor, excluded_authors_ids=[],
+                                                                            lite=False)
             return self
 
         def then_validate_permissions_should_be_called_with_logged_person_id(self):
@@ -321,6 +350,247 @@ class TestSearchExperiences:
             return self
 
 
+class TestSearchExperiencesInArea:
+
+    def test_returns_repo_response_excluding_blocked_people(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people(['44']) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(bounding_box=(42.1, 1.9, 41.2, 2.5), clusters_precision=5, limit=50) \
+                .then_validate_permissions_should_be_called_with_logged_person_id() \
+                .then_should_call_repo_with(bounding_box=(42.1, 1.9, 41.2, 2.5), clusters_precision=5, limit=50,
+                                            excluded_authors_ids=['44']) \
+                .then_result_should_be_repo_result()
+
+    def test_radius_around_location(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(location=(4.5, -0.8), radius=10.0, limit=20) \
+                .then_should_call_repo_with(location=(4.5, -0.8), radius=10.0, limit=20, excluded_authors_ids=[]) \
+                .then_result_should_be_repo_result()
+
+    def test_limit_is_capped(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(location=(4.5, -0.8), radius=10.0, limit=500) \
+                .then_should_call_repo_with(location=(4.5, -0.8), radius=10.0, limit=100, excluded_authors_ids=[])
+
+    def test_without_area_raises_invalid_entity(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(location=(4.5, -0.8), limit=20) \
+                .then_should_raise_invalid_entity(source='area', code='empty_attribute') \
+                .then_repo_should_not_be_called()
+
+    def test_non_positive_radius_raises_invalid_entity(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(location=(4.5, -0.8), radius=0.0, limit=20) \
+                .then_should_raise_invalid_entity(source='radius', code='wrong_size') \
+                .then_repo_should_not_be_called()
+
+    def test_wrong_clusters_precision_raises_invalid_entity(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(bounding_box=(42.1, 1.9, 41.2, 2.5), clusters_precision=13, limit=20) \
+                .then_should_raise_invalid_entity(source='clusters', code='wrong_size') \
+                .then_repo_should_not_be_called()
+
+    def test_no_logged_raises_exception(self):
+        TestSearchExperiencesInArea.ScenarioMaker() \
+                .given_a_permission_validator_that_raises_exception() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_a_repo_that_returns_experiences_and_clusters() \
+                .when_interactor_is_executed(bounding_box=(42.1, 1.9, 41.2, 2.5), limit=20) \
+                .then_should_raise_no_logged_exception() \
+                .then_repo_should_not_be_called()
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.logged_person_id = '0'
+            self.word = 'culture'
+
+        def given_a_permission_validator_that_returns_true(self):
+            self.permissions_validator = Mock()
+            self.permissions_validator.validate_permissions.return_value = True
+            return self
+
+        def given_a_permission_validator_that_raises_exception(self):
+            self.permissions_validator = Mock()
+            self.permissions_validator.validate_permissions.side_effect = NoLoggedException()
+            return self
+
+        def given_a_block_repo_that_returns_on_get_blocked_people(self, people):
+            self.block_repo = Mock()
+            self.block_repo.get_blocked_people.return_value = people
+            return self
+
+        def given_a_repo_that_returns_experiences_and_clusters(self):
+            self.repo_result = {'results': [Experience(id=1, title='A', description='some', picture=None,
+                                                       author_id='1')],
+                                'clusters': [{'geohash': 'sp3e3', 'count': 1, 'latitude': 41.3, 'longitude': 2.1}]}
+            self.experience_repo = Mock()
+            self.experience_repo.search_experiences_in_area.return_value = self.repo_result
+            return self
+
+        def when_interactor_is_executed(self, limit, bounding_box=None, location=None, radius=None,
+                                        clusters_precision=None):
+            try:
+                self.response = SearchExperiencesInAreaInteractor(experience_repo=self.experience_repo,
+                                                                  block_repo=self.block_repo,
+                                                                  permissions_validator=self.permissions_validator) \
+                        .set_params(word=self.word, bounding_box=bounding_box, location=location, radius=radius,
+                                    clusters_precision=clusters_precision, logged_person_id=self.logged_person_id,
+                                    limit=limit).execute()
+            except Exception as e:
+                self.error = e
+            return self
+
+        def then_validate_permissions_should_be_called_with_logged_person_id(self):
+            self.permissions_validator.validate_permissions \
+                    .assert_called_once_with(logged_person_id=self.logged_person_id)
+            return self
+
+        def then_should_call_repo_with(self, limit, excluded_authors_ids, bounding_box=None, location=None,
+                                       radius=None, clusters_precision=None):
+            self.experience_repo.search_experiences_in_area.assert_called_once_with(
+                    self.logged_person_id, word=self.word, bounding_box=bounding_box, location=location,
+                    radius=radius, limit=limit, excluded_authors_ids=excluded_authors_ids,
+                    clusters_precision=clusters_precision)
+            return self
+
+        def then_result_should_be_repo_result(self):
+            assert self.response == self.repo_result
+            return self
+
+        def then_should_raise_invalid_entity(self, source, code):
+            assert type(self.error) is InvalidEntityException
+            assert self.error.source == source
+            assert self.error.code == code
+            return self
+
+        def then_should_raise_no_logged_exception(self):
+            assert type(self.error) is NoLoggedException
+            return self
+
+        def then_repo_should_not_be_called(self):
+            self.experience_repo.search_experiences_in_area.assert_not_called()
+            return self
+
+
+class TestSuggest:
+
+    def test_returns_experiences_and_usernames_excluding_blocked_people(self):
+        TestSuggest.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people(['44']) \
+                .given_repos_that_return_suggestions() \
+                .when_interactor_is_executed(word='bik', limit=3) \
+                .then_should_call_repos_with(word='bik', limit=3, excluded_ids=['44']) \
+                .then_result_should_be_suggestions()
+
+    def test_limit_is_capped(self):
+        TestSuggest.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_repos_that_return_suggestions() \
+                .when_interactor_is_executed(word='bik', limit=50) \
+                .then_should_call_repos_with(word='bik', limit=10, excluded_ids=[])
+
+    def test_empty_word_returns_empty_suggestions(self):
+        TestSuggest.ScenarioMaker() \
+                .given_a_permission_validator_that_returns_true() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_repos_that_return_suggestions() \
+                .when_interactor_is_executed(word=' ', limit=5) \
+                .then_repos_should_not_be_called() \
+                .then_result_should_be_empty()
+
+    def test_no_logged_raises_exception(self):
+        TestSuggest.ScenarioMaker() \
+                .given_a_permission_validator_that_raises_exception() \
+                .given_a_block_repo_that_returns_on_get_blocked_people([]) \
+                .given_repos_that_return_suggestions() \
+                .when_interactor_is_executed(word='bik', limit=5) \
+                .then_should_raise_no_logged_exception() \
+                .then_repos_should_not_be_called()
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.logged_person_id = '0'
+
+        def given_a_permission_validator_that_returns_true(self):
+            self.permissions_validator = Mock()
+            self.permissions_validator.validate_permissions.return_value = True
+            return self
+
+        def given_a_permission_validator_that_raises_exception(self):
+            self.permissions_validator = Mock()
+            self.permissions_validator.validate_permissions.side_effect = NoLoggedException()
+            return self
+
+        def given_a_block_repo_that_returns_on_get_blocked_people(self, people):
+            self.block_repo = Mock()
+            self.block_repo.get_blocked_people.return_value = people
+            return self
+
+        def given_repos_that_return_suggestions(self):
+            self.experiences = [{'id': '4', 'title': 'Bike routes'}]
+            self.usernames = ['biker']
+            self.experience_repo = Mock()
+            self.experience_repo.suggest_experiences.return_value = self.experiences
+            self.profile_repo = Mock()
+            self.profile_repo.suggest_usernames.return_value = self.usernames
+            return self
+
+        def when_interactor_is_executed(self, word, limit):
+            try:
+                self.response = SuggestInteractor(experience_repo=self.experience_repo,
+                                                  profile_repo=self.profile_repo, block_repo=self.block_repo,
+                                                  permissions_validator=self.permissions_validator) \
+                        .set_params(word=word, logged_person_id=self.logged_person_id, limit=limit).execute()
+            except Exception as e:
+                self.error = e
+            return self
+
+        def then_should_call_repos_with(self, word, limit, excluded_ids):
+            self.experience_repo.suggest_experiences.assert_called_once_with(word, limit=limit,
+                                                                             excluded_authors_ids=excluded_ids)
+            self.profile_repo.suggest_usernames.assert_called_once_with(word, limit=limit,
+                                                                        excluded_people_ids=excluded_ids)
+            return self
+
+        def then_result_should_be_suggestions(self):
+            assert self.response == {'experiences': self.experiences, 'usernames': self.usernames}
+            return self
+
+        def then_result_should_be_empty(self):
+            assert self.response == {'experiences': [], 'usernames': []}
+            return self
+
+        def then_repos_should_not_be_called(self):
+            self.experience_repo.suggest_experiences.assert_not_called()
+            self.profile_repo.suggest_usernames.assert_not_called()
+            return self
+
+        def then_should_raise_no_logged_exception(self):
+            assert type(self.error) is NoLoggedException
+            return self
+
+
 class TestCreateNewExperience:
 
     def test_creates_and_returns_experience(self):
@@ -665,8 +935,10 @@ class TestUploadExperiencePictureInteractor:
                 .given_an_experience_repo_that_returns_that_experience_on_attach() \
                 .given_an_experience_id() \
                 .given_a_picture() \
+                .given_a_picture_validator_that_accepts() \
                 .when_interactor_is_executed() \
                 .then_should_validate_permissions() \
+                .then_should_validate_picture() \
                 .then_should_call_repo_attach_picture_to_experience() \
                 .then_should_return_experience()
 
@@ -677,11 +949,25 @@ class TestUploadExperiencePictureInteractor:
                 .given_an_experience_repo() \
                 .given_an_experience_id() \
                 .given_a_picture() \
+                .given_a_picture_validator_that_accepts() \
                 .when_interactor_is_executed() \
                 .then_should_validate_permissions() \
                 .then_should_not_call_repo_attach_picture_to_experience() \
                 .then_should_raise_no_permissions_exception()
 
+    def test_invalid_picture_doesnt_attach_picture(self):
+        TestUploadExperiencePictureInteractor.ScenarioMaker() \
+                .given_a_logged_person_id() \
+                .given_a_permissions_validator_that_returns_true() \
+                .given_an_experience_repo() \
+                .given_an_experience_id() \
+                .given_a_picture() \
+                .given_a_picture_validator_that_rejects() \
+                .when_interactor_is_executed() \
+                .then_should_validate_picture() \
+                .then_should_not_call_repo_attach_picture_to_experience() \
+                .then_should_raise_invalid_picture_exception()
+
     class ScenarioMaker:
 
         def given_a_logged_person_id(self):
@@ -719,10 +1005,22 @@ class TestUploadExperiencePictureInteractor:
             self.picture = 'pic'
             return self
 
+        def given_a_picture_validator_that_accepts(self):
+            self.picture_validator = Mock()
+            return self
+
+        def given_a_picture_validator_that_rejects(self):
+            self.picture_validator = Mock()
+            self.picture_validator.validate_picture.side_effect = InvalidEntityException(source='picture',
+                                                                                         code='wrong_size',
+                                                                                         message='Too big')
+            return self
+
         def when_interactor_is_executed(self):
             try:
                 interactor = UploadExperiencePictureInteractor(experience_repo=self.experience_repo,
-                                                               permissions_validator=self.permissions_validator)
+                                                               permissions_validator=self.permissions_validator,
+                                                               picture_validator=self.picture_validator)
                 self.result = interactor.set_params(experience_id=self.experience_id, picture=self.picture,
                                                     logged_person_id=self.logged_person_id).execute()
             except Exception as e:
@@ -752,6 +1050,14 @@ class TestUploadExperiencePictureInteractor:
             assert type(self.error) is NoPermissionException
             return self
 
+        def then_should_validate_picture(self):
+            self.picture_validator.validate_picture.assert_called_once_with(self.picture)
+            return self
+
+        def then_should_raise_invalid_picture_exception(self):
+            assert self.error == InvalidEntityException(source='picture', code='wrong_size', message='Too big')
+            return self
+
 
 class TestSaveUnsaveExperienceInteractor:
 
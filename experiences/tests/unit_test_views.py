@@ -4,7 +4,8 @@ from pachatary.entities import Picture
 from profiles.entities import Profile
 from experiences.entities import Experience
 from experiences.views import ExperiencesView, ExperienceView, UploadExperiencePictureView, SaveExperienceView, \
-        SearchExperiencesView, ExperienceShareUrlView, TranslateExperienceShareIdView, FlagExperienceView
+        SearchExperiencesView, ExperienceShareUrlView, TranslateExperienceShareIdView, FlagExperienceView, \
+        SuggestView
 from experiences.serializers import serialize_experience, serialize_multiple_experiences
 from experiences.interactors import SaveUnsaveExperienceInteractor
 
@@ -37,6 +38,19 @@ class TestExperiencesView:
                 .then_status_code_should_be_200() \
                 .then_response_body_should_be_experiences_and_next_url_serialized(username=None, saved='true')
 
+    def test_cursor_returns_experiences_and_next_url_with_cursor(self):
+        TestExperiencesView.ScenarioMaker() \
+                .given_a_get_experiences_base_url() \
+                .given_an_experience_a() \
+                .given_an_experience_b() \
+                .given_a_next_limit_and_cursor() \
+                .given_an_interactor_that_returns_that_experiences_and_next_limit_and_offset() \
+                .when_get_experiences(logged_person_id='9', username='usr.nm', limit='4', offset=None, cursor='crs') \
+                .then_should_call_interactor_set_params(logged_person_id='9', username='usr.nm',
+                                                        saved=False, limit=4, offset=None, cursor='crs') \
+                .then_status_code_should_be_200() \
+                .then_response_body_should_be_experiences_and_next_url_serialized(username='usr.nm', saved=False)
+
     class ScenarioMaker:
 
         def given_a_get_experiences_base_url(self):
@@ -60,6 +74,13 @@ class TestExperiencesView:
         def given_a_next_limit_and_offset(self):
             self.next_limit = 8
             self.next_offset = 7
+            self.next_cursor = None
+            return self
+
+        def given_a_next_limit_and_cursor(self):
+            self.next_limit = 8
+            self.next_offset = None
+            self.next_cursor = 'nxt'
             return self
 
         def given_an_interactor_that_returns_that_experiences_and_next_limit_and_offset(self):
@@ -67,19 +88,22 @@ class TestExperiencesView:
             self.interactor_mock.set_params.return_value = self.interactor_mock
             self.interactor_mock.execute.return_value = {"results": [self.experience_a, self.experience_b],
                                                          "next_offset": self.next_offset,
+                                                         "next_cursor": self.next_cursor,
                                                          "next_limit": self.next_limit}
             return self
 
-        def when_get_experiences(self, logged_person_id, username=None, saved=None, limit=20, offset=0):
+        def when_get_experiences(self, logged_person_id, username=None, saved=None, limit=20, offset=0, cursor=None):
             self.body, self.status = ExperiencesView(get_experiences_interactor=self.interactor_mock,
                                                      get_experiences_base_url=self.experiences_base_url) \
-                    .get(logged_person_id=logged_person_id, username=username, saved=saved, limit=limit, offset=offset)
+                    .get(logged_person_id=logged_person_id, username=username, saved=saved,
+                         limit=limit, offset=offset, cursor=cursor)
             return self
 
-        def then_should_call_interactor_set_params(self, logged_person_id, username, saved, limit, offset):
+        def then_should_call_interactor_set_params(self, logged_person_id, username, saved, limit, offset,
+                                                   cursor=None):
             self.interactor_mock.set_params.assert_called_once_with(logged_person_id=logged_person_id,
                                                                     username=username, saved=saved,
-                                                                    limit=limit, offset=offset)
+                                                                    limit=limit, offset=offset, cursor=cursor)
             return self
 
         def then_status_code_should_be_200(self):
@@ -87,12 +111,16 @@ class TestExperiencesView:
             return self
 
         def then_response_body_should_be_experiences_and_next_url_serialized(self, saved, username):
+            if self.next_cursor is not None:
+                page_param = "cursor={}".format(self.next_cursor)
+            else:
+                page_param = "offset={}".format(self.next_offset)
             if saved:
-                next_url = "{}?saved=true&limit={}&offset={}".format(self.experiences_base_url,
-                                                                     self.next_limit, self.next_offset)
+                next_url = "{}?saved=true&limit={}&{}".format(self.experiences_base_url,
+                                                              self.next_limit, page_param)
             else:
-                next_url = "{}?username={}&limit={}&offset={}".format(self.experiences_base_url, username,
-                                                                      self.next_limit, self.next_offset)
+                next_url = "{}?username={}&limit={}&{}".format(self.experiences_base_url, username,
+                                                               self.next_limit, page_param)
 
             assert self.body == {
                 "results": serialize_multiple_experiences([self.experience_a, self.experience_b]),
@@ -403,12 +431,110 @@ class TestSearchExperiencesView:
                 .then_response_body_should_be_experiences_and_next_url_serialized(word=None, latitude='9.43',
                                                                                   longitude=None)
 
+    def test_cursor_returns_next_url_with_cursor(self):
+        TestSearchExperiencesView.ScenarioMaker() \
+                .given_a_search_experiences_base_url() \
+                .given_an_experience_a() \
+                .given_an_experience_b() \
+                .given_a_next_limit_and_cursor() \
+                .given_an_interactor_that_returns_that_experiences_and_next_limit_and_offset() \
+                .when_search_experiences(logged_person_id='9', word='culture', latitude=None,
+                                         longitude=None, limit='4', offset=None, cursor='crs') \
+                .then_should_call_interactor_set_params(logged_person_id='9', word='culture',
+                                                        location=None, limit='4', offset=None, cursor='crs') \
+                .then_status_code_should_be_200() \
+                .then_response_body_should_be_experiences_and_next_url_serialized(word='culture', latitude=None,
+                                                                                  longitude=None)
+
+    def test_lite_returns_lite_experiences_and_next_url_with_lite(self):
+        TestSearchExperiencesView.ScenarioMaker() \
+                .given_a_search_experiences_base_url() \
+                .given_an_experience_a() \
+                .given_an_experience_b() \
+                .given_a_next_limit_and_offset() \
+                .given_an_interactor_that_returns_that_experiences_and_next_limit_and_offset() \
+                .when_search_experiences(logged_person_id='9', word='culture', latitude=None,
+                                         longitude=None, limit='4', offset='3', lite='true') \
+                .then_should_call_interactor_set_params(logged_person_id='9', word='culture',
+                                                        location=None, limit='4', offset='3', lite=True) \
+                .then_status_code_should_be_200() \
+                .then_response_body_should_be_lite_experiences_and_next_url_with_lite(word='culture')
+
+    def test_viewport_searches_in_area_and_returns_clusters(self):
+        TestSearchExperiencesView.ScenarioMaker() \
+                .given_a_search_experiences_base_url() \
+                .given_an_experience_a() \
+                .given_an_experience_b() \
+                .given_a_cluster() \
+                .given_an_area_interactor_that_returns_that_experiences_and_clusters() \
+                .when_search_experiences_in_area(logged_person_id='9', word='culture', north='42.1', west='1.9',
+                                                 south='41.2', east='2.5', clusters='5', limit='50') \
+                .then_should_call_area_interactor_set_params(logged_person_id='9', word='culture',
+                                                             bounding_box=(42.1, 1.9, 41.2, 2.5), location=None,
+                                                             radius=None, clusters_precision=5, limit=50) \
+                .then_status_code_should_be_200() \
+                .then_response_body_should_be_experiences_and_clusters_serialized()
+
+    def test_radius_searches_in_area_around_location(self):
+        TestSearchExperiencesView.ScenarioMaker() \
+                .given_a_search_experiences_base_url() \
+                .given_an_experience_a() \
+                .given_an_experience_b() \
+                .given_an_area_interactor_that_returns_that_experiences_and_clusters() \
+                .when_search_experiences_in_area(logged_person_id='9', latitude='9.43', longitude='-4.88',
+                                                 radius='15', limit='20') \
+                .then_should_call_area_interactor_set_params(logged_person_id='9', word=None, bounding_box=None,
+                                                             location=(9.43, -4.88), radius=15.0,
+                                                             clusters_precision=None, limit=20) \
+                .then_status_code_should_be_200() \
+                .then_response_body_should_be_experiences_and_clusters_serialized()
+
     class ScenarioMaker:
 
+        def __init__(self):
+            self.clusters = None
+
         def given_a_search_experiences_base_url(self):
             self.experiences_base_url = "base_url"
             return self
 
+        def given_a_cluster(self):
+            self.clusters = [{'geohash': 'sp3e3', 'count': 12, 'latitude': 41.38, 'longitude': 2.17}]
+            return self
+
+        def given_an_area_interactor_that_returns_that_experiences_and_clusters(self):
+            self.area_interactor_mock = Mock()
+            self.area_interactor_mock.set_params.return_value = self.area_interactor_mock
+            self.area_interactor_mock.execute.return_value = {"results": [self.experience_a, self.experience_b],
+                                                              "clusters": self.clusters}
+            return self
+
+        def when_search_experiences_in_area(self, logged_person_id, limit, word=None, latitude=None, longitude=None,
+                                            north=None, west=None, south=None, east=None, radius=None,
+                                            clusters=None):
+            self.body, self.status = SearchExperiencesView(
+                    search_experiences_base_url=self.experiences_base_url,
+                    search_experiences_in_area_interactor=self.area_interactor_mock) \
+                .get(logged_person_id=logged_person_id, word=word, latitude=latitude, longitude=longitude,
+                     limit=limit, north=north, west=west, south=south, east=east, radius=radius,
+                     clusters=clusters)
+            return self
+
+        def then_should_call_area_interactor_set_params(self, logged_person_id, word, bounding_box, location,
+                                                        radius, clusters_precision, limit):
+            self.area_interactor_mock.set_params.assert_called_once_with(
+                    logged_person_id=logged_person_id, word=word, bounding_box=bounding_box, location=location,
+                    radius=radius, clusters_precision=clusters_precision, limit=limit)
+            return self
+
+        def then_response_body_should_be_experiences_and_clusters_serialized(self):
+            assert self.body == {
+                'results': serialize_multiple_experiences([self.experience_a, self.experience_b]),
+                'clusters': self.clusters,
+                'next_url': None
+            }
+            return self
+
         def given_an_experience_a(self):
             picture_a = Picture(small_url='small.a', medium_url='medium.a', large_url='large.a')
             self.experience_a = Experience(id=1, title='A', description='some', picture=picture_a,
@@ -426,6 +552,13 @@ class TestSearchExperiencesView:
         def given_a_next_limit_and_offset(self):
             self.next_limit = 8
             self.next_offset = 7
+            self.next_cursor = None
+            return self
+
+        def given_a_next_limit_and_cursor(self):
+            self.next_limit = 8
+            self.next_offset = None
+            self.next_cursor = 'nxt'
             return self
 
         def given_an_interactor_that_returns_that_experiences_and_next_limit_and_offset(self):
@@ -433,20 +566,37 @@ class TestSearchExperiencesView:
             self.interactor_mock.set_params.return_value = self.interactor_mock
             self.interactor_mock.execute.return_value = {"results": [self.experience_a, self.experience_b],
                                                          "next_offset": self.next_offset,
+                                                         "next_cursor": self.next_cursor,
                                                          "next_limit": self.next_limit}
             return self
 
-        def when_search_experiences(self, logged_person_id, word, latitude, longitude, limit, offset):
+        def when_search_experiences(self, logged_person_id, word, latitude, longitude, limit, offset, cursor=None,
+                                    lite=None):
             self.body, self.status = SearchExperiencesView(search_experiences_interactor=self.interactor_mock,
                                                            search_experiences_base_url=self.experiences_base_url) \
-                    .get(logged_person_id=logged_person_id, word=word,
-                         latitude=latitude, longitude=longitude, limit=limit, offset=offset)
+                    .get(logged_person_id=logged_person_id, word=word, latitude=latitude, longitude=longitude,
+                         limit=limit, offset=offset, cursor=cursor, lite=lite)
             return self
 
-        def then_should_call_interactor_set_params(self, logged_person_id, word, location, limit, offset):
+        def then_should_call_interactor_set_params(self, logged_person_id, word, location, limit, offset,
+                                                   cursor=None, lite=False):
             self.interactor_mock.set_params.assert_called_once_with(logged_person_id=logged_person_id, word=word,
                                                                     location=location, limit=int(limit),
-                                                                    offset=int(offset))
+                                                                    offset=int(offset) if offset is not None else None,
+                                                                    cursor=cursor, lite=lite)
+            return self
+
+        def then_response_body_should_be_lite_experiences_and_next_url_with_lite(self, word):
+            assert self.body == {
+                'results': [
+                    {'id': '1', 'title': 'A', 'saves_count': 4, 'author_profile': {'username': 'a'},
+                     'picture': {'small_url': 'small.a', 'medium_url': 'medium.a', 'large_url': 'large.a'}},
+                    {'id': '2', 'title': 'B', 'saves_count': 9, 'author_profile': {'username': 'a'},
+                     'picture': {'small_url': 'small.b', 'medium_url': 'medium.b', 'large_url': 'large.b'}}
+                ],
+                'next_url': '{}?offset={}&limit={}&word={}&lite=true'.format(self.experiences_base_url,
+                                                                             self.next_offset, self.next_limit, word)
+            }
             return self
 
         def then_status_code_should_be_200(self):
@@ -454,7 +604,10 @@ class TestSearchExperiencesView:
             return self
 
         def then_response_body_should_be_experiences_and_next_url_serialized(self, word, latitude, longitude):
-            next_url = '{}?offset={}&limit={}'.format(self.experiences_base_url, self.next_offset, self.next_limit)
+            if self.next_cursor is not None:
+                next_url = '{}?cursor={}&limit={}'.format(self.experiences_base_url, self.next_cursor, self.next_limit)
+            else:
+                next_url = '{}?offset={}&limit={}'.format(self.experiences_base_url, self.next_offset, self.next_limit)
             if word is not None:
                 next_url = '{}&word={}'.format(next_url, word)
             if latitude is not None:
@@ -469,6 +622,42 @@ class TestSearchExperiencesView:
             return self
 
 
+class TestSuggestView:
+
+    def test_returns_suggestions_serialized_and_200(self):
+        TestSuggestView.ScenarioMaker() \
+                .given_an_interactor_that_returns({'experiences': [{'id': 4, 'title': 'Bike routes'}],
+                                                   'usernames': ['biker']}) \
+                .when_get_is_called(logged_person_id='9', word='bik', limit='3') \
+                .then_should_call_interactor_with(logged_person_id='9', word='bik', limit=3) \
+                .then_response_should_be({'experiences': [{'id': '4', 'title': 'Bike routes'}],
+                                          'usernames': ['biker']}, 200)
+
+    class ScenarioMaker:
+
+        def given_an_interactor_that_returns(self, suggestions):
+            self.interactor = Mock()
+            self.interactor.set_params.return_value = self.interactor
+            self.interactor.execute.return_value = suggestions
+            return self
+
+        def when_get_is_called(self, logged_person_id, word, limit):
+            self.body, self.status = SuggestView(suggest_interactor=self.interactor) \
+                    .get(logged_person_id=logged_person_id, word=word, limit=limit)
+            return self
+
+        def then_should_call_interactor_with(self, logged_person_id, word, limit):
+            self.interactor.set_params.assert_called_once_with(logged_person_id=logged_person_id, word=word,
+                                                               limit=limit)
+            self.interactor.execute.assert_called_once_with()
+            return self
+
+        def then_response_should_be(self, body, status):
+            assert self.body == body
+            assert self.status == status
+            return self
+
+
 class TestExperienceShareUrlView:
 
     def test_returns_url_with_share_id(self):
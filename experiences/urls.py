@@ -4,7 +4,7 @@ from pachatary.views import ViewWrapper
 from .factories import create_experiences_view, create_experience_view, \
         create_upload_experience_picture_view, create_save_experience_view, create_search_experiences_view, \
         create_experience_share_url_view, create_translate_experience_share_id_view, \
-        create_flag_experience_view
+        create_flag_experience_view, create_suggest_view
 
 urlpatterns = [
     url(r'^$',
@@ -15,6 +15,10 @@ urlpatterns = [
         ViewWrapper.as_view(view_creator_func=create_search_experiences_view),
         name='search-experiences'),
 
+    url(r'^suggest$',
+        ViewWrapper.as_view(view_creator_func=create_suggest_view),
+        name='suggest'),
+
     url(r'^(?P<experience_id>[0-9]+)$',
         ViewWrapper.as_view(view_creator_func=create_experience_view),
         name='experience'),
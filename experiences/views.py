@@ -1,5 +1,6 @@
 from pachatary.decorators import serialize_exceptions
-from .serializers import serialize_experiences_response, serialize_experience, serialize_experiences_search_response
+from .serializers import serialize_experiences_response, serialize_experience, \
+        serialize_experiences_search_response, serialize_experiences_area_response, serialize_suggestions
 from .interactors import SaveUnsaveExperienceInteractor
 
 
@@ -12,20 +13,22 @@ class ExperiencesView:
         self.create_new_experience_interactor = create_new_experience_interactor
 
     @serialize_exceptions
-    def get(self, username=None, saved=None, logged_person_id=None, limit='20', offset='0'):
+    def get(self, username=None, saved=None, logged_person_id=None, limit='20', offset=None, cursor=None):
         boolean_saved = (saved == 'true')
         limit = int(limit)
-        offset = int(offset)
+        offset = int(offset) if offset is not None else None
 
         experiences_result = self.get_experiences_interactor.set_params(username=username, saved=boolean_saved,
                                                                         logged_person_id=logged_person_id,
-                                                                        limit=limit, offset=offset).execute()
+                                                                        limit=limit, offset=offset,
+                                                                        cursor=cursor).execute()
 
         body = serialize_experiences_response(experiences=experiences_result['results'],
                                               base_url=self.get_experiences_base_url,
                                               username=username, saved=saved,
                                               next_limit=experiences_result['next_limit'],
-                                              next_offset=experiences_result['next_offset'])
+                                              next_offset=experiences_result['next_offset'],
+                                              next_cursor=experiences_result['next_cursor'])
 
         status = 200
         return body, status
@@ -104,25 +107,62 @@ class SaveExperienceView:
 
 class SearchExperiencesView:
 
-    def __init__(self, search_experiences_interactor=None, search_experiences_base_url=None):
+    def __init__(self, search_experiences_interactor=None, search_experiences_base_url=None,
+                 search_experiences_in_area_interactor=None):
         self.search_experiences_interactor = search_experiences_interactor
         self.search_experiences_base_url = search_experiences_base_url
+        self.search_experiences_in_area_interactor = search_experiences_in_area_interactor
 
     @serialize_exceptions
-    def get(self, word=None, latitude=None, longitude=None, logged_person_id=None, limit='20', offset='0'):
+    def get(self, word=None, latitude=None, longitude=None, logged_person_id=None,
+            limit='20', offset=None, cursor=None, north=None, west=None, south=None, east=None,
+            radius=None, clusters=None, lite=None):
         limit = int(limit)
-        offset = int(offset)
+        offset = int(offset) if offset is not None else None
         word = None if word == '' else word
         location = (float(latitude), float(longitude)) if latitude is not None and longitude is not None else None
+
+        if any(param is not None for param in (north, west, south, east, radius)):
+            bounding_box = None
+            if all(param is not None for param in (north, west, south, east)):
+                bounding_box = (float(north), float(west), float(south), float(east))
+            area_result = self.search_experiences_in_area_interactor.set_params(
+                    word=word, bounding_box=bounding_box, location=location,
+                    radius=float(radius) if radius is not None else None,
+                    clusters_precision=int(clusters) if clusters is not None else None,
+                    logged_person_id=logged_person_id, limit=limit).execute()
+            body = serialize_experiences_area_response(experiences=area_result['results'],
+                                                       clusters=area_result['clusters'])
+            status = 200
+            return body, status
+
+        boolean_lite = (lite == 'true')
         experiences_result = self.search_experiences_interactor.set_params(word=word, location=location,
                                                                            logged_person_id=logged_person_id,
-                                                                           limit=limit, offset=offset).execute()
+                                                                           limit=limit, offset=offset,
+                                                                           cursor=cursor, lite=boolean_lite).execute()
         body = serialize_experiences_search_response(experiences=experiences_result['results'],
                                                      base_url=self.search_experiences_base_url,
                                                      word=word, latitude=latitude, longitude=longitude,
                                                      next_limit=experiences_result['next_limit'],
-                                                     next_offset=experiences_result['next_offset'])
+                                                     next_offset=experiences_result['next_offset'],
+                                                     next_cursor=experiences_result['next_cursor'],
+                                                     lite=boolean_lite)
+
+        status = 200
+        return body, status
 
+
+class SuggestView:
+
+    def __init__(self, suggest_interactor):
+        self.suggest_interactor = suggest_interactor
+
+    @serialize_exceptions
+    def get(self, word=None, logged_person_id=None, limit='5'):
+        suggestions = self.suggest_interactor.set_params(word=word, logged_person_id=logged_person_id,
+                                                         limit=int(limit)).execute()
+        body = serialize_suggestions(suggestions)
         status = 200
         return body, status
 
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+
+    def __init__(self, max_size, ttl, shared_cache=None, key_prefix='', local_ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.local_ttl = min(ttl, local_ttl) if local_ttl is not None else ttl
+        self.shared_cache = shared_cache
+        self.key_prefix = key_prefix
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.shared_cache is not None:
+            value = self.shared_cache.get(self._shared_key(key))
+            if value is not None:
+                self._set_local(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._set_local(key, value)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self._shared_key(key), value, timeout=self.ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self._shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+    def _set_local(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.local_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _shared_key(self, key):
+        return '{}{}'.format(self.key_prefix, key)
@@ -0,0 +1,33 @@
+import functools
+import os
+import threading
+
+
+class Container:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances = {}
+        self._pid = None
+
+    def stateless(self, factory):
+        key = '{}.{}'.format(factory.__module__, factory.__qualname__)
+
+        @functools.wraps(factory)
+        def get_instance():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._instances = {}
+                    self._pid = os.getpid()
+                if key not in self._instances:
+                    self._instances[key] = factory()
+                return self._instances[key]
+
+        return get_instance
+
+    def reset(self):
+        with self._lock:
+            self._instances = {}
+
+
+container = Container()
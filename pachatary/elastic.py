@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+
+from elasticsearch import Elasticsearch, Urllib3HttpConnection
+import certifi
+
+from django.conf import settings
+
+from .timings import add_stage_time
+
+
+class InstrumentedConnection(Urllib3HttpConnection):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests_count = 0
+        self.failures_count = 0
+        self.requests_time = 0.0
+
+    def perform_request(self, *args, **kwargs):
+        start_time = time.time()
+        try:
+            return super().perform_request(*args, **kwargs)
+        except Exception:
+            self.failures_count += 1
+            raise
+        finally:
+            request_time = time.time() - start_time
+            self.requests_count += 1
+            self.requests_time += request_time
+            add_stage_time('es', request_time)
+
+    def get_metrics(self):
+        return {
+                   'host': self.host,
+                   'checkouts': self.pool.num_requests,
+                   'opened_connections': self.pool.num_connections,
+                   'requests': self.requests_count,
+                   'failures': self.failures_count,
+                   'requests_time_ms': int(round(self.requests_time * 1000)),
+               }
+
+
+def create_elastic_client(url, **options):
+    kwargs = {
+        'connection_class': InstrumentedConnection,
+        'maxsize': settings.ELASTICSEARCH_MAXSIZE,
+        'timeout': settings.ELASTICSEARCH_TIMEOUT,
+        'max_retries': options.get('max_retries', settings.ELASTICSEARCH_MAX_RETRIES),
+        'retry_on_timeout': options.get('retry_on_timeout', settings.ELASTICSEARCH_RETRY_ON_TIMEOUT),
+        'sniff_on_start': settings.ELASTICSEARCH_SNIFF_ON_START,
+        'sniff_on_connection_fail': settings.ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL,
+        'sniffer_timeout': settings.ELASTICSEARCH_SNIFFER_TIMEOUT,
+    }
+    if not settings.LOCAL_DEPLOY:
+        kwargs.update({'use_ssl': True, 'ca_certs': certifi.where()})
+    return Elasticsearch([url], **kwargs)
+
+
+class ElasticClientRegistry:
+
+    def __init__(self, client_factory):
+        self.client_factory = client_factory
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._pid = None
+
+    def get_client(self, url, **options):
+        key = (url, tuple(sorted(options.items())))
+        with self._lock:
+            # Sockets must not be shared between forked workers,
+            # so clients created by a parent process are discarded.
+            if self._pid != os.getpid():
+                self._clients = {}
+                self._pid = os.getpid()
+            if key not in self._clients:
+                self._clients[key] = self.client_factory(url, **options)
+            return self._clients[key]
+
+    def get_metrics(self):
+        with self._lock:
+            clients = list(self._clients.values()) if self._pid == os.getpid() else []
+        return [connection.get_metrics()
+                for client in clients
+                for connection in client.transport.connection_pool.connections
+                if isinstance(connection, InstrumentedConnection)]
+
+
+elastic_client_registry = ElasticClientRegistry(client_factory=create_elastic_client)
+
+
+def get_elastic_client():
+    return elastic_client_registry.get_client(settings.ELASTICSEARCH_URL)
+
+
+def get_no_retries_elastic_client():
+    return elastic_client_registry.get_client(settings.ELASTICSEARCH_URL, max_retries=0, retry_on_timeout=False)
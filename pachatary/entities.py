@@ -1,10 +1,16 @@
 class Picture:
 
-    def __init__(self, large_url=None, medium_url=None, small_url=None, tiny_url=None):
+    def __init__(self, large_url=None, medium_url=None, small_url=None, tiny_url=None, is_processing=False,
+                 large_webp_url=None, medium_webp_url=None, small_webp_url=None, tiny_webp_url=None):
         self._large_url = large_url
         self._medium_url = medium_url
         self._small_url = small_url
         self._tiny_url = tiny_url
+        self._is_processing = is_processing
+        self._large_webp_url = large_webp_url
+        self._medium_webp_url = medium_webp_url
+        self._small_webp_url = small_webp_url
+        self._tiny_webp_url = tiny_webp_url
 
     @property
     def large_url(self):
@@ -21,3 +27,32 @@ class Picture:
     @property
     def tiny_url(self):
         return self._tiny_url
+
+    @property
+    def is_processing(self):
+        return self._is_processing
+
+    @property
+    def large_webp_url(self):
+        return self._large_webp_url
+
+    @property
+    def medium_webp_url(self):
+        return self._medium_webp_url
+
+    @property
+    def small_webp_url(self):
+        return self._small_webp_url
+
+    @property
+    def tiny_webp_url(self):
+        return self._tiny_webp_url
+
+    def __eq__(self, other):
+        return self.__dict__ == other.__dict__
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.__dict__.items())))
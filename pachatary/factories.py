@@ -0,0 +1,36 @@
+from django.conf import settings
+
+from .container import container
+from .interactors import ProcessPictureVariationJobsInteractor
+from .logs import create_queue_logger
+from .pictures import PictureVariationsRenderer
+from .repositories import PictureVariationJobRepo, StoredPictureRepo
+from .validators import PictureValidator
+
+
+@container.stateless
+def create_picture_variation_job_repo():
+    return PictureVariationJobRepo(max_attempts=settings.PICTURE_VARIATION_JOB_MAX_ATTEMPTS)
+
+
+@container.stateless
+def create_stored_picture_repo():
+    return StoredPictureRepo()
+
+
+@container.stateless
+def create_request_logger():
+    return create_queue_logger('pachatary.requests')
+
+
+@container.stateless
+def create_picture_validator():
+    return PictureValidator(max_size=settings.PICTURE_MAX_SIZE, max_pixels=settings.PICTURE_MAX_PIXELS)
+
+
+def create_process_picture_variation_jobs_interactor(concurrency=None):
+    if concurrency is None:
+        concurrency = settings.PICTURE_VARIATIONS_CONCURRENCY
+    return ProcessPictureVariationJobsInteractor(create_picture_variation_job_repo(),
+                                                 PictureVariationsRenderer(concurrency=concurrency,
+                                                                           webp_quality=settings.PICTURE_WEBP_QUALITY))
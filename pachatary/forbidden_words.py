@@ -0,0 +1,68 @@
+import json
+import os
+import re
+import threading
+import time
+
+
+class ForbiddenWords:
+
+    EXACT = 'exact'
+    PREFIX = 'prefix'
+    SUBSTRING = 'substring'
+
+    CHECK_INTERVAL_SECONDS = 5
+
+    def __init__(self, paths, match=EXACT, check_interval=CHECK_INTERVAL_SECONDS):
+        self.paths = paths
+        self.match = match
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._state = self._load()
+        self._checked_at = time.monotonic()
+
+    def __contains__(self, word):
+        self._reload_if_modified()
+        words, pattern, _ = self._state
+        word = self._normalize(word)
+        if word in words:
+            return True
+        if pattern is None:
+            return False
+        if self.match == ForbiddenWords.PREFIX:
+            return pattern.match(word) is not None
+        return pattern.search(word) is not None
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def _normalize(self, word):
+        return word.strip().lower()
+
+    def _get_mtimes(self):
+        return tuple(os.stat(path).st_mtime for path in self.paths)
+
+    def _load(self):
+        mtimes = self._get_mtimes()
+        words = set()
+        for path in self.paths:
+            with open(path) as words_file:
+                words.update(self._normalize(word) for word in json.load(words_file))
+        words = frozenset(words)
+        return words, self._compile(words), mtimes
+
+    def _compile(self, words):
+        if self.match == ForbiddenWords.EXACT or len(words) == 0:
+            return None
+        return re.compile('|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)))
+
+    def _reload_if_modified(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            if self._get_mtimes() != self._state[2]:
+                self._state = self._load()
@@ -0,0 +1,29 @@
+class ProcessPictureVariationJobsInteractor:
+
+    def __init__(self, picture_variation_job_repo, picture_variations_renderer):
+        self.picture_variation_job_repo = picture_variation_job_repo
+        self.picture_variations_renderer = picture_variations_renderer
+
+    def set_params(self, batch_size=10):
+        self.batch_size = batch_size
+        return self
+
+    def execute(self):
+        stats = {'jobs': 0, 'rendered': 0, 'skipped': 0, 'failed': 0}
+        for job in self.picture_variation_job_repo.get_pending_jobs(limit=self.batch_size):
+            stats['jobs'] += 1
+            if not job['is_current']:
+                self.picture_variation_job_repo.skip_job(job)
+                stats['skipped'] += 1
+                continue
+
+            try:
+                self.picture_variations_renderer.render(job['storage'], job['file_name'], job['variations'])
+            except Exception:
+                self.picture_variation_job_repo.fail_job(job)
+                stats['failed'] += 1
+                continue
+
+            self.picture_variation_job_repo.finish_job(job)
+            stats['rendered'] += 1
+        return stats
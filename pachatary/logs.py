@@ -0,0 +1,32 @@
+import atexit
+import json
+import logging
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+
+
+class JSONFormatter(logging.Formatter):
+
+    def format(self, record):
+        log = {'time': self.formatTime(record), 'level': record.levelname, 'logger': record.name}
+        if isinstance(record.msg, dict):
+            log.update(record.msg)
+        else:
+            log['message'] = record.getMessage()
+        return json.dumps(log)
+
+
+def create_queue_logger(name, stream=None):
+    log_queue = Queue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(JSONFormatter())
+    listener = QueueListener(log_queue, logging.StreamHandler(stream or sys.stdout))
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(name)
+    logger.handlers = [queue_handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+import tracemalloc
+from io import BytesIO
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+
+from pachatary.validators import PictureValidator
+
+
+class Command(BaseCommand):
+    help = 'Measure peak python memory of validating and storing an uploaded picture'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=6000)
+        parser.add_argument('--height', type=int, default=4000)
+
+    def handle(self, *args, **options):
+        location = tempfile.mkdtemp()
+        try:
+            picture_path = os.path.join(location, 'upload.jpg')
+            Image.effect_noise((options['width'], options['height']), 64).convert('RGB') \
+                 .save(picture_path, format='JPEG', quality=95)
+            picture_size = os.path.getsize(picture_path)
+            validator = PictureValidator(max_size=max(settings.PICTURE_MAX_SIZE, picture_size),
+                                         max_pixels=max(settings.PICTURE_MAX_PIXELS,
+                                                        options['width'] * options['height']))
+            storage = FileSystemStorage(location=os.path.join(location, 'storage'))
+
+            def read_in_memory(picture):
+                BytesIO(picture.read())
+
+            def validate_header(picture):
+                validator.validate_picture(picture)
+
+            def save_streamed(picture):
+                storage.save('experiences/upload.jpg', picture)
+
+            self.stdout.write('picture: {}x{}, {} bytes'.format(options['width'], options['height'], picture_size))
+            self.stdout.write('{:<24}{:>16}'.format('stage', 'peak (KB)'))
+            for name, stage in [('read in memory', read_in_memory), ('validate header', validate_header),
+                                ('save streamed', save_streamed)]:
+                with open(picture_path, 'rb') as picture_file:
+                    picture = File(picture_file, name='upload.jpg')
+                    tracemalloc.start()
+                    stage(picture)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                self.stdout.write('{:<24}{:>16.1f}'.format(name, peak / 1024))
+        finally:
+            shutil.rmtree(location)
@@ -0,0 +1,41 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from pachatary.container import container
+from experiences.factories import create_experiences_view, create_experience_view, create_search_experiences_view, \
+        create_save_experience_view
+from scenes.factories import create_scenes_view, create_scene_view
+from people.factories import create_person_view, create_block_view
+from profiles.factories import create_profile_view
+
+
+class Command(BaseCommand):
+    help = 'Measure per request view construction cost with a cold and a warm dependency container'
+
+    VIEW_CREATORS = [create_experiences_view, create_experience_view, create_search_experiences_view,
+                     create_save_experience_view, create_scenes_view, create_scene_view,
+                     create_person_view, create_block_view, create_profile_view]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/', HTTP_HOST='localhost')
+        iterations = options['iterations']
+
+        self.stdout.write('{:<40}{:>12}{:>12}'.format('view', 'cold (us)', 'warm (us)'))
+        for view_creator in Command.VIEW_CREATORS:
+            def create_view_cold():
+                container.reset()
+                view_creator(request)
+
+            def create_view_warm():
+                view_creator(request)
+
+            cold = timeit.timeit(create_view_cold, number=iterations) / iterations * 1000000
+            container.reset()
+            view_creator(request)
+            warm = timeit.timeit(create_view_warm, number=iterations) / iterations * 1000000
+            self.stdout.write('{:<40}{:>12.1f}{:>12.1f}'.format(view_creator.__name__, cold, warm))
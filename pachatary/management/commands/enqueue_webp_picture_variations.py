@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from pachatary.factories import create_picture_variation_job_repo
+
+
+class Command(BaseCommand):
+    help = 'Queue variation jobs for pictures uploaded before webp variations were rendered'
+
+    MODELS = ['experiences.ORMExperience', 'scenes.ORMScene', 'profiles.ORMProfile']
+
+    def handle(self, *args, **options):
+        picture_variation_job_repo = create_picture_variation_job_repo()
+        for model in Command.MODELS:
+            jobs_count = picture_variation_job_repo.add_jobs_for_pictures_without_webp(model)
+            self.stdout.write('{}: {} jobs queued'.format(model, jobs_count))
+        self.stdout.write(self.style.SUCCESS('Run process_picture_variation_jobs to render them'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pachatary.factories import create_process_picture_variation_jobs_interactor
+
+
+class Command(BaseCommand):
+    help = 'Render the variations of uploaded pictures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs processed per iteration')
+        parser.add_argument('--concurrency', type=int, help='Variations rendered in parallel for each picture')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when there are no jobs')
+        parser.add_argument('--once', action='store_true', help='Process pending jobs and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = create_process_picture_variation_jobs_interactor(concurrency=options['concurrency']) \
+                    .set_params(batch_size=options['batch_size']).execute()
+            if stats['jobs'] > 0:
+                self.stdout.write('{} jobs | rendered {} skipped {} failed {}'.format(
+                    stats['jobs'], stats['rendered'], stats['skipped'], stats['failed']))
+
+            if stats['jobs'] < options['batch_size'] or stats['failed'] > 0:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -1,21 +1,32 @@
-import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .factories import create_request_logger
+from .queries import QueryInspector, QueryIssuesError
+from .timings import start_request_timings, stop_request_timings, measure_db_query
 
 
 class LoggingMiddleware:
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.logger = create_request_logger()
 
     def __call__(self, request):
-        request.start_time = time.time()
-
-        response = self.get_response(request)
+        timings = start_request_timings()
+        try:
+            with connection.execute_wrapper(measure_db_query):
+                response = self.get_response(request)
+        finally:
+            stop_request_timings()
 
-        self.print_log(request, response)
+        response['Server-Timing'] = timings.to_server_timing()
+        self.log(request, response, timings)
 
         return response
 
-    def print_log(self, request, response):
+    def log(self, request, response, timings):
         ip = request.META['REMOTE_ADDR']
         if 'HTTP_X_REAL_IP' in request.META:
             ip = request.META['HTTP_X_REAL_IP']
@@ -23,13 +34,41 @@ class LoggingMiddleware:
             person = "{:06}".format(int(request.logged_person_id))
         except (AttributeError, TypeError):
             person = 'anonym'
-        status = response.status_code
-        total_time = int(round((time.time() - request.start_time) * 1000))
-        client = request.META.get('HTTP_USER_AGENT')
-        path = "{} {}".format(request.method, request.get_full_path())
 
-        log = 'ip={}\tperson={}\tclient={}\tstatus={}\tpath="{}"\ttime={}ms' \
-              .format(ip, person, client, status, path, total_time)
+        log = {'ip': ip,
+               'person': person,
+               'client': request.META.get('HTTP_USER_AGENT'),
+               'status': response.status_code,
+               'method': request.method,
+               'path': request.get_full_path()}
+        log.update(timings.to_dict())
 
         if not request.META['SERVER_NAME'] == 'testserver':
-            print(log)
+            self.logger.info(log)
+
+
+class QueryInspectorMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSPECTOR_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.logger = create_request_logger()
+
+    def __call__(self, request):
+        inspector = QueryInspector(duplicates_threshold=settings.QUERY_INSPECTOR_DUPLICATES_THRESHOLD,
+                                   n_plus_one_threshold=settings.QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD)
+        with connection.execute_wrapper(inspector):
+            response = self.get_response(request)
+
+        issues = inspector.get_issues()
+        if issues:
+            if not request.META['SERVER_NAME'] == 'testserver':
+                self.logger.warning({'method': request.method,
+                                     'path': request.get_full_path(),
+                                     'db_queries': len(inspector.queries),
+                                     'query_issues': issues})
+            if settings.QUERY_INSPECTOR_FAIL:
+                raise QueryIssuesError(issues)
+
+        return response
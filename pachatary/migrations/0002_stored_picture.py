@@ -0,0 +1,31 @@
+# Generated by Django 2.2.10 on 2026-10-18 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pachatary', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ORMStoredPicture',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('variations', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('references', models.PositiveIntegerField(default=1)),
+                ('is_rendered', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stored picture',
+                'verbose_name_plural': 'Stored pictures',
+                'unique_together': {('variations', 'content_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class ORMPictureVariationJob(models.Model):
+    model = models.CharField(max_length=100)
+    object_id = models.IntegerField()
+    file_name = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Picture variation job'
+        verbose_name_plural = 'Picture variation jobs'
+
+    def __str__(self):
+        return "{} {} - {}".format(self.model, self.object_id, self.file_name)
+
+
+class ORMStoredPicture(models.Model):
+    model = models.CharField(max_length=100)
+    variations = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    name = models.CharField(max_length=255, db_index=True)
+    references = models.PositiveIntegerField(default=1)
+    is_rendered = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Stored picture'
+        verbose_name_plural = 'Stored pictures'
+        unique_together = (('variations', 'content_hash'),)
+
+    def __str__(self):
+        return "{} - {} ({})".format(self.model, self.name, self.references)
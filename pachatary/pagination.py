@@ -0,0 +1,17 @@
+from django.core import signing
+
+from pachatary.exceptions import InvalidEntityException
+
+
+CURSOR_SALT = 'pachatary.pagination.cursor'
+
+
+def encode_cursor(values):
+    return signing.dumps(values, salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    try:
+        return signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidEntityException(source='cursor', code='wrong', message='Invalid cursor')
@@ -0,0 +1,112 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import quote
+
+from PIL import Image, ImageOps
+from stdimage.models import StdImageFieldFile
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from pachatary.entities import Picture
+
+
+WEBP_EXTENSION = '.webp'
+
+
+def get_picture_variation_name(name, variation, extension=None):
+    path, original_extension = os.path.splitext(name)
+    return '{}.{}{}'.format(path, variation, extension or original_extension)
+
+
+def get_picture_variations_names(name, variations):
+    return [get_picture_variation_name(name, variation, extension)
+            for variation in variations for extension in (None, WEBP_EXTENSION)]
+
+
+def get_picture_variations_signature(variations):
+    return ','.join('{}:{}x{}{}'.format(name, variation['width'], variation['height'],
+                                        ':crop' if variation['crop'] else '')
+                    for name, variation in sorted(variations.items()))
+
+
+def get_models_sharing_pictures(model):
+    variations = get_picture_variations_signature(model._meta.get_field('picture').variations)
+    return [picture_model for picture_model in apps.get_models()
+            if any(field.name == 'picture' and hasattr(field, 'variations') and
+                   get_picture_variations_signature(field.variations) == variations
+                   for field in picture_model._meta.get_fields())]
+
+
+def hash_picture(picture):
+    content_hash = hashlib.sha256()
+    for chunk in picture.chunks():
+        content_hash.update(chunk)
+    picture.seek(0)
+    return content_hash.hexdigest()
+
+
+def build_file_url(name, base_url=None):
+    if base_url is None:
+        base_url = settings.PICTURES_BASE_URL
+    return '{}{}'.format(base_url, quote(name, safe="/~!*()'"))
+
+
+def build_picture_url(name, variation, base_url=None, extension=None):
+    return build_file_url(get_picture_variation_name(name, variation, extension), base_url)
+
+
+def build_picture(name, variations, base_url=None, is_processing=False, has_webp=False):
+    if not name:
+        return None
+    if is_processing:
+        original_url = build_file_url(name, base_url)
+        return Picture(is_processing=True, **{'{}_url'.format(variation): original_url for variation in variations})
+    urls = {'{}_url'.format(variation): build_picture_url(name, variation, base_url) for variation in variations}
+    if has_webp:
+        urls.update({'{}_webp_url'.format(variation): build_picture_url(name, variation, base_url, WEBP_EXTENSION)
+                     for variation in variations})
+    return Picture(**urls)
+
+
+class PictureVariationsRenderer:
+
+    def __init__(self, concurrency=3, webp_quality=80):
+        self.concurrency = concurrency
+        self.webp_quality = webp_quality
+
+    def render(self, storage, file_name, variations):
+        with storage.open(file_name) as picture_file:
+            data = picture_file.read()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(lambda variation: self._render_variation(storage, file_name, data, variation),
+                                     variations.values()))
+
+    def _render_variation(self, storage, file_name, data, variation):
+        with Image.open(BytesIO(data)) as image:
+            image.draft(image.mode, (variation['width'], variation['height']))
+            picture_format = image.format
+            image = ImageOps.exif_transpose(image)
+            image.format = picture_format
+            image, save_kwargs = StdImageFieldFile.process_variation(variation, image=image)
+            image.info = {key: value for key, value in image.info.items() if key == 'transparency'}
+
+            variation_name = get_picture_variation_name(file_name, variation['name'])
+            self._save(storage, variation_name, image, save_kwargs)
+
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if image.mode in ('LA', 'PA') or 'transparency' in image.info else 'RGB')
+            webp_variation_name = get_picture_variation_name(file_name, variation['name'], WEBP_EXTENSION)
+            self._save(storage, webp_variation_name, image, {'format': 'WEBP', 'quality': self.webp_quality,
+                                                             'method': 6})
+        return variation_name, webp_variation_name
+
+    def _save(self, storage, name, image, save_kwargs):
+        with BytesIO() as variation_buffer:
+            image.save(variation_buffer, **save_kwargs)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(variation_buffer.getvalue()))
@@ -0,0 +1,68 @@
+import re
+import sys
+from collections import Counter, defaultdict
+
+
+class QueryIssuesError(Exception):
+
+    def __init__(self, issues):
+        super().__init__('; '.join('{} x{} "{}" from {}'.format(
+            issue['type'], issue['count'], issue['fingerprint'], ', '.join(issue['callers'])) for issue in issues))
+        self.issues = issues
+
+
+def fingerprint_query(sql):
+    fingerprint = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    fingerprint = re.sub(r'\b\d+(?:\.\d+)?\b', '?', fingerprint)
+    fingerprint = fingerprint.replace('%s', '?')
+    fingerprint = re.sub(r'\(\s*\?(?:\s*,\s*\?)*\s*\)', '(...)', fingerprint)
+    return re.sub(r'\s+', ' ', fingerprint).strip()
+
+
+def find_query_caller(frame, caller_modules_suffix='.repositories'):
+    caller = 'unknown'
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.endswith(caller_modules_suffix):
+            instance = frame.f_locals.get('self')
+            if instance is not None:
+                return '{}.{}.{}'.format(module, type(instance).__name__, frame.f_code.co_name)
+            if caller == 'unknown':
+                caller = '{}.{}'.format(module, frame.f_code.co_name)
+        frame = frame.f_back
+    return caller
+
+
+class QueryInspector:
+
+    def __init__(self, duplicates_threshold=2, n_plus_one_threshold=5):
+        self.duplicates_threshold = duplicates_threshold
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.record(sql, params, find_query_caller(sys._getframe(1)))
+        return execute(sql, params, many, context)
+
+    def record(self, sql, params, caller):
+        self.queries.append({'fingerprint': fingerprint_query(sql),
+                             'statement': (sql, repr(params)),
+                             'caller': caller})
+
+    def get_issues(self):
+        queries_by_fingerprint = defaultdict(list)
+        for query in self.queries:
+            queries_by_fingerprint[query['fingerprint']].append(query)
+
+        issues = []
+        for fingerprint, queries in queries_by_fingerprint.items():
+            callers = sorted(set(query['caller'] for query in queries))
+            statements = Counter(query['statement'] for query in queries)
+            if len(statements) >= self.n_plus_one_threshold:
+                issues.append({'type': 'n_plus_one', 'fingerprint': fingerprint,
+                               'count': len(statements), 'callers': callers})
+            repetitions = max(statements.values())
+            if repetitions >= self.duplicates_threshold:
+                issues.append({'type': 'duplicate', 'fingerprint': fingerprint,
+                               'count': repetitions, 'callers': callers})
+        return issues
@@ -0,0 +1,143 @@
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from experiences.models import ORMExperienceIndexEvent
+from .models import ORMPictureVariationJob, ORMStoredPicture
+from .pictures import hash_picture, get_picture_variations_names, get_picture_variations_signature, \
+        get_models_sharing_pictures
+
+
+class PictureVariationJobRepo:
+
+    INDEXED_EXPERIENCE_ID_FIELDS = {'experiences.ORMExperience': 'id', 'scenes.ORMScene': 'experience_id'}
+
+    def __init__(self, max_attempts=5):
+        self.max_attempts = max_attempts
+
+    def add_job(self, model, object_id, file_name):
+        with transaction.atomic():
+            apps.get_model(model).objects.filter(id=object_id).update(picture_is_processing=True)
+            ORMPictureVariationJob.objects.create(model=model, object_id=object_id, file_name=file_name)
+
+    def add_jobs_for_pictures_without_webp(self, model):
+        pending_objects_ids = ORMPictureVariationJob.objects.filter(model=model).values_list('object_id', flat=True)
+        pictures = apps.get_model(model).objects.exclude(picture='').exclude(picture__isnull=True) \
+                                                .filter(picture_has_webp=False, picture_is_processing=False) \
+                                                .exclude(id__in=pending_objects_ids) \
+                                                .values_list('id', 'picture')
+        jobs = [ORMPictureVariationJob(model=model, object_id=object_id, file_name=file_name)
+                for object_id, file_name in pictures.iterator()]
+        ORMPictureVariationJob.objects.bulk_create(jobs, batch_size=1000)
+        return len(jobs)
+
+    def get_pending_jobs(self, limit=10):
+        jobs = []
+        for orm_job in ORMPictureVariationJob.objects.filter(attempts__lt=self.max_attempts).order_by('id')[0:limit]:
+            model = apps.get_model(orm_job.model)
+            picture_field = model._meta.get_field('picture')
+            jobs.append({'id': str(orm_job.id),
+                         'model': orm_job.model,
+                         'object_id': str(orm_job.object_id),
+                         'file_name': orm_job.file_name,
+                         'variations': picture_field.variations,
+                         'storage': picture_field.storage,
+                         'is_current': any(shared_model.objects.filter(picture=orm_job.file_name).exists()
+                                           for shared_model in get_models_sharing_pictures(model))})
+        return jobs
+
+    def finish_job(self, job):
+        with transaction.atomic():
+            for model in get_models_sharing_pictures(apps.get_model(job['model'])):
+                model.objects.filter(picture=job['file_name']) \
+                             .update(picture_is_processing=False, picture_has_webp=True)
+                self._add_experiences_index_events(model, job['file_name'])
+            ORMStoredPicture.objects.filter(name=job['file_name']).update(is_rendered=True)
+            ORMPictureVariationJob.objects.filter(id=job['id']).delete()
+
+    def _add_experiences_index_events(self, model, file_name):
+        experience_id_field = PictureVariationJobRepo.INDEXED_EXPERIENCE_ID_FIELDS.get(model._meta.label)
+        if experience_id_field is None:
+            return
+        experiences_ids = set(model.objects.filter(picture=file_name).values_list(experience_id_field, flat=True))
+        ORMExperienceIndexEvent.objects.bulk_create([ORMExperienceIndexEvent(experience_id=experience_id)
+                                                     for experience_id in experiences_ids])
+
+    def skip_job(self, job):
+        ORMPictureVariationJob.objects.filter(id=job['id']).delete()
+
+    def fail_job(self, job):
+        ORMPictureVariationJob.objects.filter(id=job['id']).update(attempts=F('attempts') + 1)
+
+
+class StoredPictureRepo:
+
+    @contextmanager
+    def attach_picture(self, orm_object, picture):
+        field = orm_object._meta.get_field('picture')
+        variations = get_picture_variations_signature(field.variations)
+        content_hash = hash_picture(picture)
+        previous_name = orm_object.picture.name
+
+        saved_names = []
+        if not ORMStoredPicture.objects.filter(variations=variations, content_hash=content_hash).exists():
+            saved_names.append(self._save_picture_file(orm_object, picture))
+        try:
+            with transaction.atomic():
+                stored_picture, is_new = self._reference_or_store_picture(orm_object, picture, variations,
+                                                                          content_hash, saved_names)
+                orm_object.picture = stored_picture.name
+                orm_object.picture_is_processing = not stored_picture.is_rendered
+                orm_object.picture_has_webp = stored_picture.is_rendered
+                orm_object.save()
+                if is_new:
+                    ORMPictureVariationJob.objects.create(model=orm_object._meta.label, object_id=orm_object.id,
+                                                          file_name=stored_picture.name)
+                if previous_name:
+                    self.release_picture(orm_object._meta.label, previous_name)
+                yield
+        except Exception:
+            self._delete_files(field.storage, saved_names)
+            raise
+        if not is_new:
+            self._delete_files(field.storage, saved_names)
+
+    def release_picture(self, model, name):
+        ORMStoredPicture.objects.filter(name=name).update(references=F('references') - 1)
+        deleted, _ = ORMStoredPicture.objects.filter(name=name, references__lte=0).delete()
+        if deleted:
+            transaction.on_commit(lambda: self._delete_picture_files(model, name))
+
+    def _reference_or_store_picture(self, orm_object, picture, variations, content_hash, saved_names):
+        stored_picture = self._reference_stored_picture(variations, content_hash)
+        if stored_picture is not None:
+            return stored_picture, False
+        if not saved_names:
+            saved_names.append(self._save_picture_file(orm_object, picture))
+        try:
+            with transaction.atomic():
+                return ORMStoredPicture.objects.create(model=orm_object._meta.label, variations=variations,
+                                                       content_hash=content_hash, name=saved_names[0]), True
+        except IntegrityError:
+            return self._reference_stored_picture(variations, content_hash), False
+
+    def _reference_stored_picture(self, variations, content_hash):
+        if not ORMStoredPicture.objects.filter(variations=variations, content_hash=content_hash) \
+                                       .update(references=F('references') + 1):
+            return None
+        return ORMStoredPicture.objects.get(variations=variations, content_hash=content_hash)
+
+    def _save_picture_file(self, orm_object, picture):
+        field = orm_object._meta.get_field('picture')
+        return field.storage.save(field.generate_filename(orm_object, picture.name), picture,
+                                  max_length=field.max_length)
+
+    def _delete_files(self, storage, names):
+        for name in names:
+            storage.delete(name)
+
+    def _delete_picture_files(self, model, name):
+        field = apps.get_model(model)._meta.get_field('picture')
+        self._delete_files(field.storage, [name] + get_picture_variations_names(name, field.variations))
@@ -1,3 +1,6 @@
+from .timings import measured
+
+
 def serialize_picture(picture):
     if picture is None:
         return None
@@ -11,9 +14,20 @@ def serialize_picture(picture):
         serialized.update({'small_url': picture.small_url})
     if picture.tiny_url is not None:
         serialized.update({'tiny_url': picture.tiny_url})
+    if picture.large_webp_url is not None:
+        serialized.update({'large_webp_url': picture.large_webp_url})
+    if picture.medium_webp_url is not None:
+        serialized.update({'medium_webp_url': picture.medium_webp_url})
+    if picture.small_webp_url is not None:
+        serialized.update({'small_webp_url': picture.small_webp_url})
+    if picture.tiny_webp_url is not None:
+        serialized.update({'tiny_webp_url': picture.tiny_webp_url})
+    if picture.is_processing:
+        serialized.update({'is_processing': True})
     return serialized
 
 
+@measured('serialize')
 def serialize_exception(exception):
     return {
                'error': {
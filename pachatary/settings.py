@@ -71,7 +71,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.locale.LocaleMiddleware',
 
-    'pachatary.middlewares.LoggingMiddleware'
+    'pachatary.middlewares.LoggingMiddleware',
+    'pachatary.middlewares.QueryInspectorMiddleware',
 ]
 
 ROOT_URLCONF = 'pachatary.urls'
@@ -172,6 +173,24 @@ STATICFILES_STORAGE = 'whitenoise.django.GzipManifestStaticFilesStorage'
 MEDIA_ROOT = os.path.join(PROJECT_ROOT, 'media')
 MEDIA_URL = '/media/'
 
+if LOCAL_DEPLOY:
+    PICTURES_BASE_URL = os.environ.get('PICTURES_BASE_URL', MEDIA_URL)
+else:
+    PICTURES_BASE_URL = os.environ.get('PICTURES_BASE_URL',
+                                       'https://{}.s3.amazonaws.com/'.format(AWS_STORAGE_BUCKET_NAME))
+
+PICTURE_VARIATIONS_CONCURRENCY = int(os.environ.get('PICTURE_VARIATIONS_CONCURRENCY', 3))
+PICTURE_VARIATION_JOB_MAX_ATTEMPTS = int(os.environ.get('PICTURE_VARIATION_JOB_MAX_ATTEMPTS', 5))
+PICTURE_WEBP_QUALITY = int(os.environ.get('PICTURE_WEBP_QUALITY', 80))
+PICTURE_MAX_SIZE = int(os.environ.get('PICTURE_MAX_SIZE', 15 * 1024 * 1024))
+PICTURE_MAX_PIXELS = int(os.environ.get('PICTURE_MAX_PIXELS', 40000000))
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_MEMORY_SIZE', 256 * 1024))
+
+QUERY_INSPECTOR_ENABLED = bool(int(os.environ.get('QUERY_INSPECTOR_ENABLED', 0)))
+QUERY_INSPECTOR_DUPLICATES_THRESHOLD = int(os.environ.get('QUERY_INSPECTOR_DUPLICATES_THRESHOLD', 2))
+QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD', 5))
+QUERY_INSPECTOR_FAIL = bool(int(os.environ.get('QUERY_INSPECTOR_FAIL', 0)))
+
 if LOCAL_DEPLOY:
     EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 else:
@@ -184,6 +203,36 @@ EMAIL_HOST_ORIGIN = os.environ['EMAIL_HOST_ORIGIN']
 EMAIL_PORT = int(os.environ['EMAIL_PORT'])
 
 ELASTICSEARCH_URL = os.environ['ELASTICSEARCH_URL']
+ELASTICSEARCH_MAXSIZE = int(os.environ.get('ELASTICSEARCH_MAXSIZE', 10))
+ELASTICSEARCH_TIMEOUT = float(os.environ.get('ELASTICSEARCH_TIMEOUT', 10))
+ELASTICSEARCH_MAX_RETRIES = int(os.environ.get('ELASTICSEARCH_MAX_RETRIES', 3))
+ELASTICSEARCH_RETRY_ON_TIMEOUT = bool(int(os.environ.get('ELASTICSEARCH_RETRY_ON_TIMEOUT', 1)))
+ELASTICSEARCH_SNIFF_ON_START = bool(int(os.environ.get('ELASTICSEARCH_SNIFF_ON_START', 0)))
+ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL = bool(int(os.environ.get('ELASTICSEARCH_SNIFF_ON_CONNECTION_FAIL', 0)))
+ELASTICSEARCH_SNIFFER_TIMEOUT = int(os.environ.get('ELASTICSEARCH_SNIFFER_TIMEOUT', 0)) or None
+ELASTICSEARCH_EXPERIENCE_SHARDS = int(os.environ.get('ELASTICSEARCH_EXPERIENCE_SHARDS', 3))
+ELASTICSEARCH_EXPERIENCE_REPLICAS = int(os.environ.get('ELASTICSEARCH_EXPERIENCE_REPLICAS', 1))
+
+EXPERIENCE_SEARCH_CACHE_SIZE = int(os.environ.get('EXPERIENCE_SEARCH_CACHE_SIZE', 1000))
+EXPERIENCE_SEARCH_CACHE_TTL = int(os.environ.get('EXPERIENCE_SEARCH_CACHE_TTL', 30))
+EXPERIENCE_SEARCH_GEOHASH_PRECISION = int(os.environ.get('EXPERIENCE_SEARCH_GEOHASH_PRECISION', 5))
+EXPERIENCE_SEARCH_GENERATION_CACHE = os.environ.get('EXPERIENCE_SEARCH_GENERATION_CACHE') or None
+EXPERIENCE_INDEX_EVENT_RETENTION_DAYS = int(os.environ.get('EXPERIENCE_INDEX_EVENT_RETENTION_DAYS', 7))
+EXPERIENCE_INDEX_EVENT_MAX_ATTEMPTS = int(os.environ.get('EXPERIENCE_INDEX_EVENT_MAX_ATTEMPTS', 5))
+
+SUGGEST_CACHE_SIZE = int(os.environ.get('SUGGEST_CACHE_SIZE', 5000))
+SUGGEST_CACHE_TTL = int(os.environ.get('SUGGEST_CACHE_TTL', 60))
+EXPERIENCE_SUGGEST_TIMEOUT = float(os.environ.get('EXPERIENCE_SUGGEST_TIMEOUT', 0.2))
+
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 300))
+AUTH_TOKEN_LOCAL_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_LOCAL_CACHE_TTL', 5))
+AUTH_TOKEN_SHARED_CACHE = os.environ.get('AUTH_TOKEN_SHARED_CACHE') or None
+
+BLOCK_CACHE_SIZE = int(os.environ.get('BLOCK_CACHE_SIZE', 10000))
+BLOCK_CACHE_TTL = int(os.environ.get('BLOCK_CACHE_TTL', 300))
+BLOCK_LOCAL_CACHE_TTL = int(os.environ.get('BLOCK_LOCAL_CACHE_TTL', 5))
+BLOCK_SHARED_CACHE = os.environ.get('BLOCK_SHARED_CACHE') or None
 
 ANDROID_MIN_VERSION = os.environ['ANDROID_MIN_VERSION']
 IOS_MIN_VERSION = os.environ['IOS_MIN_VERSION']
@@ -1,9 +1,18 @@
 import json
+import re
 
-from django.test import TestCase, Client
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.urls import reverse
 from django.conf import settings
 
+from pachatary.middlewares import QueryInspectorMiddleware
+from pachatary.queries import QueryIssuesError
+from people.models import ORMPerson, ORMAuthToken
+from profiles.models import ORMProfile
+from profiles.repositories import ProfileRepo
+
 
 class ClientVersionsTestCase(TestCase):
 
@@ -59,3 +68,124 @@ class AASATestCase(TestCase):
         def then_response_should_be_json(self, json_string):
             assert json.loads(self.response.content) == json.loads(json_string)
             return self
+
+
+class ServerTimingTestCase(TestCase):
+
+    def test_response_has_per_stage_server_timing_header(self):
+        ServerTimingTestCase.ScenarioMaker() \
+                .given_a_person_with_auth_token_and_profile('uuu') \
+                .when_get_profile('uuu') \
+                .then_server_timing_should_have_stages(['auth', 'view', 'interactor', 'serialize', 'db', 'es',
+                                                        'total']) \
+                .then_server_timing_should_count_db_queries()
+
+    class ScenarioMaker:
+
+        def given_a_person_with_auth_token_and_profile(self, username):
+            orm_person = ORMPerson.objects.create()
+            self.orm_auth_token = ORMAuthToken.objects.create(person_id=orm_person.id)
+            ORMProfile.objects.create(person=orm_person, username=username)
+            return self
+
+        def when_get_profile(self, username):
+            auth_headers = {'HTTP_AUTHORIZATION': 'Token {}'.format(self.orm_auth_token.access_token), }
+            self.response = Client().get(reverse('profile', args=[username]), **auth_headers)
+            return self
+
+        def then_server_timing_should_have_stages(self, stages):
+            assert self.response.status_code == 200
+            assert [metric.split(';')[0] for metric in self.response['Server-Timing'].split(', ')] == stages
+            return self
+
+        def then_server_timing_should_count_db_queries(self):
+            db_queries = re.search(r'db;dur=[0-9.]+;desc="([0-9]+) queries"', self.response['Server-Timing'])
+            assert int(db_queries.group(1)) > 0
+            return self
+
+
+class QueryInspectorMiddlewareTestCase(TestCase):
+
+    def test_is_not_used_when_disabled(self):
+        QueryInspectorMiddlewareTestCase.ScenarioMaker() \
+                .given_query_inspector_settings(enabled=False) \
+                .when_create_middleware() \
+                .then_middleware_should_not_be_used()
+
+    def test_request_without_repeated_queries_passes(self):
+        QueryInspectorMiddlewareTestCase.ScenarioMaker() \
+                .given_query_inspector_settings(enabled=True, fail=True) \
+                .given_profiles(['a', 'b']) \
+                .when_create_middleware() \
+                .when_request_gets_profiles(['a', 'b']) \
+                .then_response_should_be_ok()
+
+    def test_fails_request_with_duplicated_repository_queries(self):
+        QueryInspectorMiddlewareTestCase.ScenarioMaker() \
+                .given_query_inspector_settings(enabled=True, fail=True) \
+                .given_profiles(['a']) \
+                .when_create_middleware() \
+                .when_request_gets_profiles(['a', 'a']) \
+                .then_should_fail_with_issue('duplicate', count=2,
+                                             callers=['profiles.repositories.ProfileRepo.get_profile'])
+
+    def test_fails_request_with_n_plus_one_repository_queries(self):
+        QueryInspectorMiddlewareTestCase.ScenarioMaker() \
+                .given_query_inspector_settings(enabled=True, fail=True, n_plus_one_threshold=3) \
+                .given_profiles(['a', 'b', 'c']) \
+                .when_create_middleware() \
+                .when_request_gets_profiles(['a', 'b', 'c']) \
+                .then_should_fail_with_issue('n_plus_one', count=3,
+                                             callers=['profiles.repositories.ProfileRepo.get_profile'])
+
+    class ScenarioMaker:
+
+        def given_query_inspector_settings(self, enabled, fail=False, n_plus_one_threshold=5):
+            self.settings = override_settings(QUERY_INSPECTOR_ENABLED=enabled, QUERY_INSPECTOR_FAIL=fail,
+                                              QUERY_INSPECTOR_DUPLICATES_THRESHOLD=2,
+                                              QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD=n_plus_one_threshold)
+            return self
+
+        def given_profiles(self, usernames):
+            for username in usernames:
+                ORMProfile.objects.create(person=ORMPerson.objects.create(), username=username)
+            return self
+
+        def when_create_middleware(self):
+            self.usernames = []
+
+            def get_response(request):
+                for username in self.usernames:
+                    ProfileRepo().get_profile(logged_person_id=None, username=username)
+                return HttpResponse()
+
+            try:
+                with self.settings:
+                    self.middleware = QueryInspectorMiddleware(get_response)
+            except MiddlewareNotUsed as e:
+                self.error = e
+            return self
+
+        def when_request_gets_profiles(self, usernames):
+            self.usernames = usernames
+            self.error = None
+            try:
+                with self.settings:
+                    self.response = self.middleware(RequestFactory().get('/'))
+            except QueryIssuesError as e:
+                self.error = e
+            return self
+
+        def then_middleware_should_not_be_used(self):
+            assert type(self.error) is MiddlewareNotUsed
+            return self
+
+        def then_response_should_be_ok(self):
+            assert self.error is None
+            assert self.response.status_code == 200
+            return self
+
+        def then_should_fail_with_issue(self, issue_type, count, callers):
+            assert [(issue['type'], issue['count'], issue['callers']) for issue in self.error.issues] == \
+                [(issue_type, count, callers)]
+            return self
@@ -0,0 +1,480 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+
+from pachatary.factories import create_process_picture_variation_jobs_interactor, create_picture_variation_job_repo, \
+        create_stored_picture_repo
+from pachatary.models import ORMPictureVariationJob, ORMStoredPicture
+from pachatary.pictures import PictureVariationsRenderer
+from pachatary.views import ViewWrapper
+from experiences.models import ORMExperience, ORMExperienceIndexEvent
+from experiences.repositories import ExperienceRepo
+from people.models import ORMPerson
+from scenes.models import ORMScene
+from scenes.repositories import SceneRepo
+from profiles.models import ORMProfile
+
+
+def create_jpeg(width, height, orientation=None):
+    picture_buffer = BytesIO()
+    image = Image.new('RGB', (width, height), (200, 40, 40))
+    exif = image.getexif()
+    exif[0x010e] = 'A description'
+    if orientation is not None:
+        exif[0x0112] = orientation
+    image.save(picture_buffer, format='JPEG', exif=exif.tobytes())
+    return picture_buffer.getvalue()
+
+
+class PictureVariationsRendererTestCase(TestCase):
+
+    def test_renders_every_variation_next_to_the_original(self):
+        with PictureVariationsRendererTestCase.ScenarioMaker() as scenario:
+            scenario.given_a_stored_picture('experiences/a.jpg', width=2000, height=1000) \
+                    .when_render_experience_variations('experiences/a.jpg') \
+                    .then_picture_should_have_size('experiences/a.large.jpg', (1280, 640)) \
+                    .then_picture_should_have_size('experiences/a.medium.jpg', (640, 320)) \
+                    .then_picture_should_have_size('experiences/a.small.jpg', (320, 160)) \
+                    .then_picture_should_have_size('experiences/a.large.webp', (1280, 640)) \
+                    .then_picture_should_have_size('experiences/a.medium.webp', (640, 320)) \
+                    .then_picture_should_have_size('experiences/a.small.webp', (320, 160))
+
+    def test_strips_metadata_and_applies_orientation(self):
+        with PictureVariationsRendererTestCase.ScenarioMaker() as scenario:
+            scenario.given_a_stored_picture('experiences/a.jpg', width=2000, height=1000, orientation=6) \
+                    .when_render_experience_variations('experiences/a.jpg') \
+                    .then_picture_should_have_size('experiences/a.small.jpg', (160, 320)) \
+                    .then_picture_should_have_size('experiences/a.small.webp', (160, 320)) \
+                    .then_picture_should_have_no_metadata('experiences/a.small.jpg') \
+                    .then_picture_should_have_no_metadata('experiences/a.small.webp')
+
+    def test_rendering_again_replaces_variations(self):
+        with PictureVariationsRendererTestCase.ScenarioMaker() as scenario:
+            scenario.given_a_stored_picture('experiences/a.jpg', width=2000, height=1000) \
+                    .when_render_experience_variations('experiences/a.jpg') \
+                    .given_a_stored_picture('experiences/a.jpg', width=1000, height=2000) \
+                    .when_render_experience_variations('experiences/a.jpg') \
+                    .then_picture_should_have_size('experiences/a.small.jpg', (160, 320))
+
+    class ScenarioMaker:
+
+        def __enter__(self):
+            self.location = tempfile.mkdtemp()
+            self.storage = FileSystemStorage(location=self.location)
+            return self
+
+        def __exit__(self, *args):
+            shutil.rmtree(self.location)
+
+        def given_a_stored_picture(self, file_name, width, height, orientation=None):
+            if self.storage.exists(file_name):
+                self.storage.delete(file_name)
+            self.storage.save(file_name, SimpleUploadedFile(file_name, create_jpeg(width, height, orientation)))
+            return self
+
+        def when_render_experience_variations(self, file_name):
+            variations = ORMExperience._meta.get_field('picture').variations
+            PictureVariationsRenderer(concurrency=3).render(self.storage, file_name, variations)
+            return self
+
+        def then_picture_should_have_size(self, file_name, size):
+            with self.storage.open(file_name) as picture_file:
+                with Image.open(picture_file) as image:
+                    assert image.size == size
+            return self
+
+        def then_picture_should_have_no_metadata(self, file_name):
+            with self.storage.open(file_name) as picture_file:
+                with Image.open(picture_file) as image:
+                    assert len(image.getexif()) == 0
+                    assert 'icc_profile' not in image.info
+            return self
+
+
+class PictureVariationJobsTestCase(TestCase):
+
+    def test_uploaded_picture_is_processing_until_its_job_is_processed(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .then_experience_picture_should_be_processing(True) \
+                    .then_there_should_be_jobs(1) \
+                    .when_process_jobs() \
+                    .then_stats_should_be({'jobs': 1, 'rendered': 1, 'skipped': 0, 'failed': 0}) \
+                    .then_experience_picture_should_be_processing(False) \
+                    .then_experience_picture_variations_should_exist() \
+                    .then_experience_picture_should_have_webp_urls() \
+                    .then_there_should_be_jobs(0)
+
+    def test_finished_job_reindexes_experiences_with_that_picture(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .given_no_index_events() \
+                    .when_process_jobs() \
+                    .then_index_events_should_be_for_both_experiences()
+
+    def test_finished_scene_job_reindexes_its_experience(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .given_a_scene() \
+                    .when_upload_scene_picture() \
+                    .given_no_index_events() \
+                    .when_process_jobs() \
+                    .then_index_events_should_be_for_the_experience()
+
+    def test_experience_and_scene_with_same_picture_share_it(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .given_a_scene() \
+                    .when_upload_experience_picture() \
+                    .when_upload_scene_picture() \
+                    .then_scene_should_share_experience_picture() \
+                    .then_stored_pictures_should_be(1) \
+                    .then_stored_picture_references_should_be(2) \
+                    .then_there_should_be_jobs(1) \
+                    .when_process_jobs() \
+                    .then_experience_picture_should_be_processing(False) \
+                    .then_scene_picture_should_be_processing(False)
+
+    def test_picture_file_is_deleted_when_attaching_fails(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_attach_experience_picture_and_fail() \
+                    .then_stored_pictures_should_be(0) \
+                    .then_there_should_be_jobs(0) \
+                    .then_there_should_be_no_picture_files()
+
+    def test_job_of_a_replaced_picture_is_skipped(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .when_upload_experience_picture(content=create_jpeg(600, 800)) \
+                    .when_process_jobs() \
+                    .then_stats_should_be({'jobs': 2, 'rendered': 1, 'skipped': 1, 'failed': 0}) \
+                    .then_experience_picture_should_be_processing(False) \
+                    .then_there_should_be_jobs(0)
+
+    def test_skipped_job_does_not_mark_stored_picture_as_rendered(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .given_experience_picture_replaced_without_releasing_it() \
+                    .when_process_jobs() \
+                    .then_stats_should_be({'jobs': 1, 'rendered': 0, 'skipped': 1, 'failed': 0}) \
+                    .then_there_should_be_jobs(0) \
+                    .then_stored_pictures_should_not_be_rendered()
+
+    def test_broken_picture_job_is_retried_until_max_attempts(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture(content=b'not a picture') \
+                    .when_process_jobs(times=6) \
+                    .then_stats_should_be({'jobs': 0, 'rendered': 0, 'skipped': 0, 'failed': 0}) \
+                    .then_experience_picture_should_be_processing(True) \
+                    .then_there_should_be_jobs(1)
+
+    def test_pictures_without_webp_variations_are_queued(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .given_an_experience_picture_rendered_before_webp() \
+                    .given_an_experience() \
+                    .when_add_jobs_for_pictures_without_webp() \
+                    .then_jobs_queued_should_be(1) \
+                    .when_add_jobs_for_pictures_without_webp() \
+                    .then_jobs_queued_should_be(0) \
+                    .when_process_jobs() \
+                    .then_there_should_be_jobs(0)
+
+    def test_same_picture_uploaded_twice_is_stored_and_rendered_once(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .then_experiences_should_share_picture() \
+                    .then_stored_picture_references_should_be(2) \
+                    .then_there_should_be_jobs(1) \
+                    .when_process_jobs() \
+                    .then_experience_picture_should_be_processing(False) \
+                    .then_other_experience_picture_should_be_processing(False)
+
+    def test_already_rendered_picture_is_reused_without_processing(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .when_process_jobs() \
+                    .given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .then_experiences_should_share_picture() \
+                    .then_there_should_be_jobs(0) \
+                    .then_experience_picture_should_be_processing(False) \
+                    .then_experience_picture_should_have_webp_urls()
+
+    def test_replaced_shared_picture_is_kept_until_it_has_no_references(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .when_upload_experience_picture(content=create_jpeg(600, 800)) \
+                    .then_stored_picture_references_should_be(1, of_other_experience=True) \
+                    .when_upload_other_experience_picture(content=create_jpeg(600, 800)) \
+                    .then_stored_pictures_should_be(1) \
+                    .then_experiences_should_share_picture()
+
+    class ScenarioMaker:
+
+        def __enter__(self):
+            self.media_root = tempfile.mkdtemp()
+            self.settings = override_settings(MEDIA_ROOT=self.media_root, PICTURES_BASE_URL='/media/')
+            self.settings.enable()
+            self.repo = ExperienceRepo(stored_picture_repo=create_stored_picture_repo())
+            self.orm_experience = None
+            return self
+
+        def __exit__(self, *args):
+            self.settings.disable()
+            shutil.rmtree(self.media_root)
+
+        def given_an_experience(self):
+            self.other_orm_experience = self.orm_experience
+            person = ORMPerson.objects.create()
+            ORMProfile.objects.create(person=person, username='usr{}'.format(person.id))
+            self.orm_experience = ORMExperience.objects.create(author=person, title='t')
+            return self
+
+        def when_upload_experience_picture(self, content=None):
+            if content is None:
+                content = create_jpeg(800, 600)
+            self.experience = self.repo.attach_picture_to_experience(
+                    str(self.orm_experience.id), SimpleUploadedFile('picture.jpg', content))
+            return self
+
+        def when_upload_other_experience_picture(self, content):
+            self.repo.attach_picture_to_experience(str(self.other_orm_experience.id),
+                                                   SimpleUploadedFile('picture.jpg', content))
+            return self
+
+        def given_a_scene(self):
+            self.orm_scene = ORMScene.objects.create(title='s', experience=self.orm_experience,
+                                                     latitude=1, longitude=2)
+            return self
+
+        def when_upload_scene_picture(self):
+            SceneRepo(stored_picture_repo=create_stored_picture_repo()).attach_picture_to_scene(
+                    str(self.orm_scene.id), SimpleUploadedFile('picture.jpg', create_jpeg(800, 600)))
+            return self
+
+        def then_scene_should_share_experience_picture(self):
+            assert ORMScene.objects.get(id=self.orm_scene.id).picture.name == self.experience_file_name()
+            return self
+
+        def then_scene_picture_should_be_processing(self, is_processing):
+            orm_scene = ORMScene.objects.get(id=self.orm_scene.id)
+            assert orm_scene.picture_is_processing == is_processing
+            assert orm_scene.picture_has_webp != is_processing
+            return self
+
+        def when_attach_experience_picture_and_fail(self):
+            try:
+                with create_stored_picture_repo().attach_picture(
+                        self.orm_experience, SimpleUploadedFile('picture.jpg', create_jpeg(800, 600))):
+                    raise ValueError()
+            except ValueError:
+                pass
+            return self
+
+        def then_there_should_be_no_picture_files(self):
+            assert [files for _, _, files in os.walk(self.media_root) if files] == []
+            return self
+
+        def given_no_index_events(self):
+            ORMExperienceIndexEvent.objects.all().delete()
+            return self
+
+        def then_index_events_should_be_for_both_experiences(self):
+            assert sorted(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == \
+                    sorted([self.other_orm_experience.id, self.orm_experience.id])
+            return self
+
+        def then_index_events_should_be_for_the_experience(self):
+            assert list(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == \
+                    [self.orm_experience.id]
+            return self
+
+        def then_experiences_should_share_picture(self):
+            assert self.experience_file_name() == \
+                ORMExperience.objects.get(id=self.other_orm_experience.id).picture.name
+            return self
+
+        def then_stored_picture_references_should_be(self, references, of_other_experience=False):
+            orm_experience = self.other_orm_experience if of_other_experience else self.orm_experience
+            file_name = ORMExperience.objects.get(id=orm_experience.id).picture.name
+            assert ORMStoredPicture.objects.get(name=file_name).references == references
+            return self
+
+        def given_experience_picture_replaced_without_releasing_it(self):
+            ORMExperience.objects.filter(id=self.orm_experience.id).update(picture='experiences/other.jpg')
+            return self
+
+        def then_stored_pictures_should_not_be_rendered(self):
+            assert not ORMStoredPicture.objects.filter(is_rendered=True).exists()
+            return self
+
+        def then_stored_pictures_should_be(self, count):
+            assert ORMStoredPicture.objects.count() == count
+            return self
+
+        def given_the_current_picture_files(self):
+            storage = ORMExperience._meta.get_field('picture').storage
+            file_name = self.experience_file_name()
+            self.picture_files = [file_name, file_name.replace('.jpg', '.small.jpg'),
+                                  file_name.replace('.jpg', '.small.webp')]
+            assert all(storage.exists(picture_file) for picture_file in self.picture_files)
+            return self
+
+        def then_those_picture_files_should_be_deleted(self):
+            storage = ORMExperience._meta.get_field('picture').storage
+            assert not any(storage.exists(picture_file) for picture_file in self.picture_files)
+            return self
+
+        def then_other_experience_picture_should_be_processing(self, is_processing):
+            picture = self.repo.get_experience(id=str(self.other_orm_experience.id)).picture
+            assert picture.is_processing == is_processing
+            return self
+
+        def given_an_experience_picture_rendered_before_webp(self):
+            ORMPictureVariationJob.objects.all().delete()
+            ORMExperience.objects.filter(id=self.orm_experience.id).update(picture_is_processing=False)
+            return self
+
+        def when_add_jobs_for_pictures_without_webp(self):
+            self.jobs_queued = create_picture_variation_job_repo() \
+                    .add_jobs_for_pictures_without_webp('experiences.ORMExperience')
+            return self
+
+        def then_jobs_queued_should_be(self, count):
+            assert self.jobs_queued == count
+            return self
+
+        def then_experience_picture_should_have_webp_urls(self):
+            picture = self.repo.get_experience(id=str(self.orm_experience.id)).picture
+            assert picture.small_webp_url == '/media/{}'.format(
+                    self.experience_file_name().replace('.jpg', '.small.webp'))
+            return self
+
+        def when_process_jobs(self, times=1):
+            for _ in range(times):
+                self.stats = create_process_picture_variation_jobs_interactor(concurrency=2) \
+                        .set_params(batch_size=10).execute()
+            return self
+
+        def then_stats_should_be(self, stats):
+            assert self.stats == stats
+            return self
+
+        def then_experience_picture_should_be_processing(self, is_processing):
+            picture = self.repo.get_experience(id=str(self.orm_experience.id)).picture
+            assert picture.is_processing == is_processing
+            if is_processing:
+                assert picture.small_url == '/media/{}'.format(self.experience_file_name())
+            else:
+                assert picture.small_url == '/media/{}'.format(
+                        self.experience_file_name().replace('.jpg', '.small.jpg'))
+            return self
+
+        def then_experience_picture_variations_should_exist(self):
+            storage = ORMExperience._meta.get_field('picture').storage
+            for variation in ['large', 'medium', 'small']:
+                assert storage.exists(self.experience_file_name().replace('.jpg', '.{}.jpg'.format(variation)))
+            return self
+
+        def then_there_should_be_jobs(self, count):
+            assert ORMPictureVariationJob.objects.count() == count
+            return self
+
+        def experience_file_name(self):
+            return ORMExperience.objects.get(id=self.orm_experience.id).picture.name
+
+
+class StoredPictureFilesTestCase(TransactionTestCase):
+
+    def test_files_are_deleted_when_last_reference_is_released(self):
+        with PictureVariationJobsTestCase.ScenarioMaker() as scenario:
+            scenario.given_an_experience() \
+                    .when_upload_experience_picture() \
+                    .when_process_jobs() \
+                    .given_the_current_picture_files() \
+                    .when_upload_experience_picture(content=create_jpeg(600, 800)) \
+                    .then_stored_pictures_should_be(1) \
+                    .then_those_picture_files_should_be_deleted()
+
+
+class UploadPictureViewTestCase(TestCase):
+
+    def test_oversize_upload_is_rejected_before_reading_the_body(self):
+        UploadPictureViewTestCase.ScenarioMaker() \
+                .given_a_max_picture_size(1000) \
+                .when_upload_picture(size=1000 + ViewWrapper.upload_multipart_overhead + 1) \
+                .then_view_should_not_be_created() \
+                .then_response_should_be(413, {'error': {'source': 'picture', 'code': 'wrong_size',
+                                                         'message': 'Picture must be up to 1000 bytes'}})
+
+    def test_upload_under_the_limit_reaches_the_view(self):
+        UploadPictureViewTestCase.ScenarioMaker() \
+                .given_a_max_picture_size(1000) \
+                .when_upload_picture(size=500) \
+                .then_view_should_be_created() \
+                .then_response_should_be(200, {'size': 500})
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.views_created = 0
+
+        def given_a_max_picture_size(self, max_size):
+            self.max_size = max_size
+            return self
+
+        def when_upload_picture(self, size):
+            scenario = self
+
+            class UploadView:
+
+                def post(self, picture, **kwargs):
+                    return {'size': picture.size}, 200
+
+            def create_upload_view(request, **kwargs):
+                scenario.views_created += 1
+                return UploadView()
+
+            request = RequestFactory().post('/', {'picture': SimpleUploadedFile('picture.jpg', b'0' * size)})
+            with override_settings(PICTURE_MAX_SIZE=self.max_size):
+                self.response = ViewWrapper.as_view(view_creator_func=create_upload_view,
+                                                    upload_picture_name='picture')(request)
+            return self
+
+        def then_view_should_not_be_created(self):
+            assert self.views_created == 0
+            return self
+
+        def then_view_should_be_created(self):
+            assert self.views_created == 1
+            return self
+
+        def then_response_should_be(self, status, body):
+            assert self.response.status_code == status
+            assert json.loads(self.response.content) == body
+            return self
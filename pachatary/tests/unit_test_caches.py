@@ -0,0 +1,127 @@
+from mock import patch
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from pachatary.caches import LRUCache
+
+
+class TestLRUCache:
+
+    def test_returns_stored_values_and_counts_hits_and_misses(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_cache(max_size=10, ttl=60) \
+                .when_set('a', '1') \
+                .then_get_should_return('a', '1') \
+                .then_get_should_return('b', None) \
+                .then_stats_should_be(hits=1, misses=1, size=1)
+
+    def test_evicts_least_recently_used(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_cache(max_size=2, ttl=60) \
+                .when_set('a', '1') \
+                .when_set('b', '2') \
+                .then_get_should_return('a', '1') \
+                .when_set('c', '3') \
+                .then_get_should_return('b', None) \
+                .then_get_should_return('a', '1') \
+                .then_get_should_return('c', '3')
+
+    def test_expires_entries_after_ttl(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_cache(max_size=10, ttl=60) \
+                .when_set('a', '1', at=1000) \
+                .then_get_should_return('a', '1', at=1059) \
+                .then_get_should_return('a', None, at=1061)
+
+    def test_delete(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_cache(max_size=10, ttl=60) \
+                .when_set('a', '1') \
+                .when_delete('a') \
+                .then_get_should_return('a', None)
+
+    def test_clear(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_cache(max_size=10, ttl=60) \
+                .when_set('a', '1') \
+                .when_set('b', '2') \
+                .when_clear() \
+                .then_get_should_return('a', None) \
+                .then_get_should_return('b', None)
+
+    def test_falls_back_to_shared_cache(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_shared_cache() \
+                .given_a_cache(max_size=10, ttl=60) \
+                .when_set('a', '1') \
+                .given_another_cache_with_same_shared_cache() \
+                .then_get_should_return('a', '1') \
+                .when_delete('a') \
+                .given_another_cache_with_same_shared_cache() \
+                .then_get_should_return('a', None)
+
+    def test_local_entries_expire_after_local_ttl_and_are_read_again_from_shared_cache(self):
+        TestLRUCache.ScenarioMaker() \
+                .given_a_shared_cache() \
+                .given_a_cache(max_size=10, ttl=60, local_ttl=5) \
+                .when_set('a', '1', at=1000) \
+                .given_another_cache_with_same_shared_cache() \
+                .then_get_should_return('a', '1', at=1000) \
+                .when_delete_from_shared_cache('a') \
+                .then_get_should_return('a', '1', at=1004) \
+                .then_get_should_return('a', None, at=1006)
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.shared_cache = None
+
+        def given_a_shared_cache(self):
+            self.shared_cache = LocMemCache('test', {})
+            self.shared_cache.clear()
+            return self
+
+        def given_a_cache(self, max_size, ttl, local_ttl=None):
+            self.max_size = max_size
+            self.ttl = ttl
+            self.local_ttl = local_ttl
+            self.cache = LRUCache(max_size=max_size, ttl=ttl, shared_cache=self.shared_cache, key_prefix='t:',
+                                  local_ttl=local_ttl)
+            return self
+
+        def given_another_cache_with_same_shared_cache(self):
+            self.cache = LRUCache(max_size=self.max_size, ttl=self.ttl,
+                                  shared_cache=self.shared_cache, key_prefix='t:', local_ttl=self.local_ttl)
+            return self
+
+        def when_delete_from_shared_cache(self, key):
+            self.shared_cache.delete('t:{}'.format(key))
+            return self
+
+        def when_set(self, key, value, at=None):
+            if at is None:
+                self.cache.set(key, value)
+            else:
+                with patch('time.monotonic', return_value=at):
+                    self.cache.set(key, value)
+            return self
+
+        def when_delete(self, key):
+            self.cache.delete(key)
+            return self
+
+        def when_clear(self):
+            self.cache.clear()
+            return self
+
+        def then_get_should_return(self, key, value, at=None):
+            if at is None:
+                assert self.cache.get(key) == value
+            else:
+                with patch('time.monotonic', return_value=at):
+                    assert self.cache.get(key) == value
+            return self
+
+        def then_stats_should_be(self, hits, misses, size):
+            assert self.cache.get_stats() == {'hits': hits, 'misses': misses, 'size': size}
+            return self
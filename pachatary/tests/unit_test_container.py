@@ -0,0 +1,64 @@
+from mock import Mock, patch
+
+from pachatary.container import Container
+
+
+class TestContainer:
+
+    def test_stateless_factory_is_built_once(self):
+        TestContainer.ScenarioMaker() \
+                .given_a_stateless_factory() \
+                .when_factory_is_called() \
+                .when_factory_is_called() \
+                .then_builder_should_have_been_called(times=1) \
+                .then_all_results_should_be_the_same()
+
+    def test_reset_builds_again(self):
+        TestContainer.ScenarioMaker() \
+                .given_a_stateless_factory() \
+                .when_factory_is_called() \
+                .when_container_is_reset() \
+                .when_factory_is_called() \
+                .then_builder_should_have_been_called(times=2)
+
+    def test_fork_builds_again(self):
+        TestContainer.ScenarioMaker() \
+                .given_a_stateless_factory() \
+                .when_factory_is_called() \
+                .when_factory_is_called(pid=12345) \
+                .then_builder_should_have_been_called(times=2)
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.container = Container()
+            self.results = []
+
+        def given_a_stateless_factory(self):
+            self.builder = Mock(side_effect=lambda: Mock())
+
+            def create_something():
+                return self.builder()
+
+            self.factory = self.container.stateless(create_something)
+            return self
+
+        def when_factory_is_called(self, pid=None):
+            if pid is None:
+                self.results.append(self.factory())
+            else:
+                with patch('os.getpid', return_value=pid):
+                    self.results.append(self.factory())
+            return self
+
+        def when_container_is_reset(self):
+            self.container.reset()
+            return self
+
+        def then_builder_should_have_been_called(self, times):
+            assert self.builder.call_count == times
+            return self
+
+        def then_all_results_should_be_the_same(self):
+            assert all(result is self.results[0] for result in self.results)
+            return self
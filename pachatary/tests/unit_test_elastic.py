@@ -0,0 +1,67 @@
+from mock import Mock, patch
+
+from pachatary.elastic import ElasticClientRegistry
+
+
+class TestElasticClientRegistry:
+
+    def test_returns_same_client_for_same_url(self):
+        TestElasticClientRegistry.ScenarioMaker() \
+                .given_a_registry() \
+                .when_get_client('es:9200') \
+                .when_get_client('es:9200') \
+                .then_factory_should_have_been_called_with(['es:9200']) \
+                .then_all_clients_should_be_the_same()
+
+    def test_creates_one_client_per_url(self):
+        TestElasticClientRegistry.ScenarioMaker() \
+                .given_a_registry() \
+                .when_get_client('es:9200') \
+                .when_get_client('other:9200') \
+                .then_factory_should_have_been_called_with(['es:9200', 'other:9200'])
+
+    def test_creates_one_client_per_url_and_options(self):
+        TestElasticClientRegistry.ScenarioMaker() \
+                .given_a_registry() \
+                .when_get_client('es:9200') \
+                .when_get_client('es:9200', max_retries=0) \
+                .when_get_client('es:9200', max_retries=0) \
+                .then_factory_should_have_been_called_with(['es:9200', 'es:9200']) \
+                .then_factory_options_should_have_been([{}, {'max_retries': 0}])
+
+    def test_creates_new_client_after_fork(self):
+        TestElasticClientRegistry.ScenarioMaker() \
+                .given_a_registry() \
+                .when_get_client('es:9200') \
+                .when_get_client('es:9200', pid=12345) \
+                .then_factory_should_have_been_called_with(['es:9200', 'es:9200'])
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.clients = []
+
+        def given_a_registry(self):
+            self.client_factory = Mock(side_effect=lambda url, **options: Mock())
+            self.registry = ElasticClientRegistry(client_factory=self.client_factory)
+            return self
+
+        def when_get_client(self, url, pid=None, **options):
+            if pid is None:
+                self.clients.append(self.registry.get_client(url, **options))
+            else:
+                with patch('os.getpid', return_value=pid):
+                    self.clients.append(self.registry.get_client(url))
+            return self
+
+        def then_factory_should_have_been_called_with(self, urls):
+            assert [c[0][0] for c in self.client_factory.call_args_list] == urls
+            return self
+
+        def then_factory_options_should_have_been(self, options):
+            assert [c[1] for c in self.client_factory.call_args_list] == options
+            return self
+
+        def then_all_clients_should_be_the_same(self):
+            assert all(client is self.clients[0] for client in self.clients)
+            return self
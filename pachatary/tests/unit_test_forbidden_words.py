@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+
+from pachatary.forbidden_words import ForbiddenWords
+
+
+class TestForbiddenWords:
+
+    def test_exact_match_is_normalized(self):
+        TestForbiddenWords.ScenarioMaker() \
+                .given_a_words_file(['Admin', ' root ']) \
+                .given_forbidden_words(match=ForbiddenWords.EXACT) \
+                .then_should_contain(['admin', 'ADMIN', 'root']) \
+                .then_should_not_contain(['administrator', 'myroot'])
+
+    def test_prefix_match(self):
+        TestForbiddenWords.ScenarioMaker() \
+                .given_a_words_file(['admin']) \
+                .given_forbidden_words(match=ForbiddenWords.PREFIX) \
+                .then_should_contain(['admin', 'administrator']) \
+                .then_should_not_contain(['myadmin'])
+
+    def test_substring_match(self):
+        TestForbiddenWords.ScenarioMaker() \
+                .given_a_words_file(['admin']) \
+                .given_forbidden_words(match=ForbiddenWords.SUBSTRING) \
+                .then_should_contain(['admin', 'myadmin.rocks']) \
+                .then_should_not_contain(['adm'])
+
+    def test_several_files_are_merged(self):
+        TestForbiddenWords.ScenarioMaker() \
+                .given_a_words_file(['admin']) \
+                .given_a_words_file(['scene']) \
+                .given_forbidden_words(match=ForbiddenWords.EXACT) \
+                .then_should_contain(['admin', 'scene'])
+
+    def test_reloads_when_file_is_modified(self):
+        TestForbiddenWords.ScenarioMaker() \
+                .given_a_words_file(['admin']) \
+                .given_forbidden_words(match=ForbiddenWords.EXACT, check_interval=0) \
+                .when_words_file_is_rewritten(['root']) \
+                .then_should_contain(['root']) \
+                .then_should_not_contain(['admin'])
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.directory = tempfile.mkdtemp()
+            self.paths = []
+
+        def given_a_words_file(self, words):
+            path = os.path.join(self.directory, '{}.json'.format(len(self.paths)))
+            with open(path, 'w') as words_file:
+                json.dump(words, words_file)
+            self.paths.append(path)
+            return self
+
+        def given_forbidden_words(self, match, check_interval=60):
+            self.forbidden_words = ForbiddenWords(paths=self.paths, match=match, check_interval=check_interval)
+            return self
+
+        def when_words_file_is_rewritten(self, words):
+            with open(self.paths[0], 'w') as words_file:
+                json.dump(words, words_file)
+            mtime = os.stat(self.paths[0]).st_mtime + 10
+            os.utime(self.paths[0], (mtime, mtime))
+            return self
+
+        def then_should_contain(self, words):
+            assert all(word in self.forbidden_words for word in words)
+            return self
+
+        def then_should_not_contain(self, words):
+            assert all(word not in self.forbidden_words for word in words)
+            return self
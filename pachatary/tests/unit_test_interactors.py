@@ -0,0 +1,79 @@
+from mock import Mock, call
+
+from pachatary.interactors import ProcessPictureVariationJobsInteractor
+
+
+class TestProcessPictureVariationJobsInteractor:
+
+    def test_renders_current_pictures_and_finishes_their_jobs(self):
+        TestProcessPictureVariationJobsInteractor.ScenarioMaker() \
+                .given_pending_jobs([{'id': '1', 'file_name': 'a.jpg', 'is_current': True},
+                                     {'id': '2', 'file_name': 'b.jpg', 'is_current': True}]) \
+                .given_a_renderer() \
+                .when_interactor_is_executed() \
+                .then_should_render(['a.jpg', 'b.jpg']) \
+                .then_should_finish_jobs(['1', '2']) \
+                .then_stats_should_be({'jobs': 2, 'rendered': 2, 'skipped': 0, 'failed': 0})
+
+    def test_replaced_pictures_are_skipped(self):
+        TestProcessPictureVariationJobsInteractor.ScenarioMaker() \
+                .given_pending_jobs([{'id': '1', 'file_name': 'a.jpg', 'is_current': False}]) \
+                .given_a_renderer() \
+                .when_interactor_is_executed() \
+                .then_should_render([]) \
+                .then_should_finish_jobs([]) \
+                .then_should_skip_jobs(['1']) \
+                .then_stats_should_be({'jobs': 1, 'rendered': 0, 'skipped': 1, 'failed': 0})
+
+    def test_failed_renders_are_kept_to_retry(self):
+        TestProcessPictureVariationJobsInteractor.ScenarioMaker() \
+                .given_pending_jobs([{'id': '1', 'file_name': 'a.jpg', 'is_current': True}]) \
+                .given_a_renderer_that_fails() \
+                .when_interactor_is_executed() \
+                .then_should_finish_jobs([]) \
+                .then_should_fail_jobs(['1']) \
+                .then_stats_should_be({'jobs': 1, 'rendered': 0, 'skipped': 0, 'failed': 1})
+
+    class ScenarioMaker:
+
+        def given_pending_jobs(self, jobs):
+            self.jobs = [dict(job, storage='storage', variations={'small': {}}) for job in jobs]
+            self.job_repo = Mock()
+            self.job_repo.get_pending_jobs.return_value = self.jobs
+            return self
+
+        def given_a_renderer(self):
+            self.renderer = Mock()
+            return self
+
+        def given_a_renderer_that_fails(self):
+            self.renderer = Mock()
+            self.renderer.render.side_effect = OSError('cannot identify image file')
+            return self
+
+        def when_interactor_is_executed(self):
+            self.result = ProcessPictureVariationJobsInteractor(self.job_repo, self.renderer) \
+                    .set_params(batch_size=5).execute()
+            return self
+
+        def then_should_render(self, file_names):
+            self.job_repo.get_pending_jobs.assert_called_once_with(limit=5)
+            assert self.renderer.render.call_args_list == \
+                [call('storage', file_name, {'small': {}}) for file_name in file_names]
+            return self
+
+        def then_should_finish_jobs(self, jobs_ids):
+            assert [args[0][0]['id'] for args in self.job_repo.finish_job.call_args_list] == jobs_ids
+            return self
+
+        def then_should_skip_jobs(self, jobs_ids):
+            assert [args[0][0]['id'] for args in self.job_repo.skip_job.call_args_list] == jobs_ids
+            return self
+
+        def then_should_fail_jobs(self, jobs_ids):
+            assert [args[0][0]['id'] for args in self.job_repo.fail_job.call_args_list] == jobs_ids
+            return self
+
+        def then_stats_should_be(self, stats):
+            assert self.result == stats
+            return self
@@ -0,0 +1,58 @@
+import json
+import logging
+from io import StringIO
+
+from pachatary.logs import JSONFormatter, create_queue_logger
+
+
+class TestLogs:
+
+    def test_formats_dict_messages_as_json_fields(self):
+        TestLogs.ScenarioMaker() \
+                .when_format({'status': 200, 'path': '/experiences/'}) \
+                .then_log_should_have(level='INFO', logger='test', status=200, path='/experiences/')
+
+    def test_formats_other_messages_under_message_field(self):
+        TestLogs.ScenarioMaker() \
+                .when_format('hello %s', 'world') \
+                .then_log_should_have(level='INFO', logger='test', message='hello world')
+
+    def test_queue_logger_writes_json_lines_from_a_background_thread(self):
+        TestLogs.ScenarioMaker() \
+                .given_a_queue_logger() \
+                .when_log({'status': 201}) \
+                .when_log({'status': 404}) \
+                .when_flush_logger() \
+                .then_stream_lines_should_have([{'status': 201}, {'status': 404}])
+
+    class ScenarioMaker:
+
+        def when_format(self, msg, *args):
+            record = logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+            self.log = json.loads(JSONFormatter().format(record))
+            return self
+
+        def given_a_queue_logger(self):
+            self.stream = StringIO()
+            self.logger = create_queue_logger('pachatary.tests.logs', stream=self.stream)
+            return self
+
+        def when_log(self, log):
+            self.logger.info(log)
+            return self
+
+        def when_flush_logger(self):
+            self.logger.handlers[0].queue.join()
+            return self
+
+        def then_log_should_have(self, **fields):
+            for key, value in fields.items():
+                assert self.log[key] == value
+            assert 'time' in self.log
+            return self
+
+        def then_stream_lines_should_have(self, logs):
+            lines = [json.loads(line) for line in self.stream.getvalue().splitlines()]
+            assert [{key: line[key] for key in log} for line, log in zip(lines, logs)] == logs
+            assert len(lines) == len(logs)
+            return self
@@ -0,0 +1,154 @@
+from io import BytesIO
+
+from django.core.files import File
+
+from pachatary.pictures import build_picture_url, build_picture, hash_picture, get_picture_variations_signature
+
+
+class TestPictures:
+
+    def test_builds_variation_url_from_stored_name(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('https://cdn.pachatary.com/') \
+                .when_build_picture_url('experiences/8c29.jpg', 'small') \
+                .then_url_should_be('https://cdn.pachatary.com/experiences/8c29.small.jpg')
+
+    def test_quotes_unsafe_characters(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('/media/') \
+                .when_build_picture_url('profiles/my pic.png', 'tiny') \
+                .then_url_should_be('/media/profiles/my%20pic.tiny.png')
+
+    def test_builds_picture_with_all_variations(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('https://cdn.pachatary.com/') \
+                .when_build_picture('scenes/1a.jpg', ('small', 'medium', 'large')) \
+                .then_picture_urls_should_be(small_url='https://cdn.pachatary.com/scenes/1a.small.jpg',
+                                             medium_url='https://cdn.pachatary.com/scenes/1a.medium.jpg',
+                                             large_url='https://cdn.pachatary.com/scenes/1a.large.jpg',
+                                             tiny_url=None)
+
+    def test_builds_webp_urls_when_picture_has_webp_variations(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('https://cdn.pachatary.com/') \
+                .when_build_picture('profiles/2b.png', ('tiny', 'small', 'medium'), has_webp=True) \
+                .then_webp_urls_should_be(small_webp_url='https://cdn.pachatary.com/profiles/2b.small.webp',
+                                          medium_webp_url='https://cdn.pachatary.com/profiles/2b.medium.webp',
+                                          large_webp_url=None,
+                                          tiny_webp_url='https://cdn.pachatary.com/profiles/2b.tiny.webp')
+
+    def test_processing_picture_points_every_variation_to_the_original(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('https://cdn.pachatary.com/') \
+                .when_build_picture('profiles/2b.png', ('tiny', 'small', 'medium'), is_processing=True,
+                                    has_webp=True) \
+                .then_picture_urls_should_be(small_url='https://cdn.pachatary.com/profiles/2b.png',
+                                             medium_url='https://cdn.pachatary.com/profiles/2b.png',
+                                             large_url=None,
+                                             tiny_url='https://cdn.pachatary.com/profiles/2b.png') \
+                .then_webp_urls_should_be(small_webp_url=None, medium_webp_url=None,
+                                          large_webp_url=None, tiny_webp_url=None) \
+                .then_picture_should_be_processing()
+
+    def test_equal_pictures_have_equal_hashes(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('https://cdn.pachatary.com/') \
+                .when_build_picture('scenes/1a.jpg', ('small', 'medium', 'large')) \
+                .when_build_picture('scenes/1a.jpg', ('small', 'medium', 'large')) \
+                .when_build_picture('scenes/2b.jpg', ('small', 'medium', 'large')) \
+                .then_distinct_pictures_should_be(2)
+
+    def test_variations_signature_does_not_depend_on_their_order(self):
+        TestPictures.ScenarioMaker() \
+                .when_get_variations_signature({'small': {'width': 320, 'height': 320, 'crop': False},
+                                                'tiny': {'width': 80, 'height': 80, 'crop': True}}) \
+                .then_signature_should_be('small:320x320,tiny:80x80:crop') \
+                .when_get_variations_signature({'tiny': {'width': 80, 'height': 80, 'crop': True},
+                                                'small': {'width': 320, 'height': 320, 'crop': False}}) \
+                .then_signature_should_be('small:320x320,tiny:80x80:crop')
+
+    def test_no_name_builds_no_picture(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_base_url('https://cdn.pachatary.com/') \
+                .when_build_picture('', ('small', 'medium', 'large')) \
+                .then_picture_should_be_none()
+
+    def test_hashes_picture_content_and_rewinds_it(self):
+        TestPictures.ScenarioMaker() \
+                .given_a_picture(b'picture content') \
+                .when_hash_picture() \
+                .then_hash_should_be('69cc1f590f8fce99293891305adf9f0c66771cc313f7fdcba5c65f78332f12c5') \
+                .then_picture_should_be_at_start()
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.pictures = []
+
+        def given_a_base_url(self, base_url):
+            self.base_url = base_url
+            return self
+
+        def when_build_picture_url(self, name, variation):
+            self.result = build_picture_url(name, variation, base_url=self.base_url)
+            return self
+
+        def when_build_picture(self, name, variations, is_processing=False, has_webp=False):
+            self.result = build_picture(name, variations, base_url=self.base_url, is_processing=is_processing,
+                                        has_webp=has_webp)
+            self.pictures.append(self.result)
+            return self
+
+        def then_distinct_pictures_should_be(self, count):
+            assert len(set(self.pictures)) == count
+            return self
+
+        def when_get_variations_signature(self, variations):
+            self.result = get_picture_variations_signature(variations)
+            return self
+
+        def then_signature_should_be(self, signature):
+            assert self.result == signature
+            return self
+
+        def given_a_picture(self, content):
+            self.picture = File(BytesIO(content))
+            return self
+
+        def when_hash_picture(self):
+            self.result = hash_picture(self.picture)
+            return self
+
+        def then_hash_should_be(self, content_hash):
+            assert self.result == content_hash
+            return self
+
+        def then_picture_should_be_at_start(self):
+            assert self.picture.tell() == 0
+            return self
+
+        def then_url_should_be(self, url):
+            assert self.result == url
+            return self
+
+        def then_picture_urls_should_be(self, small_url, medium_url, large_url, tiny_url):
+            assert self.result.small_url == small_url
+            assert self.result.medium_url == medium_url
+            assert self.result.large_url == large_url
+            assert self.result.tiny_url == tiny_url
+            return self
+
+        def then_webp_urls_should_be(self, small_webp_url, medium_webp_url, large_webp_url, tiny_webp_url):
+            assert self.result.small_webp_url == small_webp_url
+            assert self.result.medium_webp_url == medium_webp_url
+            assert self.result.large_webp_url == large_webp_url
+            assert self.result.tiny_webp_url == tiny_webp_url
+            return self
+
+        def then_picture_should_be_processing(self):
+            assert self.result.is_processing
+            return self
+
+        def then_picture_should_be_none(self):
+            assert self.result is None
+            return self
@@ -0,0 +1,132 @@
+import sys
+
+from pachatary.queries import fingerprint_query, find_query_caller, QueryInspector, QueryIssuesError
+
+
+class TestQueries:
+
+    def test_fingerprint_replaces_params_and_literals(self):
+        TestQueries.ScenarioMaker() \
+                .when_fingerprint('SELECT "id" FROM "t" WHERE "a" = %s AND  "b" = \'x\'\n LIMIT 21') \
+                .then_fingerprint_should_be('SELECT "id" FROM "t" WHERE "a" = ? AND "b" = ? LIMIT ?')
+
+    def test_fingerprint_collapses_in_lists(self):
+        TestQueries.ScenarioMaker() \
+                .when_fingerprint('SELECT * FROM "t2" WHERE "id" IN (%s, %s, %s)') \
+                .then_fingerprint_should_be('SELECT * FROM "t2" WHERE "id" IN (...)') \
+                .when_fingerprint('SELECT * FROM "t2" WHERE "id" IN (1, 2)') \
+                .then_fingerprint_should_be('SELECT * FROM "t2" WHERE "id" IN (...)')
+
+    def test_finds_repository_method_caller(self):
+        TestQueries.ScenarioMaker() \
+                .when_find_caller_from_a_repository_method() \
+                .then_caller_should_be('experiences.repositories.ExperienceRepo.get_experience')
+
+    def test_unknown_caller_when_not_called_from_a_repository(self):
+        TestQueries.ScenarioMaker() \
+                .when_find_caller_from_here() \
+                .then_caller_should_be('unknown')
+
+    def test_flags_repeated_statements_as_duplicates(self):
+        TestQueries.ScenarioMaker() \
+                .given_an_inspector(duplicates_threshold=2, n_plus_one_threshold=5) \
+                .when_record('SELECT * FROM "e" WHERE "id" = %s', (1,), 'a.repositories.Repo.get') \
+                .when_record('SELECT * FROM "e" WHERE "id" = %s', (1,), 'a.repositories.Repo.update') \
+                .when_record('SELECT * FROM "p" WHERE "id" = %s', (1,), 'a.repositories.Repo.get') \
+                .then_issues_should_be([{'type': 'duplicate', 'fingerprint': 'SELECT * FROM "e" WHERE "id" = ?',
+                                         'count': 2,
+                                         'callers': ['a.repositories.Repo.get', 'a.repositories.Repo.update']}])
+
+    def test_flags_same_fingerprint_with_different_params_as_n_plus_one(self):
+        TestQueries.ScenarioMaker() \
+                .given_an_inspector(duplicates_threshold=2, n_plus_one_threshold=3) \
+                .when_record('SELECT * FROM "s" WHERE "e_id" = %s', (1,), 'a.repositories.Repo.get_scenes') \
+                .when_record('SELECT * FROM "s" WHERE "e_id" = %s', (2,), 'a.repositories.Repo.get_scenes') \
+                .when_record('SELECT * FROM "s" WHERE "e_id" = %s', (3,), 'a.repositories.Repo.get_scenes') \
+                .then_issues_should_be([{'type': 'n_plus_one', 'fingerprint': 'SELECT * FROM "s" WHERE "e_id" = ?',
+                                         'count': 3, 'callers': ['a.repositories.Repo.get_scenes']}])
+
+    def test_no_issues_under_thresholds(self):
+        TestQueries.ScenarioMaker() \
+                .given_an_inspector(duplicates_threshold=3, n_plus_one_threshold=3) \
+                .when_record('SELECT * FROM "s" WHERE "e_id" = %s', (1,), 'unknown') \
+                .when_record('SELECT * FROM "s" WHERE "e_id" = %s', (1,), 'unknown') \
+                .when_record('SELECT * FROM "s" WHERE "e_id" = %s', (2,), 'unknown') \
+                .then_issues_should_be([])
+
+    def test_inspector_wraps_execution_recording_the_caller(self):
+        TestQueries.ScenarioMaker() \
+                .given_an_inspector(duplicates_threshold=2, n_plus_one_threshold=5) \
+                .when_execute_through_inspector('SELECT %s', (1,)) \
+                .then_execution_result_should_be('cursor') \
+                .then_recorded_queries_should_be([{'fingerprint': 'SELECT ?', 'statement': ('SELECT %s', '(1,)'),
+                                                   'caller': 'unknown'}])
+
+    def test_issues_error_message_summarizes_issues(self):
+        TestQueries.ScenarioMaker() \
+                .when_create_error([{'type': 'duplicate', 'fingerprint': 'SELECT ?', 'count': 2,
+                                     'callers': ['a.repositories.Repo.get', 'b.repositories.Repo.get']}]) \
+                .then_error_message_should_be('duplicate x2 "SELECT ?" from a.repositories.Repo.get, '
+                                              'b.repositories.Repo.get')
+
+    class ScenarioMaker:
+
+        def given_an_inspector(self, duplicates_threshold, n_plus_one_threshold):
+            self.inspector = QueryInspector(duplicates_threshold=duplicates_threshold,
+                                            n_plus_one_threshold=n_plus_one_threshold)
+            return self
+
+        def when_fingerprint(self, sql):
+            self.fingerprint = fingerprint_query(sql)
+            return self
+
+        def when_find_caller_from_a_repository_method(self):
+            namespace = {'__name__': 'experiences.repositories', 'find_query_caller': find_query_caller, 'sys': sys}
+            exec('class ExperienceRepo:\n'
+                 '    def get_experience(self):\n'
+                 '        return inner()\n'
+                 'def inner():\n'
+                 '    return find_query_caller(sys._getframe())\n', namespace)
+            self.caller = namespace['ExperienceRepo']().get_experience()
+            return self
+
+        def when_find_caller_from_here(self):
+            self.caller = find_query_caller(sys._getframe())
+            return self
+
+        def when_record(self, sql, params, caller):
+            self.inspector.record(sql, params, caller)
+            return self
+
+        def when_execute_through_inspector(self, sql, params):
+            self.result = self.inspector(lambda *args: 'cursor', sql, params, False, {})
+            return self
+
+        def when_create_error(self, issues):
+            self.error = QueryIssuesError(issues)
+            return self
+
+        def then_fingerprint_should_be(self, fingerprint):
+            assert self.fingerprint == fingerprint
+            return self
+
+        def then_caller_should_be(self, caller):
+            assert self.caller == caller
+            return self
+
+        def then_issues_should_be(self, issues):
+            assert self.inspector.get_issues() == issues
+            return self
+
+        def then_execution_result_should_be(self, result):
+            assert self.result == result
+            return self
+
+        def then_recorded_queries_should_be(self, queries):
+            assert self.inspector.queries == queries
+            return self
+
+        def then_error_message_should_be(self, message):
+            assert str(self.error) == message
+            assert self.error.issues[0]['type'] == 'duplicate'
+            return self
@@ -0,0 +1,126 @@
+from mock import patch
+
+from pachatary.timings import RequestTimings, start_request_timings, stop_request_timings, get_request_timings, \
+        measure_stage, measure_db_query, add_stage_time, measured
+
+
+class TestRequestTimings:
+
+    def test_accumulates_stage_durations_and_counts(self):
+        TestRequestTimings.ScenarioMaker() \
+                .given_request_timings_started_at(100.0) \
+                .when_add('db', 0.002) \
+                .when_add('db', 0.0035) \
+                .when_add('es', 0.01) \
+                .when_add('auth', 0.001) \
+                .then_dict_at(100.05, {'total_ms': 50.0, 'auth_ms': 1.0, 'view_ms': 0.0, 'interactor_ms': 0.0,
+                                       'serialize_ms': 0.0, 'db_ms': 5.5, 'db_queries': 2, 'es_ms': 10.0,
+                                       'es_calls': 1})
+
+    def test_builds_server_timing_header(self):
+        TestRequestTimings.ScenarioMaker() \
+                .given_request_timings_started_at(100.0) \
+                .when_add('interactor', 0.012) \
+                .when_add('db', 0.004) \
+                .then_server_timing_at(100.02, 'auth;dur=0.0, view;dur=0.0, interactor;dur=12.0, '
+                                               'serialize;dur=0.0, db;dur=4.0;desc="1 queries", '
+                                               'es;dur=0.0;desc="0 calls", total;dur=20.0')
+
+    def test_measures_stages_only_while_request_timings_are_started(self):
+        TestRequestTimings.ScenarioMaker() \
+                .when_measure_stage_outside_a_request('view') \
+                .when_start_request_timings() \
+                .when_measure_stage('view', start=10.0, end=10.003) \
+                .when_measure_db_query(start=10.0, end=10.001) \
+                .then_durations_should_be(view=0.003, db=0.001) \
+                .then_db_queries_should_be(1) \
+                .when_stop_request_timings() \
+                .then_there_should_be_no_request_timings()
+
+    def test_excludes_nested_stages_and_does_not_count_same_stage_twice(self):
+        TestRequestTimings.ScenarioMaker() \
+                .when_start_request_timings() \
+                .when_measure_interactor_with_nested_serializers(interactor_start=10.0, serialize_start=10.002,
+                                                                 serialize_end=10.005, interactor_end=10.010) \
+                .then_durations_should_be(interactor=0.007, serialize=0.003) \
+                .when_stop_request_timings()
+
+    class ScenarioMaker:
+
+        def given_request_timings_started_at(self, start_time):
+            with patch('pachatary.timings.time.time', return_value=start_time):
+                self.timings = RequestTimings()
+            return self
+
+        def when_add(self, stage, duration):
+            self.timings.add(stage, duration)
+            return self
+
+        def when_start_request_timings(self):
+            self.timings = start_request_timings()
+            return self
+
+        def when_stop_request_timings(self):
+            stop_request_timings()
+            return self
+
+        def when_measure_stage_outside_a_request(self, stage):
+            stop_request_timings()
+            with measure_stage(stage):
+                pass
+            add_stage_time(stage, 1.0)
+            return self
+
+        def when_measure_stage(self, stage, start, end):
+            with patch('pachatary.timings.time.time', side_effect=[start, end]):
+                with measure_stage(stage):
+                    pass
+            return self
+
+        def when_measure_interactor_with_nested_serializers(self, interactor_start, serialize_start,
+                                                            serialize_end, interactor_end):
+            @measured('serialize')
+            def serialize(value):
+                return serialize_nested(value)
+
+            @measured('serialize')
+            def serialize_nested(value):
+                return value
+
+            with patch('pachatary.timings.time.time',
+                       side_effect=[interactor_start, serialize_start, serialize_end, interactor_end]):
+                with measure_stage('interactor', exclude=('serialize',)):
+                    assert serialize('body') == 'body'
+            return self
+
+        def when_measure_db_query(self, start, end):
+            execute_calls = []
+            with patch('pachatary.timings.time.time', side_effect=[start, end]):
+                result = measure_db_query(lambda *args: execute_calls.append(args) or 'cursor',
+                                          'SELECT 1', None, False, {})
+            assert result == 'cursor'
+            assert execute_calls == [('SELECT 1', None, False, {})]
+            return self
+
+        def then_dict_at(self, now, timings_dict):
+            with patch('pachatary.timings.time.time', return_value=now):
+                assert self.timings.to_dict() == timings_dict
+            return self
+
+        def then_server_timing_at(self, now, server_timing):
+            with patch('pachatary.timings.time.time', return_value=now):
+                assert self.timings.to_server_timing() == server_timing
+            return self
+
+        def then_durations_should_be(self, **durations):
+            for stage, duration in durations.items():
+                assert round(self.timings.durations[stage], 6) == duration
+            return self
+
+        def then_db_queries_should_be(self, count):
+            assert self.timings.counts['db'] == count
+            return self
+
+        def then_there_should_be_no_request_timings(self):
+            assert get_request_timings() is None
+            return self
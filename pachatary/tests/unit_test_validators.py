@@ -0,0 +1,94 @@
+from io import BytesIO
+
+from PIL import Image
+
+from pachatary.exceptions import InvalidEntityException
+from pachatary.validators import PictureValidator
+
+
+class TestPictureValidator:
+
+    def test_valid_picture_passes_and_is_rewound(self):
+        TestPictureValidator.ScenarioMaker() \
+                .given_a_validator(max_size=100000, max_pixels=10000) \
+                .given_a_picture(width=100, height=100, format='PNG') \
+                .when_validate() \
+                .then_should_not_raise() \
+                .then_picture_should_be_at_start()
+
+    def test_no_picture_raises_empty_attribute(self):
+        TestPictureValidator.ScenarioMaker() \
+                .given_a_validator(max_size=100000, max_pixels=10000) \
+                .given_no_picture() \
+                .when_validate() \
+                .then_should_raise(code='empty_attribute')
+
+    def test_too_many_bytes_raises_wrong_size(self):
+        TestPictureValidator.ScenarioMaker() \
+                .given_a_validator(max_size=10, max_pixels=10000) \
+                .given_a_picture(width=100, height=100, format='PNG') \
+                .when_validate() \
+                .then_should_raise(code='wrong_size')
+
+    def test_too_many_pixels_raises_wrong_size(self):
+        TestPictureValidator.ScenarioMaker() \
+                .given_a_validator(max_size=100000, max_pixels=9999) \
+                .given_a_picture(width=100, height=100, format='JPEG') \
+                .when_validate() \
+                .then_should_raise(code='wrong_size')
+
+    def test_not_a_picture_raises_wrong_format(self):
+        TestPictureValidator.ScenarioMaker() \
+                .given_a_validator(max_size=100000, max_pixels=10000) \
+                .given_a_file(b'not a picture') \
+                .when_validate() \
+                .then_should_raise(code='wrong_format')
+
+    def test_not_allowed_format_raises_wrong_format(self):
+        TestPictureValidator.ScenarioMaker() \
+                .given_a_validator(max_size=100000, max_pixels=10000) \
+                .given_a_picture(width=10, height=10, format='GIF') \
+                .when_validate() \
+                .then_should_raise(code='wrong_format')
+
+    class ScenarioMaker:
+
+        def given_a_validator(self, max_size, max_pixels):
+            self.validator = PictureValidator(max_size=max_size, max_pixels=max_pixels)
+            return self
+
+        def given_a_picture(self, width, height, format):
+            picture_buffer = BytesIO()
+            Image.new('RGB', (width, height)).save(picture_buffer, format=format)
+            return self.given_a_file(picture_buffer.getvalue())
+
+        def given_a_file(self, content):
+            self.picture = BytesIO(content)
+            self.picture.size = len(content)
+            return self
+
+        def given_no_picture(self):
+            self.picture = None
+            return self
+
+        def when_validate(self):
+            self.error = None
+            try:
+                self.validator.validate_picture(self.picture)
+            except Exception as e:
+                self.error = e
+            return self
+
+        def then_should_not_raise(self):
+            assert self.error is None
+            return self
+
+        def then_picture_should_be_at_start(self):
+            assert self.picture.tell() == 0
+            return self
+
+        def then_should_raise(self, code):
+            assert type(self.error) is InvalidEntityException
+            assert self.error.source == 'picture'
+            assert self.error.code == code
+            return self
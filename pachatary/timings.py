@@ -0,0 +1,102 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+class RequestTimings:
+
+    STAGES = ('auth', 'view', 'interactor', 'serialize', 'db', 'es')
+    COUNTED_STAGES = {'db': 'queries', 'es': 'calls'}
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.durations = {stage: 0.0 for stage in RequestTimings.STAGES}
+        self.counts = {stage: 0 for stage in RequestTimings.COUNTED_STAGES}
+        self.active_stages = set()
+
+    def add(self, stage, duration):
+        self.durations[stage] += duration
+        if stage in self.counts:
+            self.counts[stage] += 1
+
+    def get_duration(self, stages):
+        return sum([self.durations[stage] for stage in stages])
+
+    def get_total_time(self):
+        return time.time() - self.start_time
+
+    def to_dict(self):
+        timings = {'total_ms': self._to_ms(self.get_total_time())}
+        for stage in RequestTimings.STAGES:
+            timings['{}_ms'.format(stage)] = self._to_ms(self.durations[stage])
+            if stage in RequestTimings.COUNTED_STAGES:
+                timings['{}_{}'.format(stage, RequestTimings.COUNTED_STAGES[stage])] = self.counts[stage]
+        return timings
+
+    def to_server_timing(self):
+        metrics = []
+        for stage in RequestTimings.STAGES:
+            metric = '{};dur={}'.format(stage, self._to_ms(self.durations[stage]))
+            if stage in RequestTimings.COUNTED_STAGES:
+                metric = '{};desc="{} {}"'.format(metric, self.counts[stage], RequestTimings.COUNTED_STAGES[stage])
+            metrics.append(metric)
+        metrics.append('total;dur={}'.format(self._to_ms(self.get_total_time())))
+        return ', '.join(metrics)
+
+    def _to_ms(self, duration):
+        return round(duration * 1000, 1)
+
+
+_local = threading.local()
+
+
+def start_request_timings():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def get_request_timings():
+    return getattr(_local, 'timings', None)
+
+
+def stop_request_timings():
+    _local.timings = None
+
+
+def add_stage_time(stage, duration):
+    timings = get_request_timings()
+    if timings is not None:
+        timings.add(stage, duration)
+
+
+@contextmanager
+def measure_stage(stage, exclude=()):
+    timings = get_request_timings()
+    if timings is None or stage in timings.active_stages:
+        yield
+        return
+
+    timings.active_stages.add(stage)
+    excluded_duration = timings.get_duration(exclude)
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        timings.active_stages.discard(stage)
+        timings.add(stage, time.time() - start_time - (timings.get_duration(exclude) - excluded_duration))
+
+
+def measured(stage):
+    def decorator(func):
+        @wraps(func)
+        def func_wrapper(*args, **kwargs):
+            with measure_stage(stage):
+                return func(*args, **kwargs)
+        return func_wrapper
+    return decorator
+
+
+def measure_db_query(execute, sql, params, many, context):
+    with measure_stage('db'):
+        return execute(sql, params, many, context)
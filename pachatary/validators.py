@@ -0,0 +1,39 @@
+from PIL import Image
+
+from .exceptions import InvalidEntityException
+
+
+class PictureValidator:
+
+    FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+    def __init__(self, max_size, max_pixels):
+        self.max_size = max_size
+        self.max_pixels = max_pixels
+
+    def validate_picture(self, picture):
+        if picture is None:
+            raise InvalidEntityException(source='picture', code='empty_attribute', message='Picture cannot be empty')
+        if picture.size > self.max_size:
+            raise InvalidEntityException(source='picture', code='wrong_size',
+                                         message='Picture must be up to {} bytes'.format(self.max_size))
+
+        try:
+            picture.seek(0)
+            with Image.open(picture) as image:
+                picture_format = image.format
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width, height = self.max_pixels + 1, 1
+            picture_format = None
+        except OSError:
+            raise InvalidEntityException(source='picture', code='wrong_format', message='Picture cannot be read')
+        finally:
+            picture.seek(0)
+
+        if width * height > self.max_pixels:
+            raise InvalidEntityException(source='picture', code='wrong_size',
+                                         message='Picture must be up to {} pixels'.format(self.max_pixels))
+        if picture_format not in PictureValidator.FORMATS:
+            raise InvalidEntityException(source='picture', code='wrong_format',
+                                         message='Picture must be JPEG, PNG or WEBP')
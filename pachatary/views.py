@@ -7,12 +7,16 @@ from django.views import View
 from django.conf import settings
 
 from people.factories import create_authenticate_interactor
+from .exceptions import InvalidEntityException
+from .serializers import serialize_exception
+from .timings import measure_stage
 
 
 class ViewWrapper(View):
 
     view_creator_func = None
     upload_picture_name = None
+    upload_multipart_overhead = 64 * 1024
 
     def get(self, request, *args, **kwargs):
         kwargs.update(request.GET.dict())
@@ -21,25 +25,34 @@ class ViewWrapper(View):
         request.logged_person_id = logged_person_id
         kwargs.update({'logged_person_id': logged_person_id})
 
-        body, status = self.view_creator_func(request, **kwargs).get(**kwargs)
-        return HttpResponse(json.dumps(body), status=status, content_type='application/json')
+        view = self.create_view(request, **kwargs)
+        with measure_stage('interactor', exclude=('serialize',)):
+            body, status = view.get(**kwargs)
+        return self.create_response(body, status)
 
     def post(self, request, *args, **kwargs):
+        if self.upload_picture_name is not None and self.is_upload_too_large(request):
+            return self.upload_too_large_response()
+
         kwargs.update(request.POST.dict())
 
         logged_person_id = self.authenticate(request, **kwargs)
         request.logged_person_id = logged_person_id
         kwargs.update({'logged_person_id': logged_person_id})
 
-        if self.upload_picture_name is not None:
-            picture = request.FILES[self.upload_picture_name]
-            body, status = self.view_creator_func(request, **kwargs).post(picture, **kwargs)
-        else:
-            body, status = self.view_creator_func(request, **kwargs).post(**kwargs)
-        content = json.dumps(body) if body is not None else ''
-        return HttpResponse(content, status=status, content_type='application/json')
+        view = self.create_view(request, **kwargs)
+        with measure_stage('interactor', exclude=('serialize',)):
+            if self.upload_picture_name is not None:
+                picture = request.FILES[self.upload_picture_name]
+                body, status = view.post(picture, **kwargs)
+            else:
+                body, status = view.post(**kwargs)
+        return self.create_response(body, status)
 
     def patch(self, request, *args, **kwargs):
+        if self.upload_picture_name is not None and self.is_upload_too_large(request):
+            return self.upload_too_large_response()
+
         data = dict(urllib.parse.parse_qsl(request.body.decode("utf-8"), keep_blank_values=True))
         kwargs.update(data)
 
@@ -47,13 +60,14 @@ class ViewWrapper(View):
         request.logged_person_id = logged_person_id
         kwargs.update({'logged_person_id': logged_person_id})
 
-        if self.upload_picture_name is not None:
-            picture = request.FILES[self.upload_picture_name]
-            body, status = self.view_creator_func(request, **kwargs).patch(picture, **kwargs)
-        else:
-            body, status = self.view_creator_func(request, **kwargs).patch(**kwargs)
-        content = json.dumps(body) if body is not None else ''
-        return HttpResponse(content, status=status, content_type='application/json')
+        view = self.create_view(request, **kwargs)
+        with measure_stage('interactor', exclude=('serialize',)):
+            if self.upload_picture_name is not None:
+                picture = request.FILES[self.upload_picture_name]
+                body, status = view.patch(picture, **kwargs)
+            else:
+                body, status = view.patch(**kwargs)
+        return self.create_response(body, status)
 
     def delete(self, request, *args, **kwargs):
         data = dict(urllib.parse.parse_qsl(request.body.decode("utf-8"), keep_blank_values=True))
@@ -63,17 +77,40 @@ class ViewWrapper(View):
         request.logged_person_id = logged_person_id
         kwargs.update({'logged_person_id': logged_person_id})
 
-        body, status = self.view_creator_func(request, **kwargs).delete(**kwargs)
-        content = json.dumps(body) if body is not None else ''
+        view = self.create_view(request, **kwargs)
+        with measure_stage('interactor', exclude=('serialize',)):
+            body, status = view.delete(**kwargs)
+        return self.create_response(body, status)
+
+    def create_view(self, request, **kwargs):
+        with measure_stage('view'):
+            return self.view_creator_func(request, **kwargs)
+
+    def create_response(self, body, status):
+        with measure_stage('serialize'):
+            content = json.dumps(body) if body is not None else ''
         return HttpResponse(content, status=status, content_type='application/json')
 
+    def is_upload_too_large(self, request):
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return False
+        return content_length > settings.PICTURE_MAX_SIZE + self.upload_multipart_overhead
+
+    def upload_too_large_response(self):
+        exception = InvalidEntityException(source='picture', code='wrong_size',
+                                           message='Picture must be up to {} bytes'.format(settings.PICTURE_MAX_SIZE))
+        return HttpResponse(json.dumps(serialize_exception(exception)), status=413, content_type='application/json')
+
     def authenticate(self, request, **kwargs):
         authentication_header = request.META.get('HTTP_AUTHORIZATION')
         if authentication_header is None:
             return None
 
         access_token = authentication_header.replace('Token ', '')
-        return create_authenticate_interactor().set_params(access_token=access_token).execute()
+        with measure_stage('auth'):
+            return create_authenticate_interactor().set_params(access_token=access_token).execute()
 
 
 def client_versions(request):
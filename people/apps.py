@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_save, post_delete
 
 
 class PeopleConfig(AppConfig):
     name = 'people'
+
+    def ready(self):
+        from .models import ORMAuthToken, ORMBlock
+        from .factories import invalidate_cached_auth_token, invalidate_cached_blocked_people
+
+        post_save.connect(invalidate_cached_auth_token, sender=ORMAuthToken)
+        post_delete.connect(invalidate_cached_auth_token, sender=ORMAuthToken)
+        post_save.connect(invalidate_cached_blocked_people, sender=ORMBlock)
+        post_delete.connect(invalidate_cached_blocked_people, sender=ORMBlock)
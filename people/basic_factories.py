@@ -1,14 +1,26 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from pachatary.caches import LRUCache
+from pachatary.container import container
 from .repositories import PersonRepo, BlockRepo
 from .validators import PersonPermissionsValidator
 
 
+@container.stateless
 def create_person_repo():
     return PersonRepo()
 
 
+@container.stateless
 def create_block_repo():
-    return BlockRepo()
+    shared_cache = caches[settings.BLOCK_SHARED_CACHE] if settings.BLOCK_SHARED_CACHE else None
+    cache = LRUCache(max_size=settings.BLOCK_CACHE_SIZE, ttl=settings.BLOCK_CACHE_TTL,
+                     shared_cache=shared_cache, key_prefix='blocked_people:',
+                     local_ttl=settings.BLOCK_LOCAL_CACHE_TTL)
+    return BlockRepo(cache=cache)
 
 
+@container.stateless
 def create_person_permissions_validator():
     return PersonPermissionsValidator(person_repo=create_person_repo())
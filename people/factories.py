@@ -1,7 +1,11 @@
-import json
+import os
 
 from django.conf import settings
+from django.core.cache import caches
 
+from pachatary.caches import LRUCache
+from pachatary.container import container
+from pachatary.forbidden_words import ForbiddenWords
 from profiles.factories import create_profile_repo, create_profile_validator
 from experiences.factories import create_experience_repo, create_save_unsave_experience_interactor
 from .basic_factories import create_person_repo, create_person_permissions_validator, create_block_repo
@@ -12,32 +16,50 @@ from .interactors import CreateGuestPersonAndReturnAuthTokenInteractor, Register
 from .views import PeopleView, PersonView, EmailConfirmationView, LoginEmailView, LoginView, BlockView
 from .services import MailerService
 
+forbidden_email_domains = ForbiddenWords(paths=[
+    os.path.join(settings.BASE_DIR, 'people', 'forbidden_email_domains.json')])
 
+
+@container.stateless
 def create_auth_token_repo():
-    return AuthTokenRepo()
+    shared_cache = caches[settings.AUTH_TOKEN_SHARED_CACHE] if settings.AUTH_TOKEN_SHARED_CACHE else None
+    cache = LRUCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL,
+                     shared_cache=shared_cache, key_prefix='auth_token:',
+                     local_ttl=settings.AUTH_TOKEN_LOCAL_CACHE_TTL)
+    return AuthTokenRepo(cache=cache)
+
+
+def invalidate_cached_auth_token(sender, instance, **kwargs):
+    create_auth_token_repo().invalidate_access_token(str(instance.access_token))
 
 
+def invalidate_cached_blocked_people(sender, instance, **kwargs):
+    create_block_repo().invalidate_blocked_people(str(instance.creator_id))
+
+
+@container.stateless
 def create_confirmation_token_repo():
     return ConfirmationTokenRepo()
 
 
+@container.stateless
 def create_login_token_repo():
     return LoginTokenRepo()
 
 
+@container.stateless
 def create_client_secret_key_validator():
     return ClientSecretKeyValidator(valid_client_secret_key=settings.CLIENT_SECRET_KEY)
 
 
+@container.stateless
 def create_person_validator():
-    forbidden_email_domains_json = open('people/forbidden_email_domains.json')
-    forbidden_email_domains = json.load(forbidden_email_domains_json)
-
     person_repo = create_person_repo()
 
     return PersonValidator(forbidden_email_domains=forbidden_email_domains, person_repo=person_repo)
 
 
+@container.stateless
 def create_mailer_service():
     return MailerService()
 
@@ -35,8 +35,7 @@ class AuthenticateInteractor:
 
     def execute(self):
         try:
-            auth_token = self.auth_token_repo.get_auth_token(access_token=self.access_token)
-            return str(auth_token.person_id)
+            return str(self.auth_token_repo.get_person_id(access_token=self.access_token))
         except EntityDoesNotExistException:
             return None
 
@@ -36,6 +36,9 @@ class PersonRepo:
 
 class AuthTokenRepo:
 
+    def __init__(self, cache=None):
+        self.cache = cache
+
     def create_auth_token(self, person_id):
         created_orm_auth_token = ORMAuthToken.objects.create(person_id=person_id)
         return self._decode_db_auth_token(created_orm_auth_token)
@@ -50,6 +53,22 @@ class AuthTokenRepo:
         except ORMAuthToken.DoesNotExist:
             raise EntityDoesNotExistException
 
+    def get_person_id(self, access_token):
+        if self.cache is not None:
+            person_id = self.cache.get(access_token)
+            if person_id is not None:
+                return person_id
+
+        person_id = self.get_auth_token(access_token=access_token).person_id
+
+        if self.cache is not None:
+            self.cache.set(access_token, person_id)
+        return person_id
+
+    def invalidate_access_token(self, access_token):
+        if self.cache is not None:
+            self.cache.delete(access_token)
+
     def _decode_db_auth_token(self, db_auth_token):
         return AuthToken(person_id=str(db_auth_token.person_id),
                          access_token=str(db_auth_token.access_token),
@@ -92,11 +111,29 @@ class LoginTokenRepo:
 
 class BlockRepo:
 
+    def __init__(self, cache=None):
+        self.cache = cache
+
     def block(self, creator_id, target_id):
         ORMBlock.objects.create(creator_id=creator_id, target_id=target_id)
+        self.invalidate_blocked_people(creator_id)
 
     def block_exists(self, creator_id, target_id):
         return ORMBlock.objects.filter(creator_id=creator_id, target_id=target_id).exists()
 
     def get_blocked_people(self, person_id):
-        return [str(id) for id in ORMBlock.objects.filter(creator_id=person_id).values_list('target_id', flat=True)]
+        if self.cache is not None:
+            blocked_people = self.cache.get(str(person_id))
+            if blocked_people is not None:
+                return blocked_people
+
+        blocked_people = [str(id) for id in ORMBlock.objects.filter(creator_id=person_id)
+                                                            .values_list('target_id', flat=True)]
+
+        if self.cache is not None:
+            self.cache.set(str(person_id), blocked_people)
+        return blocked_people
+
+    def invalidate_blocked_people(self, person_id):
+        if self.cache is not None:
+            self.cache.delete(str(person_id))
@@ -1,3 +1,7 @@
+from pachatary.timings import measured
+
+
+@measured('serialize')
 def serialize_auth_token(auth_token):
     return {
                'access_token': auth_token.access_token,
@@ -2,6 +2,7 @@ import uuid
 
 from django.test import TestCase
 
+from pachatary.caches import LRUCache
 from pachatary.exceptions import EntityDoesNotExistException
 from people.models import ORMPerson, ORMAuthToken, ORMConfirmationToken, ORMLoginToken
 from people.repositories import PersonRepo, AuthTokenRepo, ConfirmationTokenRepo, LoginTokenRepo, BlockRepo
@@ -122,6 +123,28 @@ class AuthTokenRepoTestCase(TestCase):
                 .when_get_auth_token_with_wrong_access_token() \
                 .then_should_raise_entity_does_not_exist()
 
+    def test_get_person_id_is_cached(self):
+        AuthTokenRepoTestCase._ScenarioMaker() \
+                .given_a_person() \
+                .given_an_auth_token_for_that_person() \
+                .given_a_repo_with_cache() \
+                .when_get_person_id_with_access_token() \
+                .then_should_return_person_id() \
+                .when_auth_token_is_deleted_from_db() \
+                .when_get_person_id_with_access_token() \
+                .then_should_return_person_id()
+
+    def test_invalidated_access_token_is_read_from_db(self):
+        AuthTokenRepoTestCase._ScenarioMaker() \
+                .given_a_person() \
+                .given_an_auth_token_for_that_person() \
+                .given_a_repo_with_cache() \
+                .when_get_person_id_with_access_token() \
+                .when_auth_token_is_deleted_from_db() \
+                .when_access_token_is_invalidated() \
+                .when_get_person_id_with_access_token() \
+                .then_should_raise_entity_does_not_exist()
+
     class _ScenarioMaker:
 
         def __init__(self):
@@ -158,6 +181,25 @@ class AuthTokenRepoTestCase(TestCase):
                 self.error = e
             return self
 
+        def given_a_repo_with_cache(self):
+            self.repo = AuthTokenRepo(cache=LRUCache(max_size=10, ttl=60))
+            return self
+
+        def when_get_person_id_with_access_token(self):
+            try:
+                self.result = self.repo.get_person_id(access_token=self.auth_token.access_token)
+            except Exception as e:
+                self.error = e
+            return self
+
+        def when_auth_token_is_deleted_from_db(self):
+            ORMAuthToken.objects.filter(access_token=self.auth_token.access_token).delete()
+            return self
+
+        def when_access_token_is_invalidated(self):
+            self.repo.invalidate_access_token(self.auth_token.access_token)
+            return self
+
         def when_create_auth_token_for_that_person(self):
             try:
                 self.result = AuthTokenRepo().create_auth_token(person_id=self.person.id)
@@ -169,6 +211,10 @@ class AuthTokenRepoTestCase(TestCase):
             assert self.result == self.auth_token
             return self
 
+        def then_should_return_person_id(self):
+            assert self.result == self.person.id
+            return self
+
         def then_response_should_be_that_token(self):
             assert self.result.person_id == self.person.id
             assert type(self.result.access_token) is str
@@ -408,12 +454,32 @@ class BlockRepoTestCase(TestCase):
             .when_blocked_people(person=1) \
             .then_result_should_be_ids_from_people([])
 
+    def test_blocked_people_are_cached_until_a_new_block(self):
+        BlockRepoTestCase.ScenarioMaker() \
+            .given_a_repo_with_cache() \
+            .given_a_person() \
+            .given_a_person() \
+            .given_a_person() \
+            .given_a_block(creator=1, target=2) \
+            .when_blocked_people(person=1) \
+            .then_result_should_be_ids_from_people([2]) \
+            .when_blocked_people(person=1) \
+            .then_cache_hits_should_be(1) \
+            .given_a_block(creator=1, target=3) \
+            .when_blocked_people(person=1) \
+            .then_result_should_be_ids_from_people([2, 3])
+
     class ScenarioMaker:
 
         def __init__(self):
             self.repo = BlockRepo()
             self.persons = []
 
+        def given_a_repo_with_cache(self):
+            self.cache = LRUCache(max_size=10, ttl=60)
+            self.repo = BlockRepo(cache=self.cache)
+            return self
+
         def given_a_person(self):
             self.persons.append(PersonRepo().create_guest_person())
             return self
@@ -439,3 +505,8 @@ class BlockRepoTestCase(TestCase):
         def then_result_should_be_ids_from_people(self, people):
             people_ids = [self.persons[person-1].id for person in people]
             assert self.result == people_ids
+            return self
+
+        def then_cache_hits_should_be(self, hits):
+            assert self.cache.get_stats()['hits'] == hits
+            return self
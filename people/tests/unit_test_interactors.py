@@ -127,7 +127,7 @@ class TestAuthenticateInteractor:
                 .given_an_auth_token() \
                 .given_an_auth_repo_that_returns_that_auth_token() \
                 .when_authenticate_interactor_is_executed() \
-                .then_should_call_repo_get_auth_token_with_access_token() \
+                .then_should_call_repo_get_person_id_with_access_token() \
                 .then_should_return_auth_token_person_id()
 
     def test_wrong_access_token_returns_none(self):
@@ -155,20 +155,20 @@ class TestAuthenticateInteractor:
 
         def given_an_auth_repo_that_returns_that_auth_token(self):
             self.repo = Mock()
-            self.repo.get_auth_token.return_value = self.auth_token
+            self.repo.get_person_id.return_value = self.auth_token.person_id
             return self
 
         def given_an_auth_repo_that_raises_entity_does_not_exist(self):
             self.repo = Mock()
-            self.repo.get_auth_token.side_effect = EntityDoesNotExistException
+            self.repo.get_person_id.side_effect = EntityDoesNotExistException
             return self
 
         def when_authenticate_interactor_is_executed(self):
             self.result = AuthenticateInteractor(self.repo).set_params(access_token=self.access_token).execute()
             return self
 
-        def then_should_call_repo_get_auth_token_with_access_token(self):
-            self.repo.get_auth_token.assert_called_once_with(access_token=self.access_token)
+        def then_should_call_repo_get_person_id_with_access_token(self):
+            self.repo.get_person_id.assert_called_once_with(access_token=self.access_token)
             return self
 
         def then_should_return_auth_token_person_id(self):
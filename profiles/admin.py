@@ -1,4 +1,5 @@
 from django.contrib import admin
+from pachatary.factories import create_picture_variation_job_repo
 from .models import ORMProfile
 
 
@@ -6,5 +7,10 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ('person', 'username', 'bio')
     search_fields = ('person', 'username')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'picture' in form.changed_data and obj.picture:
+            create_picture_variation_job_repo().add_job(obj._meta.label, obj.id, obj.picture.name)
+
 
 admin.site.register(ORMProfile, ProfileAdmin)
@@ -1,7 +1,11 @@
-import json
+import os
 
 from django.conf import settings
 
+from pachatary.caches import LRUCache
+from pachatary.container import container
+from pachatary.factories import create_picture_validator, create_stored_picture_repo
+from pachatary.forbidden_words import ForbiddenWords
 from people.basic_factories import create_person_permissions_validator, create_block_repo
 from .repositories import ProfileRepo
 from .interactors import GetProfileInteractor, ModifyProfileInteractor, \
@@ -9,20 +13,22 @@ from .interactors import GetProfileInteractor, ModifyProfileInteractor, \
 from .views import ProfileView, UploadProfilePictureView
 from .validators import ProfileValidator
 
+forbidden_usernames = ForbiddenWords(paths=[
+    os.path.join(settings.BASE_DIR, 'profiles', 'generic_forbidden_usernames.json'),
+    os.path.join(settings.BASE_DIR, 'profiles', 'custom_forbidden_usernames.json')])
 
+
+@container.stateless
 def create_profile_repo():
-    return ProfileRepo()
+    suggest_cache = None
+    if settings.SUGGEST_CACHE_SIZE > 0:
+        suggest_cache = LRUCache(max_size=settings.SUGGEST_CACHE_SIZE, ttl=settings.SUGGEST_CACHE_TTL)
+    return ProfileRepo(suggest_cache=suggest_cache, stored_picture_repo=create_stored_picture_repo())
 
 
+@container.stateless
 def create_profile_validator():
     project_name = settings.PROJECT_NAME
-
-    generic_forbidden_usernames_json = open('profiles/generic_forbidden_usernames.json')
-    generic_forbidden_usernames = json.load(generic_forbidden_usernames_json)
-    custom_forbidden_usernames_json = open('profiles/custom_forbidden_usernames.json')
-    custom_forbidden_usernames = json.load(custom_forbidden_usernames_json)
-    forbidden_usernames = generic_forbidden_usernames + custom_forbidden_usernames
-
     profile_repo = create_profile_repo()
 
     return ProfileValidator(project_name=project_name, forbidden_usernames=forbidden_usernames,
@@ -41,7 +47,8 @@ def create_modify_profile_interactor():
 
 def create_upload_profile_picture_interactor():
     return UploadProfilePictureInteractor(profile_repo=create_profile_repo(),
-                                          permissions_validator=create_person_permissions_validator())
+                                          permissions_validator=create_person_permissions_validator(),
+                                          picture_validator=create_picture_validator())
 
 
 def create_profile_view(request, **kwargs):
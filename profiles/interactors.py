@@ -55,9 +55,10 @@ class ModifyProfileInteractor:
 
 class UploadProfilePictureInteractor:
 
-    def __init__(self, profile_repo, permissions_validator):
+    def __init__(self, profile_repo, permissions_validator, picture_validator):
         self.profile_repo = profile_repo
         self.permissions_validator = permissions_validator
+        self.picture_validator = picture_validator
 
     def set_params(self, picture, logged_person_id):
         self.picture = picture
@@ -66,4 +67,5 @@ class UploadProfilePictureInteractor:
 
     def execute(self):
         self.permissions_validator.validate_permissions(logged_person_id=self.logged_person_id)
+        self.picture_validator.validate_picture(self.picture)
         return self.profile_repo.attach_picture_to_profile(person_id=self.logged_person_id, picture=self.picture)
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ormprofile',
+            name='picture_is_processing',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -13,7 +13,10 @@ class ORMProfile(models.Model):
                             variations={'medium': (640, 640),
                                         'small': (320, 320),
                                         'tiny': (160, 160)},
+                            render_variations=False,
                             blank=True)
+    picture_is_processing = models.BooleanField(default=False)
+    picture_has_webp = models.BooleanField(default=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -1,11 +1,18 @@
+from django.db import transaction
+
+from experiences.models import ORMExperience, ORMExperienceIndexEvent
 from pachatary.exceptions import EntityDoesNotExistException
-from pachatary.entities import Picture
+from pachatary.pictures import build_picture
 from .models import ORMProfile
 from .entities import Profile
 
 
 class ProfileRepo:
 
+    def __init__(self, suggest_cache=None, stored_picture_repo=None):
+        self.suggest_cache = suggest_cache
+        self.stored_picture_repo = stored_picture_repo
+
     def get_profile(self, logged_person_id, person_id=None, username=None):
         try:
             if person_id is not None:
@@ -23,26 +30,48 @@ class ProfileRepo:
 
     def update_profile(self, profile):
         orm_profile = ORMProfile.objects.get(person_id=profile.person_id)
+        username_has_changed = orm_profile.username != profile.username
 
         orm_profile.username = profile.username
         orm_profile.bio = profile.bio
 
-        orm_profile.save()
+        with transaction.atomic():
+            orm_profile.save()
+            if username_has_changed:
+                experiences_ids = ORMExperience.objects.filter(author_id=orm_profile.person_id, is_deleted=False) \
+                                                       .values_list('id', flat=True)
+                ORMExperienceIndexEvent.objects.bulk_create([ORMExperienceIndexEvent(experience_id=experience_id)
+                                                             for experience_id in experiences_ids])
 
         return self._decode_db_profile(orm_profile, str(orm_profile.person_id))
 
     def attach_picture_to_profile(self, person_id, picture):
         profile = ORMProfile.objects.get(person_id=person_id)
-        profile.picture = picture
-        profile.save()
+        with self.stored_picture_repo.attach_picture(profile, picture):
+            pass
         return self._decode_db_profile(profile, str(profile.person_id))
 
+    def suggest_usernames(self, prefix, limit=5, excluded_people_ids=None):
+        prefix = prefix.strip().lower()
+        excluded_people_ids = sorted(set(excluded_people_ids or []))
+        key = (prefix, limit, tuple(excluded_people_ids))
+        if self.suggest_cache is not None:
+            usernames = self.suggest_cache.get(key)
+            if usernames is not None:
+                return usernames
+
+        usernames = list(ORMProfile.objects.filter(username__startswith=prefix)
+                                           .exclude(person_id__in=excluded_people_ids)
+                                           .order_by('username')
+                                           .values_list('username', flat=True)[0:limit])
+
+        if self.suggest_cache is not None:
+            self.suggest_cache.set(key, usernames)
+        return usernames
+
     def _decode_db_profile(self, db_profile, logged_person_id):
-        if not db_profile.picture:
-            picture = None
-        else:
-            picture = Picture(tiny_url=db_profile.picture.tiny.url,
-                              small_url=db_profile.picture.small.url,
-                              medium_url=db_profile.picture.medium.url)
+        picture = build_picture(db_profile.picture.name, ('tiny', 'small', 'medium'),
+                                is_processing=db_profile.picture_is_processing,
+                                has_webp=db_profile.picture_has_webp)
         return Profile(person_id=str(db_profile.person_id), username=db_profile.username, bio=db_profile.bio,
                        picture=picture, is_me=(logged_person_id == str(db_profile.person_id)))
@@ -1,6 +1,8 @@
 from pachatary.serializers import serialize_picture
+from pachatary.timings import measured
 
 
+@measured('serialize')
 def serialize_profile(profile):
     return {
                'username': profile.username,
@@ -1,5 +1,7 @@
 from django.test import TestCase
 
+from experiences.models import ORMExperience, ORMExperienceIndexEvent
+from pachatary.caches import LRUCache
 from pachatary.exceptions import EntityDoesNotExistException
 from people.repositories import PersonRepo
 from profiles.models import ORMProfile
@@ -24,6 +26,25 @@ class ProfileRepoTestCase(TestCase):
                 .then_result_should_be_profile(person=1, username='t', bio='o', is_me=True) \
                 .then_that_profile_should_be_saved_in_db(person=1, username='t', bio='o')
 
+    def test_update_username_enqueues_index_events_for_author_experiences(self):
+        ProfileRepoTestCase.ScenarioMaker() \
+                .given_a_person() \
+                .given_a_person() \
+                .given_a_profile(person=1, username='u', bio='b') \
+                .given_an_experience(person=1) \
+                .given_an_experience(person=1, is_deleted=True) \
+                .given_an_experience(person=2) \
+                .when_update_profile(person=1, username='t', bio='b') \
+                .then_index_events_should_be_for_experiences([1])
+
+    def test_update_only_bio_does_not_enqueue_index_events(self):
+        ProfileRepoTestCase.ScenarioMaker() \
+                .given_a_person() \
+                .given_a_profile(person=1, username='u', bio='b') \
+                .given_an_experience(person=1) \
+                .when_update_profile(person=1, username='u', bio='o') \
+                .then_index_events_should_be_for_experiences([])
+
     def test_get_profile_by_person_id(self):
         ProfileRepoTestCase.ScenarioMaker() \
                 .given_a_person() \
@@ -44,12 +65,50 @@ class ProfileRepoTestCase(TestCase):
                 .when_get_profile_from_username(username='none') \
                 .then_result_should_raise_entity_does_not_exist()
 
+    def test_suggest_usernames_by_prefix(self):
+        ProfileRepoTestCase.ScenarioMaker() \
+                .given_a_person() \
+                .given_a_profile(person=1, username='mountain.lover', bio='') \
+                .given_a_person() \
+                .given_a_profile(person=2, username='mount', bio='') \
+                .given_a_person() \
+                .given_a_profile(person=3, username='sea', bio='') \
+                .given_a_person() \
+                .given_a_profile(person=4, username='mountaineer', bio='') \
+                .when_suggest_usernames(' Moun', limit=2) \
+                .then_suggestions_should_be(['mount', 'mountain.lover'])
+
+    def test_suggest_usernames_excludes_people(self):
+        ProfileRepoTestCase.ScenarioMaker() \
+                .given_a_person() \
+                .given_a_profile(person=1, username='mount', bio='') \
+                .given_a_person() \
+                .given_a_profile(person=2, username='mountaineer', bio='') \
+                .when_suggest_usernames('moun', limit=5, excluded_people=[1]) \
+                .then_suggestions_should_be(['mountaineer'])
+
+    def test_suggest_usernames_are_cached(self):
+        ProfileRepoTestCase.ScenarioMaker() \
+                .given_a_repo_with_suggest_cache() \
+                .given_a_person() \
+                .given_a_profile(person=1, username='mount', bio='') \
+                .when_suggest_usernames('moun', limit=5) \
+                .given_a_person() \
+                .given_a_profile(person=2, username='mountaineer', bio='') \
+                .when_suggest_usernames('moun', limit=5) \
+                .then_suggestions_should_be(['mount'])
+
     class ScenarioMaker:
 
         def __init__(self):
             self.persons = []
+            self.experiences = []
             self.repo = ProfileRepo()
 
+        def given_a_repo_with_suggest_cache(self):
+            self.repo = ProfileRepo(suggest_cache=LRUCache(max_size=10, ttl=60))
+            return self
+
         def given_a_person(self):
             self.persons.append(PersonRepo().create_guest_person())
             return self
@@ -59,6 +118,11 @@ class ProfileRepoTestCase(TestCase):
             self.repo.create_profile(profile)
             return self
 
+        def given_an_experience(self, person, is_deleted=False):
+            self.experiences.append(ORMExperience.objects.create(title='t', author_id=self.persons[person-1].id,
+                                                                 is_deleted=is_deleted))
+            return self
+
         def when_create_profile(self, person, username, bio):
             profile = Profile(person_id=str(self.persons[person-1].id), username=username, bio=bio)
             self.result = self.repo.create_profile(profile)
@@ -92,6 +156,20 @@ class ProfileRepoTestCase(TestCase):
             assert db_profile.bio == bio
             return self
 
+        def then_index_events_should_be_for_experiences(self, experiences):
+            assert sorted(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == \
+                    sorted([self.experiences[experience-1].id for experience in experiences])
+            return self
+
         def then_result_should_raise_entity_does_not_exist(self):
             assert type(self.error) is EntityDoesNotExistException
             return self
+
+        def when_suggest_usernames(self, prefix, limit, excluded_people=None):
+            excluded_people_ids = [str(self.persons[person-1].id) for person in excluded_people or []]
+            self.result = self.repo.suggest_usernames(prefix, limit=limit, excluded_people_ids=excluded_people_ids)
+            return self
+
+        def then_suggestions_should_be(self, usernames):
+            assert self.result == usernames
+            return self
@@ -243,15 +243,35 @@ class TestUploadProfilePictureInteractor:
                 .given_a_profile_on_repo_attach_picture() \
                 .when_execute_interactor(picture='file') \
                 .then_should_validate_person(id='8') \
+                .then_should_validate_picture(picture='file') \
                 .then_should_call_repo_attach_picture(picture='file') \
                 .then_should_return_profile()
 
+    def test_invalid_picture_doesnt_attach_picture(self):
+        TestUploadProfilePictureInteractor.ScenarioMaker() \
+                .given_a_logged_person_id('8') \
+                .given_a_permissions_validator_that_validates(True) \
+                .given_a_picture_validator_that_raises(InvalidEntityException(source='picture', code='wrong_format',
+                                                                              message='Wrong format')) \
+                .given_a_profile_repo() \
+                .when_execute_interactor(picture='file') \
+                .then_should_validate_picture(picture='file') \
+                .then_should_not_call_repo_attach_picture() \
+                .then_should_raise(InvalidEntityException)
+
     class ScenarioMaker:
 
+        def __init__(self):
+            self.picture_validator = Mock()
+
         def given_a_logged_person_id(self, id):
             self.logged_person_id = id
             return self
 
+        def given_a_picture_validator_that_raises(self, exception):
+            self.picture_validator.validate_picture.side_effect = exception
+            return self
+
         def given_a_permissions_validator_that_validates(self, valid):
             self.permissions_validator = Mock()
             if valid:
@@ -273,7 +293,8 @@ class TestUploadProfilePictureInteractor:
         def when_execute_interactor(self, picture):
             try:
                 self.result = UploadProfilePictureInteractor(profile_repo=self.repo,
-                                                             permissions_validator=self.permissions_validator) \
+                                                             permissions_validator=self.permissions_validator,
+                                                             picture_validator=self.picture_validator) \
                     .set_params(picture=picture, logged_person_id=self.logged_person_id).execute()
             except Exception as e:
                 self.error = e
@@ -283,6 +304,10 @@ class TestUploadProfilePictureInteractor:
             self.repo.attach_picture_to_profile.assert_not_called()
             return self
 
+        def then_should_validate_picture(self, picture):
+            self.picture_validator.validate_picture.assert_called_once_with(picture)
+            return self
+
         def then_should_call_repo_attach_picture(self, picture):
             self.repo.attach_picture_to_profile.assert_called_once_with(person_id=self.logged_person_id,
                                                                         picture=picture)
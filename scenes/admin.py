@@ -1,4 +1,6 @@
 from django.contrib import admin
+from experiences.factories import create_experience_index_event_repo
+from pachatary.factories import create_picture_variation_job_repo
 from .models import ORMScene
 
 
@@ -6,5 +8,15 @@ class SceneAdmin(admin.ModelAdmin):
     list_display = ('title', 'experience')
     search_fields = ('title', 'description')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        create_experience_index_event_repo().add_events([obj.experience_id])
+        if 'picture' in form.changed_data and obj.picture:
+            create_picture_variation_job_repo().add_job(obj._meta.label, obj.id, obj.picture.name)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        create_experience_index_event_repo().add_events([obj.experience_id])
+
 
 admin.site.register(ORMScene, SceneAdmin)
@@ -1,20 +1,25 @@
+from pachatary.container import container
+from pachatary.factories import create_picture_validator, create_stored_picture_repo
 from experiences.factories import create_experience_repo, create_experience_permissions_validator, \
-        create_experience_elastic_repo, create_get_experience_interactor
+        create_experience_elastic_repo, create_get_experience_interactor, create_experience_index_event_repo
 from .repositories import SceneRepo
 from .interactors import GetScenesFromExperienceInteractor, CreateNewSceneInteractor, ModifySceneInteractor, \
-        UploadScenePictureInteractor, IndexExperiencesInteractor
+        UploadScenePictureInteractor, IndexExperiencesInteractor, ProcessExperienceIndexEventsInteractor
 from .validators import SceneValidator, ScenePermissionsValidator
 from .views import ScenesView, SceneView, UploadScenePictureView
 
 
+@container.stateless
 def create_scene_repo():
-    return SceneRepo()
+    return SceneRepo(stored_picture_repo=create_stored_picture_repo())
 
 
+@container.stateless
 def create_scene_validator():
     return SceneValidator(create_experience_repo())
 
 
+@container.stateless
 def create_scene_permissions_validator():
     return ScenePermissionsValidator(scene_repo=create_scene_repo(),
                                      experience_permissions_validator=create_experience_permissions_validator())
@@ -28,8 +33,7 @@ def create_get_scenes_from_experience_interactor():
 
 def create_create_new_scene_interactor():
     return CreateNewSceneInteractor(scene_repo=create_scene_repo(), scene_validator=create_scene_validator(),
-                                    permissions_validator=create_experience_permissions_validator(),
-                                    reindex_experience=reindex_experience)
+                                    permissions_validator=create_experience_permissions_validator())
 
 
 def create_modify_scene_interactor():
@@ -39,11 +43,8 @@ def create_modify_scene_interactor():
 
 def create_upload_scene_picture_interactor():
     return UploadScenePictureInteractor(scene_repo=create_scene_repo(),
-                                        permissions_validator=create_scene_permissions_validator())
-
-def reindex_experience(experience_id):
-    index_experience_interactor = create_index_experiences_interactor()
-    index_experience_interactor.set_params(from_id=experience_id, to_id=experience_id).execute()
+                                        permissions_validator=create_scene_permissions_validator(),
+                                        picture_validator=create_picture_validator())
 
 
 def create_index_experiences_interactor():
@@ -51,6 +52,12 @@ def create_index_experiences_interactor():
                                       create_scene_repo())
 
 
+def create_process_experience_index_events_interactor():
+    return ProcessExperienceIndexEventsInteractor(create_experience_index_event_repo(),
+                                                  create_index_experiences_interactor(),
+                                                  create_experience_repo(), create_experience_elastic_repo())
+
+
 def create_scenes_view(request, **kwargs):
     return ScenesView(get_scenes_from_experience_interactor=create_get_scenes_from_experience_interactor(),
                       create_new_scene_interactor=create_create_new_scene_interactor())
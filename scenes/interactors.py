@@ -1,4 +1,5 @@
-from pachatary.exceptions import EntityDoesNotExistException
+import time
+
 from .entities import Scene
 
 
@@ -27,11 +28,10 @@ class GetScenesFromExperienceInteractor:
 
 class CreateNewSceneInteractor:
 
-    def __init__(self, scene_repo, scene_validator, permissions_validator, reindex_experience):
+    def __init__(self, scene_repo, scene_validator, permissions_validator):
         self.scene_repo = scene_repo
         self.scene_validator = scene_validator
         self.permissions_validator = permissions_validator
-        self.reindex_experience = reindex_experience
 
     def set_params(self, title, description, latitude, longitude, experience_id, logged_person_id):
         self.title = title
@@ -48,11 +48,7 @@ class CreateNewSceneInteractor:
         scene = Scene(title=self.title, description=self.description,
                       latitude=self.latitude, longitude=self.longitude, experience_id=self.experience_id)
         self.scene_validator.validate_scene(scene)
-        created_scene = self.scene_repo.create_scene(scene)
-
-        self.reindex_experience(self.experience_id)
-
-        return created_scene
+        return self.scene_repo.create_scene(scene)
 
 
 class ModifySceneInteractor:
@@ -93,9 +89,10 @@ class ModifySceneInteractor:
 
 class UploadScenePictureInteractor:
 
-    def __init__(self, scene_repo, permissions_validator):
+    def __init__(self, scene_repo, permissions_validator, picture_validator):
         self.scene_repo = scene_repo
         self.permissions_validator = permissions_validator
+        self.picture_validator = picture_validator
 
     def set_params(self, scene_id, picture, logged_person_id):
         self.scene_id = scene_id
@@ -106,6 +103,7 @@ class UploadScenePictureInteractor:
     def execute(self):
         self.permissions_validator.validate_permissions(logged_person_id=self.logged_person_id,
                                                         has_permissions_to_modify_scene=self.scene_id)
+        self.picture_validator.validate_picture(self.picture)
         return self.scene_repo.attach_picture_to_scene(scene_id=self.scene_id, picture=self.picture)
 
 
@@ -116,19 +114,88 @@ class IndexExperiencesInteractor:
         self.experience_search_repo = experience_search_repo
         self.scene_repo = scene_repo
 
-    def set_params(self, from_id, to_id):
+    def set_params(self, from_id=None, to_id=None, ids=None, chunk_size=500, concurrency=1, index=None):
         self.from_id = from_id
         self.to_id = to_id
+        self.ids = ids
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.index = index
+        return self
+
+    def execute(self):
+        started_at = time.monotonic()
+        stats = {'indexed': 0, 'deleted': 0, 'failed': 0, 'failed_ids': []}
+        for chunk_ids in self._get_chunks_ids():
+            experiences = self.experience_repo.get_experiences_by_ids(chunk_ids)
+            scenes_by_experience = self.scene_repo.get_scenes_of_experiences([x.id for x in experiences])
+
+            experiences_and_scenes = [(experience, scenes_by_experience[experience.id])
+                                      for experience in experiences if experience.id in scenes_by_experience]
+            indexed_ids = set([experience.id for experience, _ in experiences_and_scenes])
+            deleted_ids = [experience_id for experience_id in self._get_deletable_ids(chunk_ids)
+                           if experience_id not in indexed_ids]
+
+            chunk_stats = self.experience_search_repo.bulk_index_experiences(experiences_and_scenes, deleted_ids,
+                                                                             chunk_size=self.chunk_size,
+                                                                             concurrency=self.concurrency,
+                                                                             index=self.index)
+            for key in stats:
+                stats[key] += chunk_stats[key]
+
+        stats['seconds'] = time.monotonic() - started_at
+        return stats
+
+    def _get_deletable_ids(self, chunk_ids):
+        if self.ids is not None:
+            return chunk_ids
+        if self.index is not None:
+            return []
+        return self.experience_repo.get_existing_experiences_ids(chunk_ids)
+
+    def _get_chunks_ids(self):
+        if self.ids is not None:
+            ids = [str(experience_id) for experience_id in self.ids]
+            for i in range(0, len(ids), self.chunk_size):
+                yield ids[i:i + self.chunk_size]
+        else:
+            to_id = int(self.to_id)
+            for chunk_from_id in range(int(self.from_id), to_id + 1, self.chunk_size):
+                yield [str(i) for i in range(chunk_from_id, min(chunk_from_id + self.chunk_size, to_id + 1))]
+
+
+class ProcessExperienceIndexEventsInteractor:
+
+    def __init__(self, index_event_repo, index_experiences_interactor, experience_repo, experience_search_repo):
+        self.index_event_repo = index_event_repo
+        self.index_experiences_interactor = index_experiences_interactor
+        self.experience_repo = experience_repo
+        self.experience_search_repo = experience_search_repo
+
+    def set_params(self, batch_size=1000):
+        self.batch_size = batch_size
         return self
 
     def execute(self):
-        for i in range(int(self.from_id), int(self.to_id) + 1):
-            try:
-                experience = self.experience_repo.get_experience(str(i))
-                scenes = self.scene_repo.get_scenes(str(i))
-                if len(scenes) > 0:
-                    self.experience_search_repo.index_experience_and_its_scenes(experience, scenes)
-                else:
-                    self.experience_search_repo.delete_experience(str(i))
-            except EntityDoesNotExistException:
-                self.experience_search_repo.delete_experience(str(i))
+        pending_events = self.index_event_repo.get_pending_events(limit=self.batch_size)
+        if len(pending_events['events_ids']) == 0:
+            return {'events': 0, 'indexed': 0, 'deleted': 0, 'updated': 0, 'failed': 0}
+
+        stats = {'indexed': 0, 'deleted': 0, 'updated': 0, 'failed': 0}
+        failed_ids = []
+        if len(pending_events['experiences_ids']) > 0:
+            index_stats = self.index_experiences_interactor.set_params(ids=pending_events['experiences_ids']).execute()
+            for key in ['indexed', 'deleted', 'failed']:
+                stats[key] = index_stats[key]
+            failed_ids.extend(index_stats['failed_ids'])
+        if len(pending_events['saves_counts_experiences_ids']) > 0:
+            saves_counts = self.experience_repo.get_saves_counts(pending_events['saves_counts_experiences_ids'])
+            update_stats = self.experience_search_repo.bulk_update_saves_counts(saves_counts)
+            stats['updated'] = update_stats['updated']
+            stats['failed'] += update_stats['failed']
+            failed_ids.extend(update_stats['failed_ids'])
+
+        self.index_event_repo.finish_events(pending_events['events_ids'], failed_experiences_ids=failed_ids)
+
+        stats['events'] = len(pending_events['events_ids'])
+        return stats
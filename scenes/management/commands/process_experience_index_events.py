@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from scenes.factories import create_process_experience_index_events_interactor
+
+
+class Command(BaseCommand):
+    help = 'Index experiences marked as changed on search engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Events processed per iteration')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when there are no events')
+        parser.add_argument('--once', action='store_true', help='Process pending events and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = create_process_experience_index_events_interactor() \
+                    .set_params(batch_size=options['batch_size']).execute()
+            if stats['events'] > 0:
+                self.stdout.write('{} events | indexed {} deleted {} updated {} failed {}'.format(
+                    stats['events'], stats['indexed'], stats['deleted'], stats['updated'], stats['failed']))
+
+            if stats['events'] < options['batch_size'] or stats['failed'] > 0:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
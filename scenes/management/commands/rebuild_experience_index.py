@@ -0,0 +1,46 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from experiences.factories import create_experience_elastic_repo, create_experience_index_event_repo
+from experiences.repositories import ExperienceSearchRepo
+
+
+class Command(BaseCommand):
+    help = 'Rebuild experiences search index into a new index and switch aliases to it without downtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+        parser.add_argument('--concurrency', type=int, default=1, help='Bulk request threads per worker')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Experiences per bulk request')
+        parser.add_argument('--delete-old', action='store_true', help='Delete previous indices after the switch')
+
+    def handle(self, *args, **options):
+        search_repo = create_experience_elastic_repo()
+        index_event_repo = create_experience_index_event_repo()
+        reindex_options = {'workers': options['workers'], 'concurrency': options['concurrency'],
+                           'chunk_size': options['chunk_size'], 'stdout': self.stdout, 'stderr': self.stderr}
+
+        started_at = timezone.now()
+        last_event_id = index_event_repo.get_last_event_id()
+        index = search_repo.create_experience_index(bulk_loading=True)
+        self.stdout.write('Created index {}'.format(index))
+
+        call_command('reindex_all_experiences', index=index, **reindex_options)
+        search_repo.finish_bulk_loading(index)
+
+        if timezone.now() - started_at >= index_event_repo.retention:
+            raise CommandError('Rebuild took longer than index events retention, changes since {} are lost. '
+                               'Increase EXPERIENCE_INDEX_EVENT_RETENTION_DAYS and run it again'.format(started_at))
+        search_repo.switch_aliases(index, [ExperienceSearchRepo.EXPERIENCE_WRITE_INDEX])
+        self.stdout.write('Writes switched to {}, catching up changes after event {}'.format(index, last_event_id))
+        call_command('reindex_all_experiences', index=index, after_event=last_event_id, **reindex_options)
+
+        old_indices = search_repo.switch_aliases(index, [ExperienceSearchRepo.EXPERIENCE_INDEX])
+        self.stdout.write('Reads switched to {}'.format(index))
+
+        if options['delete_old']:
+            search_repo.delete_indices(old_indices)
+            self.stdout.write('Deleted old indices {}'.format(', '.join(old_indices)))
+
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt experience index'))
@@ -1,10 +1,142 @@
+import datetime
+import json
+import multiprocessing
+import os
+import time
+
 from django.core.management.base import BaseCommand, CommandError
-from scenes.factories import create_index_experiences_interactor
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from experiences.factories import create_experience_repo, create_experience_index_event_repo
+from scenes.factories import create_index_experiences_interactor, create_scene_repo
+
+
+def index_segment(segment):
+    key, params = segment
+    stats = create_index_experiences_interactor().set_params(**params).execute()
+    return key, stats
+
 
 class Command(BaseCommand):
-    help = 'Reindex all words on search engine'
+    help = 'Reindex all experiences on search engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only experiences or scenes updated since this date or datetime')
+        parser.add_argument('--after-event', type=int, help='Only experiences with index events after this event id')
+        parser.add_argument('--workers', type=int, default=1, help='Worker processes')
+        parser.add_argument('--concurrency', type=int, default=1, help='Bulk request threads per worker')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Experiences per bulk request')
+        parser.add_argument('--segment-size', type=int, default=10000, help='Experience ids per checkpoint')
+        parser.add_argument('--checkpoint', help='File to record finished segments and resume from')
+        parser.add_argument('--index', help='New physical index to fill instead of the write alias')
 
     def handle(self, *args, **options):
-        create_index_experiences_interactor().set_params(from_id='0', to_id='100').execute()
+        segment_size = options['segment_size']
+        params = {'chunk_size': options['chunk_size'], 'concurrency': options['concurrency'],
+                  'index': options['index']}
+
+        if options['after_event'] is not None:
+            ids = create_experience_index_event_repo().get_experiences_ids_with_events_after(options['after_event'])
+            segments, total_ids = self._get_ids_segments(ids, segment_size, params)
+        elif options['since'] is not None:
+            segments, total_ids = self._get_updated_since_segments(options['since'], segment_size, params)
+        else:
+            segments, total_ids = self._get_range_segments(segment_size, params)
+
+        done = self._load_checkpoint(options['checkpoint'], options['since'], options['after_event'], segment_size)
+        pending_segments = [segment for segment in segments if segment[0] not in done]
+        segments_ids_count = {key: self._count_ids(segment_params) for key, segment_params in segments}
+        remaining_ids = sum([segments_ids_count[key] for key, _ in pending_segments])
+        skipped_ids = total_ids - remaining_ids
+        if skipped_ids > 0:
+            self.stdout.write('Resuming, {} ids already indexed'.format(skipped_ids))
+
+        totals = {'indexed': 0, 'deleted': 0, 'failed': 0}
+        processed_ids = 0
+        started_at = time.monotonic()
+        for key, stats in self._run(pending_segments, options['workers']):
+            if stats['failed'] == 0:
+                done.add(key)
+                self._save_checkpoint(options['checkpoint'], options['since'], options['after_event'], segment_size,
+                                      done)
+            for stat in totals:
+                totals[stat] += stats[stat]
+            processed_ids += segments_ids_count[key]
 
+            elapsed = time.monotonic() - started_at
+            docs_per_second = (totals['indexed'] + totals['deleted']) / elapsed if elapsed > 0 else 0
+            ids_per_second = processed_ids / elapsed if elapsed > 0 else 0
+            eta = (remaining_ids - processed_ids) / ids_per_second if ids_per_second > 0 else 0
+            self.stdout.write('{}/{} ids | indexed {} deleted {} failed {} | {:.0f} docs/s | ETA {:.0f}s'.format(
+                skipped_ids + processed_ids, total_ids, totals['indexed'], totals['deleted'], totals['failed'],
+                docs_per_second, eta))
+
+        if totals['failed'] > 0:
+            raise CommandError('{} experiences failed to index'.format(totals['failed']))
         self.stdout.write(self.style.SUCCESS('Successfully reindexed all experiences'))
+
+    def _get_range_segments(self, segment_size, params):
+        ids_range = create_experience_repo().get_experiences_ids_range()
+        if ids_range is None:
+            return [], 0
+        from_id, to_id = int(ids_range[0]), int(ids_range[1])
+        segments = []
+        for segment_from_id in range(from_id, to_id + 1, segment_size):
+            segment_to_id = min(segment_from_id + segment_size - 1, to_id)
+            segments.append((str(segment_from_id),
+                             dict(params, from_id=str(segment_from_id), to_id=str(segment_to_id))))
+        return segments, to_id - from_id + 1
+
+    def _get_updated_since_segments(self, since, segment_size, params):
+        since_datetime = parse_datetime(since)
+        if since_datetime is None:
+            since_date = parse_date(since)
+            if since_date is None:
+                raise CommandError('Invalid --since date: {}'.format(since))
+            since_datetime = datetime.datetime.combine(since_date, datetime.time.min)
+        if timezone.is_naive(since_datetime):
+            since_datetime = timezone.make_aware(since_datetime)
+        ids = set(create_experience_repo().get_experiences_ids_updated_since(since_datetime))
+        ids.update(create_scene_repo().get_experiences_ids_with_scenes_updated_since(since_datetime))
+        return self._get_ids_segments(sorted(ids, key=int), segment_size, params)
+
+    def _get_ids_segments(self, ids, segment_size, params):
+        segments = [(ids[i], dict(params, ids=ids[i:i + segment_size])) for i in range(0, len(ids), segment_size)]
+        return segments, len(ids)
+
+    def _count_ids(self, params):
+        if params.get('ids') is not None:
+            return len(params['ids'])
+        return int(params['to_id']) - int(params['from_id']) + 1
+
+    def _run(self, segments, workers):
+        if workers <= 1:
+            for segment in segments:
+                yield index_segment(segment)
+        else:
+            connections.close_all()
+            with multiprocessing.Pool(workers) as pool:
+                for result in pool.imap_unordered(index_segment, segments):
+                    yield result
+
+    def _load_checkpoint(self, path, since, after_event, segment_size):
+        if path is None or not os.path.exists(path):
+            return set()
+        with open(path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint['since'] != since or checkpoint.get('after_event') != after_event or \
+                checkpoint['segment_size'] != segment_size:
+            raise CommandError('Checkpoint {} was created with other --since, --after-event or --segment-size'
+                               .format(path))
+        return set(checkpoint['done'])
+
+    def _save_checkpoint(self, path, since, after_event, segment_size, done):
+        if path is None:
+            return
+        tmp_path = '{}.tmp'.format(path)
+        with open(tmp_path, 'w') as checkpoint_file:
+            json.dump({'since': since, 'after_event': after_event, 'segment_size': segment_size,
+                       'done': sorted(done, key=int)}, checkpoint_file)
+        os.replace(tmp_path, path)
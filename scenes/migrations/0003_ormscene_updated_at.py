@@ -0,0 +1,20 @@
+# Generated by Django 2.2.10 on 2026-10-18 15:02
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenes', '0002_title_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ormscene',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.10 on 2026-10-18 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenes', '0004_ormscene_picture_is_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ormscene',
+            name='picture_has_webp',
+            field=models.BooleanField(default=False),
+        ),
+    ]
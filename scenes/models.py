@@ -12,12 +12,16 @@ class ORMScene(models.Model):
                             variations={'large': (1280, 1280),
                                         'medium': (640, 640),
                                         'small': (320, 320)},
+                            render_variations=False,
                             blank=True)
+    picture_is_processing = models.BooleanField(default=False)
+    picture_has_webp = models.BooleanField(default=False)
     latitude = models.DecimalField(max_digits=10, decimal_places=8)
     longitude = models.DecimalField(max_digits=11, decimal_places=8)
     experience = models.ForeignKey(ORMExperience, on_delete=models.CASCADE)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = 'Scene'
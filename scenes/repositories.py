@@ -1,11 +1,17 @@
-from pachatary.entities import Picture
+from django.db import transaction
+
+from pachatary.pictures import build_picture
 from pachatary.exceptions import EntityDoesNotExistException
+from experiences.models import ORMExperienceIndexEvent
 from .models import ORMScene
 from .entities import Scene
 
 
 class SceneRepo:
 
+    def __init__(self, stored_picture_repo=None):
+        self.stored_picture_repo = stored_picture_repo
+
     def get_scenes(self, experience_id):
         db_scenes = ORMScene.objects.filter(experience_id=experience_id)
         scenes = []
@@ -13,6 +19,20 @@ class SceneRepo:
             scenes.append(self._decode_db_scene(db_scene))
         return scenes
 
+    def get_scenes_of_experiences(self, experiences_ids):
+        scenes_by_experience = {}
+        for db_scene in ORMScene.objects.filter(experience_id__in=experiences_ids).order_by('id').iterator():
+            scene = self._decode_db_scene(db_scene)
+            scenes_by_experience.setdefault(scene.experience_id, []).append(scene)
+        return scenes_by_experience
+
+    def get_experiences_ids_with_scenes_updated_since(self, since):
+        experiences_ids = ORMScene.objects.filter(updated_at__gte=since) \
+                                          .order_by('experience_id') \
+                                          .values_list('experience_id', flat=True) \
+                                          .distinct()
+        return [str(experience_id) for experience_id in experiences_ids]
+
     def get_scene(self, id):
         try:
             orm_scene = ORMScene.objects.get(id=id)
@@ -22,15 +42,18 @@ class SceneRepo:
         return self._decode_db_scene(orm_scene)
 
     def create_scene(self, scene):
-        created_orm_scene = ORMScene.objects.create(title=scene.title,
-                                                    description=scene.description,
-                                                    latitude=scene.latitude,
-                                                    longitude=scene.longitude,
-                                                    experience_id=scene.experience_id)
+        with transaction.atomic():
+            created_orm_scene = ORMScene.objects.create(title=scene.title,
+                                                        description=scene.description,
+                                                        latitude=scene.latitude,
+                                                        longitude=scene.longitude,
+                                                        experience_id=scene.experience_id)
+            ORMExperienceIndexEvent.objects.create(experience_id=created_orm_scene.experience_id)
         return self._decode_db_scene(created_orm_scene)
 
     def update_scene(self, scene):
         orm_scene = ORMScene.objects.get(id=scene.id)
+        dirty_experiences_ids = set([orm_scene.experience_id, int(scene.experience_id)])
 
         orm_scene.title = scene.title
         orm_scene.description = scene.description
@@ -38,22 +61,22 @@ class SceneRepo:
         orm_scene.longitude = scene.longitude
         orm_scene.experience_id = scene.experience_id
 
-        orm_scene.save()
+        with transaction.atomic():
+            orm_scene.save()
+            ORMExperienceIndexEvent.objects.bulk_create([ORMExperienceIndexEvent(experience_id=experience_id)
+                                                         for experience_id in dirty_experiences_ids])
         return self._decode_db_scene(orm_scene)
 
     def attach_picture_to_scene(self, scene_id, picture):
         scene = ORMScene.objects.get(id=scene_id)
-        scene.picture = picture
-        scene.save()
+        with self.stored_picture_repo.attach_picture(scene, picture):
+            ORMExperienceIndexEvent.objects.create(experience_id=scene.experience_id)
         return self._decode_db_scene(scene)
 
     def _decode_db_scene(self, db_scene):
-        if not db_scene.picture:
-            picture = None
-        else:
-            picture = Picture(small_url=db_scene.picture.small.url,
-                              medium_url=db_scene.picture.medium.url,
-                              large_url=db_scene.picture.large.url)
+        picture = build_picture(db_scene.picture.name, ('small', 'medium', 'large'),
+                                is_processing=db_scene.picture_is_processing,
+                                has_webp=db_scene.picture_has_webp)
 
         return Scene(id=str(db_scene.id),
                      title=db_scene.title,
@@ -1,10 +1,13 @@
 from pachatary.serializers import serialize_picture
+from pachatary.timings import measured
 
 
+@measured('serialize')
 def serialize_multiple_scenes(scenes):
     return [serialize_scene(scene) for scene in scenes]
 
 
+@measured('serialize')
 def serialize_scene(scene):
     return {
                'id': str(scene.id),
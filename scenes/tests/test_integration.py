@@ -2,10 +2,10 @@ import json
 from decimal import Decimal
 import urllib.parse
 
-from django.test import TestCase, Client, tag
+from django.test import TestCase, Client
 from django.urls import reverse
 
-from experiences.models import ORMExperience
+from experiences.models import ORMExperience, ORMExperienceIndexEvent
 from scenes.models import ORMScene
 from profiles.models import ORMProfile
 from people.models import ORMPerson, ORMAuthToken, ORMBlock
@@ -83,7 +83,6 @@ class ExperienceDetailTestCase(TestCase):
 
 class CreateSceneTestCase(TestCase):
 
-    @tag('elasticsearch')
     def test_create_scene_creates_and_returns_scene(self):
         orm_person = ORMPerson.objects.create()
         orm_auth_token = ORMAuthToken.objects.create(person=orm_person)
@@ -113,6 +112,7 @@ class CreateSceneTestCase(TestCase):
                            'longitude': 1.2,
                            'experience_id': str(experience.id),
                        }
+        assert ORMExperienceIndexEvent.objects.filter(experience_id=experience.id).exists()
 
     def test_wrong_attributes_doesnt_create_and_returns_error(self):
         orm_person = ORMPerson.objects.create()
@@ -1,8 +1,10 @@
+from datetime import timedelta
 from decimal import Decimal
 
 from django.test import TestCase
+from django.utils import timezone
 
-from experiences.models import ORMExperience
+from experiences.models import ORMExperience, ORMExperienceIndexEvent
 from scenes.models import ORMScene
 from scenes.repositories import SceneRepo
 from scenes.entities import Scene
@@ -30,6 +32,47 @@ class ExperienceRepoTestCase(TestCase):
                         latitude=Decimal('5.6'), longitude=Decimal('-7.8'), experience_id=str(orm_exp.id))
         assert result == [scene_1, scene_2] or result == [scene_2, scene_1]
 
+    def test_get_scenes_of_experiences_groups_them_by_experience(self):
+        orm_person = ORMPerson.objects.create()
+        orm_exp = ORMExperience.objects.create(title='Exp a', description='some description', author=orm_person)
+        orm_exp_2 = ORMExperience.objects.create(title='B', description='', author=orm_person)
+        orm_exp_3 = ORMExperience.objects.create(title='C', description='', author=orm_person)
+        orm_sce_1 = ORMScene.objects.create(title='S1', description='desc 1', latitude=Decimal('1.2'),
+                                            longitude=Decimal('-3.4'), experience=orm_exp)
+        orm_sce_2 = ORMScene.objects.create(title='S2', description='desc 2', latitude=Decimal('5.6'),
+                                            longitude=Decimal('-7.8'), experience=orm_exp_2)
+        orm_sce_3 = ORMScene.objects.create(title='S3', description='desc 3', latitude=Decimal('9.1'),
+                                            longitude=Decimal('-2.3'), experience=orm_exp)
+        ORMScene.objects.create(title='other', description='not requested',
+                                latitude=Decimal('5.6'), longitude=Decimal('-7.8'), experience=orm_exp_3)
+
+        result = SceneRepo().get_scenes_of_experiences([str(orm_exp.id), str(orm_exp_2.id)])
+
+        assert result == {
+            str(orm_exp.id): [SceneRepo()._decode_db_scene(orm_sce_1), SceneRepo()._decode_db_scene(orm_sce_3)],
+            str(orm_exp_2.id): [SceneRepo()._decode_db_scene(orm_sce_2)],
+        }
+
+    def test_get_experiences_ids_with_scenes_updated_since(self):
+        orm_person = ORMPerson.objects.create()
+        orm_exp = ORMExperience.objects.create(title='Exp a', description='', author=orm_person)
+        orm_exp_2 = ORMExperience.objects.create(title='B', description='', author=orm_person)
+        orm_exp_3 = ORMExperience.objects.create(title='C', description='', author=orm_person)
+        ORMScene.objects.create(title='S1', description='', latitude=Decimal('1.2'),
+                                longitude=Decimal('-3.4'), experience=orm_exp)
+        ORMScene.objects.create(title='S2', description='', latitude=Decimal('1.2'),
+                                longitude=Decimal('-3.4'), experience=orm_exp)
+        ORMScene.objects.create(title='S3', description='', latitude=Decimal('1.2'),
+                                longitude=Decimal('-3.4'), experience=orm_exp_3)
+        old_scene = ORMScene.objects.create(title='S4', description='', latitude=Decimal('1.2'),
+                                            longitude=Decimal('-3.4'), experience=orm_exp_2)
+        since = timezone.now() - timedelta(days=1)
+        ORMScene.objects.filter(id=old_scene.id).update(updated_at=since - timedelta(days=1))
+
+        result = SceneRepo().get_experiences_ids_with_scenes_updated_since(since)
+
+        assert result == [str(orm_exp.id), str(orm_exp_3.id)]
+
     def test_create_new_scene(self):
         orm_person = ORMPerson.objects.create()
         orm_exp = ORMExperience.objects.create(title='Exp a', description='some description', author=orm_person)
@@ -46,6 +89,7 @@ class ExperienceRepoTestCase(TestCase):
         assert scene.longitude == orm_scene.longitude
         assert scene.experience_id == str(orm_scene.experience_id)
         assert not orm_scene.picture
+        assert list(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == [orm_exp.id]
 
     def test_update_scene(self):
         orm_person = ORMPerson.objects.create()
@@ -68,6 +112,22 @@ class ExperienceRepoTestCase(TestCase):
         assert updated_scene.longitude == orm_scene.longitude
         assert updated_scene.experience_id == str(orm_scene.experience_id)
         assert not orm_scene.picture
+        assert list(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == \
+            [orm_exp.id, orm_exp.id]
+
+    def test_update_scene_to_other_experience_marks_both_experiences(self):
+        orm_person = ORMPerson.objects.create()
+        orm_exp = ORMExperience.objects.create(title='Exp a', description='some description', author=orm_person)
+        orm_exp_2 = ORMExperience.objects.create(title='Exp b', description='other description', author=orm_person)
+        orm_scene = ORMScene.objects.create(title='S1', description='desc 1', latitude=Decimal('1.2'),
+                                            longitude=Decimal('-3.4'), experience=orm_exp)
+
+        SceneRepo().update_scene(Scene(id=str(orm_scene.id), title='S1', description='desc 1',
+                                       latitude=Decimal('1.2'), longitude=Decimal('-3.4'),
+                                       experience_id=str(orm_exp_2.id)))
+
+        assert sorted(ORMExperienceIndexEvent.objects.values_list('experience_id', flat=True)) == \
+            sorted([orm_exp.id, orm_exp_2.id])
 
     def test_get_scene(self):
         orm_person = ORMPerson.objects.create()
@@ -3,7 +3,7 @@ from mock import Mock, call
 from pachatary.exceptions import InvalidEntityException, EntityDoesNotExistException, NoLoggedException, \
         NoPermissionException
 from scenes.interactors import GetScenesFromExperienceInteractor, CreateNewSceneInteractor, ModifySceneInteractor, \
-        UploadScenePictureInteractor, IndexExperiencesInteractor
+        UploadScenePictureInteractor, IndexExperiencesInteractor, ProcessExperienceIndexEventsInteractor
 from scenes.entities import Scene
 from experiences.entities import Experience
 
@@ -118,12 +118,10 @@ class TestCreateNewScene:
                 .given_an_scene_validator_that_accepts_that_scene() \
                 .given_an_scene() \
                 .given_an_scene_repo_that_returns_scene_on_create() \
-                .given_an_reindex_experience_method() \
                 .when_interactor_is_executed() \
                 .then_validate_permissions_is_called_with_logged_person_id_and_experience_id() \
                 .then_validate_scene_is_called_with_previous_params() \
                 .then_create_scene_is_called_with_previous_params() \
-                .then_should_call_reindex_experience_method_with_experience_id() \
                 .then_result_should_be_scene()
 
     def test_invalid_scene_returns_error_and_doesnt_create_it(self):
@@ -137,7 +135,6 @@ class TestCreateNewScene:
                 .given_an_experience_id() \
                 .given_an_scene_validator_that_raises_invalid_params() \
                 .given_an_scene_repo() \
-                .given_an_reindex_experience_method() \
                 .when_interactor_is_executed() \
                 .then_validate_permissions_is_called_with_logged_person_id_and_experience_id() \
                 .then_validate_scene_is_called_with_previous_params() \
@@ -155,7 +152,6 @@ class TestCreateNewScene:
                 .given_an_experience_id() \
                 .given_an_scene_validator_that_raises_invalid_params() \
                 .given_an_scene_repo() \
-                .given_an_reindex_experience_method() \
                 .when_interactor_is_executed() \
                 .then_validate_permissions_is_called_with_logged_person_id_and_experience_id() \
                 .then_create_scene_should_not_be_called() \
@@ -177,10 +173,6 @@ class TestCreateNewScene:
             self.permissions_validator.validate_permissions.side_effect = NoPermissionException()
             return self
 
-        def given_an_reindex_experience_method(self):
-            self.reindex_experience = Mock()
-            return self
-
         def given_a_title(self):
             self.title = 'Title'
             return self
@@ -227,7 +219,7 @@ class TestCreateNewScene:
         def when_interactor_is_executed(self):
             try:
                 self.result = CreateNewSceneInteractor(self.scene_repo, self.scene_validator,
-                                                       self.permissions_validator, self.reindex_experience) \
+                                                       self.permissions_validator) \
                     .set_params(title=self.title, description=self.description, latitude=self.latitude,
                                 longitude=self.longitude, experience_id=self.experience_id,
                                 logged_person_id=self.logged_person_id).execute()
@@ -271,10 +263,6 @@ class TestCreateNewScene:
             assert type(self.error) is NoPermissionException
             return self
 
-        def then_should_call_reindex_experience_method_with_experience_id(self):
-            self.reindex_experience.assert_called_once_with(self.experience_id)
-            return self
-
 
 class TestModifyScene:
 
@@ -458,8 +446,10 @@ class TestUploadScenePictureInteractor:
                 .given_an_scene_repo_that_returns_that_scene_on_attach() \
                 .given_an_scene_id() \
                 .given_a_picture() \
+                .given_a_picture_validator_that_accepts() \
                 .when_interactor_is_executed() \
                 .then_should_validate_permissions() \
+                .then_should_validate_picture() \
                 .then_should_call_repo_attach_picture_to_scene() \
                 .then_should_return_scene()
 
@@ -470,11 +460,25 @@ class TestUploadScenePictureInteractor:
                 .given_an_scene_repo() \
                 .given_an_scene_id() \
                 .given_a_picture() \
+                .given_a_picture_validator_that_accepts() \
                 .when_interactor_is_executed() \
                 .then_should_validate_permissions() \
                 .then_should_not_call_repo_attach_picture_to_scene() \
                 .then_should_raise_no_permissions_exception()
 
+    def test_invalid_picture_doesnt_attach_picture(self):
+        TestUploadScenePictureInteractor.ScenarioMaker() \
+                .given_a_logged_person_id() \
+                .given_a_permissions_validator_that_returns_true() \
+                .given_an_scene_repo() \
+                .given_an_scene_id() \
+                .given_a_picture() \
+                .given_a_picture_validator_that_rejects() \
+                .when_interactor_is_executed() \
+                .then_should_validate_picture() \
+                .then_should_not_call_repo_attach_picture_to_scene() \
+                .then_should_raise_invalid_picture_exception()
+
     class ScenarioMaker:
 
         def given_a_logged_person_id(self):
@@ -512,10 +516,22 @@ class TestUploadScenePictureInteractor:
             self.picture = 'pic'
             return self
 
+        def given_a_picture_validator_that_accepts(self):
+            self.picture_validator = Mock()
+            return self
+
+        def given_a_picture_validator_that_rejects(self):
+            self.picture_validator = Mock()
+            self.picture_validator.validate_picture.side_effect = InvalidEntityException(source='picture',
+                                                                                         code='wrong_size',
+                                                                                         message='Too big')
+            return self
+
         def when_interactor_is_executed(self):
             try:
                 interactor = UploadScenePictureInteractor(scene_repo=self.scene_repo,
-                                                          permissions_validator=self.permissions_validator)
+                                                          permissions_validator=self.permissions_validator,
+                                                          picture_validator=self.picture_validator)
                 self.result = interactor.set_params(scene_id=self.scene_id, picture=self.picture,
                                                     logged_person_id=self.logged_person_id).execute()
             except Exception as e:
@@ -545,6 +561,14 @@ class TestUploadScenePictureInteractor:
             assert type(self.error) is NoPermissionException
             return self
 
+        def then_should_validate_picture(self):
+            self.picture_validator.validate_picture.assert_called_once_with(self.picture)
+            return self
+
+        def then_should_raise_invalid_picture_exception(self):
+            assert self.error == InvalidEntityException(source='picture', code='wrong_size', message='Too big')
+            return self
+
 
 class TestIndexExperiencesInteractor:
 
@@ -558,10 +582,41 @@ class TestIndexExperiencesInteractor:
                 .given_an_scene(id='8', experience_id='3') \
                 .given_an_experience(id='4') \
                 .given_an_experience_repo_that_returns_them() \
-                .when_index(from_id='1', to_id='10') \
-                .should_call_get_experiences_and_their_scenes() \
-                .should_index_experiences_and_their_scenes() \
-                .should_delete_experiences([1, 4, 5, 6, 7, 8, 9, 10])
+                .given_existing_experiences_ids(['1', '2', '3', '4', '6']) \
+                .given_a_search_repo_that_returns_stats(indexed=1, deleted=2, failed=0) \
+                .when_index(from_id='1', to_id='10', chunk_size=4) \
+                .should_call_get_experiences_and_their_scenes_by_chunks(
+                        [['1', '2', '3', '4'], ['5', '6', '7', '8'], ['9', '10']], [['2', '3', '4'], [], []]) \
+                .should_bulk_index_experiences_and_their_scenes_by_chunks(
+                        [[(0, [0, 1]), (1, [2, 3])], [], []],
+                        [['1', '4'], ['6'], []]) \
+                .should_return_stats(indexed=3, deleted=6, failed=0)
+
+    def test_filling_a_new_index_by_range_does_not_delete(self):
+        TestIndexExperiencesInteractor.ScenarioMaker() \
+                .given_an_experience(id='2') \
+                .given_an_scene(id='5', experience_id='2') \
+                .given_an_experience(id='4') \
+                .given_an_experience_repo_that_returns_them() \
+                .given_existing_experiences_ids(['1', '2', '4']) \
+                .given_a_search_repo_that_returns_stats(indexed=1, deleted=0, failed=0) \
+                .when_index(from_id='1', to_id='4', chunk_size=4, index='experience_index_2') \
+                .should_bulk_index_experiences_and_their_scenes_by_chunks([[(0, [0])]], [[]],
+                                                                          index='experience_index_2') \
+                .should_return_stats(indexed=1, deleted=0, failed=0)
+
+    def test_indexes_ids_list_by_chunks(self):
+        TestIndexExperiencesInteractor.ScenarioMaker() \
+                .given_an_experience(id='2') \
+                .given_an_scene(id='5', experience_id='2') \
+                .given_an_experience(id='9') \
+                .given_an_experience_repo_that_returns_them() \
+                .given_a_search_repo_that_returns_stats(indexed=1, deleted=1, failed=0) \
+                .when_index_ids(ids=['2', '9', '30'], chunk_size=2) \
+                .should_call_get_experiences_and_their_scenes_by_chunks([['2', '9'], ['30']], [['2', '9'], []]) \
+                .should_bulk_index_experiences_and_their_scenes_by_chunks([[(0, [0])], []], [['9'], ['30']],
+                                                                          chunk_size=2) \
+                .should_return_stats(indexed=2, deleted=2, failed=0)
 
     class ScenarioMaker:
 
@@ -581,39 +636,207 @@ class TestIndexExperiencesInteractor:
 
         def given_an_experience_repo_that_returns_them(self):
 
-            def fake_get_experience(id):
-                experiences = [x for x in self.experiences if x.id == id]
-                if len(experiences) > 0:
-                    return experiences[0]
-                else:
-                    raise EntityDoesNotExistException
+            def fake_get_experiences_by_ids(ids):
+                return [x for x in self.experiences if x.id in ids]
             self.repo = Mock()
-            self.repo.get_experience.side_effect = fake_get_experience
-
-            def fake_get_scenes(experience_id):
-                return [x for x in self.scenes if x.experience_id == experience_id]
+            self.repo.get_experiences_by_ids.side_effect = fake_get_experiences_by_ids
+
+            def fake_get_scenes_of_experiences(experiences_ids):
+                scenes_by_experience = {}
+                for scene in self.scenes:
+                    if scene.experience_id in experiences_ids:
+                        scenes_by_experience.setdefault(scene.experience_id, []).append(scene)
+                return scenes_by_experience
             self.scene_repo = Mock()
-            self.scene_repo.get_scenes.side_effect = fake_get_scenes
+            self.scene_repo.get_scenes_of_experiences.side_effect = fake_get_scenes_of_experiences
+
+            return self
+
+        def given_existing_experiences_ids(self, existing_ids):
+            self.repo.get_existing_experiences_ids.side_effect = \
+                lambda ids: [experience_id for experience_id in ids if experience_id in existing_ids]
+            return self
+
+        def given_a_search_repo_that_returns_stats(self, indexed, deleted, failed):
+            self.search_repo.bulk_index_experiences.return_value = {'indexed': indexed,
+                                                                    'deleted': deleted,
+                                                                    'failed': failed,
+                                                                    'failed_ids': []}
+            return self
 
+        def when_index(self, from_id, to_id, chunk_size, index=None):
+            interactor = IndexExperiencesInteractor(self.repo, self.search_repo, self.scene_repo)
+            self.result = interactor.set_params(from_id, to_id, chunk_size=chunk_size, index=index).execute()
             return self
 
-        def when_index(self, from_id, to_id):
+        def when_index_ids(self, ids, chunk_size):
             interactor = IndexExperiencesInteractor(self.repo, self.search_repo, self.scene_repo)
-            self.result = interactor.set_params(from_id, to_id).execute()
+            self.result = interactor.set_params(ids=ids, chunk_size=chunk_size).execute()
+            return self
+
+        def should_call_get_experiences_and_their_scenes_by_chunks(self, chunks_ids, chunks_experiences_ids):
+            assert self.repo.get_experiences_by_ids.mock_calls == [call(ids) for ids in chunks_ids]
+            assert self.scene_repo.get_scenes_of_experiences.mock_calls == \
+                [call(ids) for ids in chunks_experiences_ids]
+            return self
+
+        def should_bulk_index_experiences_and_their_scenes_by_chunks(self, chunks_indexed, chunks_deleted_ids,
+                                                                     chunk_size=4, index=None):
+            expected_calls = []
+            for indexed, deleted_ids in zip(chunks_indexed, chunks_deleted_ids):
+                experiences_and_scenes = [(self.experiences[experience_position],
+                                           [self.scenes[i] for i in scenes_positions])
+                                          for experience_position, scenes_positions in indexed]
+                expected_calls.append(call(experiences_and_scenes, deleted_ids,
+                                           chunk_size=chunk_size, concurrency=1, index=index))
+            assert self.search_repo.bulk_index_experiences.mock_calls == expected_calls
+            return self
+
+        def should_return_stats(self, indexed, deleted, failed):
+            assert self.result['indexed'] == indexed
+            assert self.result['deleted'] == deleted
+            assert self.result['failed'] == failed
+            assert self.result['seconds'] >= 0
+            return self
+
+
+class TestProcessExperienceIndexEventsInteractor:
+
+    def test_indexes_events_experiences_and_deletes_events(self):
+        TestProcessExperienceIndexEventsInteractor.ScenarioMaker() \
+                .given_an_event_repo_with_pending_events(events_ids=[1, 2, 3], experiences_ids=['4', '7']) \
+                .given_an_index_interactor_that_returns(failed=0) \
+                .given_a_search_repo_that_updates(failed=0) \
+                .when_process_events(batch_size=3) \
+                .then_should_get_pending_events(limit=3) \
+                .then_should_index_experiences(['4', '7']) \
+                .then_should_not_update_saves_counts() \
+                .then_should_finish_events([1, 2, 3], failed_experiences_ids=[]) \
+                .then_result_should_be(events=3, updated=0, failed=0)
+
+    def test_finishes_events_marking_failed_experiences(self):
+        TestProcessExperienceIndexEventsInteractor.ScenarioMaker() \
+                .given_an_event_repo_with_pending_events(events_ids=[1, 2, 3], experiences_ids=['4', '7']) \
+                .given_an_index_interactor_that_returns(failed=1, failed_ids=['4']) \
+                .given_a_search_repo_that_updates(failed=0) \
+                .when_process_events(batch_size=10) \
+                .then_should_index_experiences(['4', '7']) \
+                .then_should_finish_events([1, 2, 3], failed_experiences_ids=['4']) \
+                .then_result_should_be(events=3, updated=0, failed=1)
+
+    def test_updates_saves_counts_with_partial_updates(self):
+        TestProcessExperienceIndexEventsInteractor.ScenarioMaker() \
+                .given_an_event_repo_with_pending_events(events_ids=[1, 2], experiences_ids=[],
+                                                         saves_counts_experiences_ids=['4', '5']) \
+                .given_an_index_interactor_that_returns(failed=0) \
+                .given_an_experience_repo_with_saves_counts({'4': 3, '5': 0}) \
+                .given_a_search_repo_that_updates(failed=0) \
+                .when_process_events(batch_size=10) \
+                .then_should_not_index_experiences() \
+                .then_should_get_saves_counts(['4', '5']) \
+                .then_should_update_saves_counts({'4': 3, '5': 0}) \
+                .then_should_finish_events([1, 2], failed_experiences_ids=[]) \
+                .then_result_should_be(events=2, updated=2, failed=0)
+
+    def test_marks_failed_saves_count_updates(self):
+        TestProcessExperienceIndexEventsInteractor.ScenarioMaker() \
+                .given_an_event_repo_with_pending_events(events_ids=[1, 2], experiences_ids=['7'],
+                                                         saves_counts_experiences_ids=['4']) \
+                .given_an_index_interactor_that_returns(failed=0) \
+                .given_an_experience_repo_with_saves_counts({'4': 3}) \
+                .given_a_search_repo_that_updates(failed=1) \
+                .when_process_events(batch_size=10) \
+                .then_should_index_experiences(['7']) \
+                .then_should_update_saves_counts({'4': 3}) \
+                .then_should_finish_events([1, 2], failed_experiences_ids=['4']) \
+                .then_result_should_be(events=2, updated=0, failed=1)
+
+    def test_does_nothing_without_events(self):
+        TestProcessExperienceIndexEventsInteractor.ScenarioMaker() \
+                .given_an_event_repo_with_pending_events(events_ids=[], experiences_ids=[]) \
+                .given_an_index_interactor_that_returns(failed=0) \
+                .given_a_search_repo_that_updates(failed=0) \
+                .when_process_events(batch_size=10) \
+                .then_should_not_index_experiences() \
+                .then_should_not_update_saves_counts() \
+                .then_should_not_finish_events() \
+                .then_result_should_be(events=0, updated=0, failed=0)
+
+    class ScenarioMaker:
+
+        def __init__(self):
+            self.experience_repo = Mock()
+
+        def given_an_event_repo_with_pending_events(self, events_ids, experiences_ids,
+                                                    saves_counts_experiences_ids=None):
+            self.index_event_repo = Mock()
+            self.index_event_repo.get_pending_events.return_value = {
+                    'events_ids': events_ids,
+                    'experiences_ids': experiences_ids,
+                    'saves_counts_experiences_ids': saves_counts_experiences_ids or []}
+            return self
+
+        def given_an_index_interactor_that_returns(self, failed, failed_ids=None):
+            self.index_experiences_interactor = Mock()
+            self.index_experiences_interactor.set_params.return_value = self.index_experiences_interactor
+            self.index_experiences_interactor.execute.return_value = {'indexed': 1, 'deleted': 1, 'failed': failed,
+                                                                      'failed_ids': failed_ids or [], 'seconds': 0.1}
+            return self
+
+        def given_an_experience_repo_with_saves_counts(self, saves_counts):
+            self.experience_repo.get_saves_counts.return_value = saves_counts
+            return self
+
+        def given_a_search_repo_that_updates(self, failed):
+            self.search_repo = Mock()
+            self.search_repo.bulk_update_saves_counts.side_effect = \
+                lambda saves_counts: {'updated': len(saves_counts) - failed, 'failed': failed,
+                                      'failed_ids': sorted(saves_counts)[0:failed]}
+            return self
+
+        def when_process_events(self, batch_size):
+            self.result = ProcessExperienceIndexEventsInteractor(self.index_event_repo,
+                                                                 self.index_experiences_interactor,
+                                                                 self.experience_repo, self.search_repo) \
+                    .set_params(batch_size=batch_size).execute()
+            return self
+
+        def then_should_get_pending_events(self, limit):
+            self.index_event_repo.get_pending_events.assert_called_once_with(limit=limit)
+            return self
+
+        def then_should_index_experiences(self, experiences_ids):
+            self.index_experiences_interactor.set_params.assert_called_once_with(ids=experiences_ids)
+            self.index_experiences_interactor.execute.assert_called_once_with()
+            return self
+
+        def then_should_not_index_experiences(self):
+            self.index_experiences_interactor.set_params.assert_not_called()
+            return self
+
+        def then_should_get_saves_counts(self, experiences_ids):
+            self.experience_repo.get_saves_counts.assert_called_once_with(experiences_ids)
+            return self
+
+        def then_should_update_saves_counts(self, saves_counts):
+            self.search_repo.bulk_update_saves_counts.assert_called_once_with(saves_counts)
+            return self
+
+        def then_should_not_update_saves_counts(self):
+            self.search_repo.bulk_update_saves_counts.assert_not_called()
             return self
 
-        def should_call_get_experiences_and_their_scenes(self):
-            assert self.repo.get_experience.mock_calls == [call(str(i)) for i in range(1, 11)]
-            assert self.scene_repo.get_scenes.mock_calls == [call('2'), call('3'), call('4')]
+        def then_should_finish_events(self, events_ids, failed_experiences_ids):
+            self.index_event_repo.finish_events.assert_called_once_with(events_ids,
+                                                                        failed_experiences_ids=failed_experiences_ids)
             return self
 
-        def should_index_experiences_and_their_scenes(self):
-            assert self.search_repo.index_experience_and_its_scenes.mock_calls == \
-                [call(self.experiences[0], [self.scenes[0], self.scenes[1]]),
-                 call(self.experiences[1], [self.scenes[2], self.scenes[3]])]
+        def then_should_not_finish_events(self):
+            self.index_event_repo.finish_events.assert_not_called()
             return self
 
-        def should_delete_experiences(self, experience_indexes):
-            assert self.search_repo.delete_experience.mock_calls == \
-                    [call(str(index)) for index in experience_indexes]
+        def then_result_should_be(self, events, updated, failed):
+            assert self.result['events'] == events
+            assert self.result['updated'] == updated
+            assert self.result['failed'] == failed
             return self